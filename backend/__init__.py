@@ -3,12 +3,22 @@ from flask import Flask
 from .config import Config
 from .db import db
 from .routes.api import api_bp
+from .cli import register_commands
+from . import migrations
+from .services.cache import init_response_cache
+from .services.badges import get_badge_catalog
+from .services.auth import init_auth
+from .services.passwords import init_password_hasher
+from .services.window_store import init_window_store
+from .services.population import init_population_cache
+from .instrumentation import init_metrics, init_query_counter
+from .sqlite_profile import apply_pragmas, configure_engine_options
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__, instance_relative_config=True)
 
     # Load config
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
 
     # Ensure instance folder exists
     try:
@@ -17,14 +27,29 @@ def create_app():
         pass
 
     # Initialize extensions
+    configure_engine_options(app)
     db.init_app(app)
+    init_response_cache(app)
+    init_auth(app)
+    init_password_hasher(app)
+    init_window_store(app)
+    init_population_cache(app)
 
     # Register blueprints
     app.register_blueprint(api_bp)
+    register_commands(app)
 
-    # Create tables
+    # Create tables, then bring existing databases up to date
     with app.app_context():
+        apply_pragmas(app, db.engine)
+
         from . import models  # noqa: F401
         db.create_all()
+        migrations.upgrade(db.engine)
+        init_query_counter(app, db.engine)
+        init_metrics(app, db.engine)
+
+        # Seed and cache badge definitions once per process
+        get_badge_catalog(db.session)
 
     return app
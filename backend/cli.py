@@ -0,0 +1,122 @@
+from datetime import date
+
+import click
+
+from .db import db
+from .models import User
+from . import migrations
+from .services.rollups import rebuild_daily_rollups
+from .services.badge_backfill import backfill_badges
+from .services.recommendations import precompute_recommendations
+from .services.importer import import_bp_csv
+from .services.badges import BP_INSERT, award_badges_for_events
+from .services.window_store import check_consistency, get_window_store
+
+
+def register_commands(app):
+    """
+    Attach maintenance commands to `flask --app run <command>`.
+    """
+
+    @app.cli.command("db-upgrade")
+    def db_upgrade():
+        """Apply pending schema migrations."""
+        applied = migrations.upgrade(db.engine)
+        if applied:
+            click.echo(f"Applied migrations: {', '.join(str(v) for v in applied)}")
+        else:
+            click.echo("Database schema is up to date.")
+
+    @app.cli.command("rebuild-rollups")
+    @click.option("--user-id", type=int, default=None, help="Only rebuild this user.")
+    def rebuild_rollups(user_id):
+        """Recompute daily_rollups from raw readings and mood logs."""
+        rebuild_daily_rollups(db.session, user_id=user_id)
+        db.session.commit()
+        click.echo("Daily rollups rebuilt" + (f" for user {user_id}." if user_id else "."))
+
+    @app.cli.command("backfill-badges")
+    @click.option("--workers", type=int, default=1, show_default=True, help="Worker processes.")
+    @click.option("--chunk-size", type=int, default=500, show_default=True, help="Users per worker task.")
+    @click.option("--user-id", "user_ids", type=int, multiple=True, help="Only these users (repeatable).")
+    def backfill_badges_command(workers, chunk_size, user_ids):
+        """Award badges from history with their true earned_at."""
+        stats = backfill_badges(
+            db.session,
+            app.config["SQLALCHEMY_DATABASE_URI"],
+            workers=workers,
+            chunk_size=chunk_size,
+            user_ids=list(user_ids) or None,
+        )
+        click.echo(
+            f"Processed {stats['users']} users, wrote {stats['awards']} awards "
+            f"in {stats['seconds']:.2f}s ({stats['users_per_second']:.1f} users/s)."
+        )
+
+    @app.cli.command("precompute-recommendations")
+    @click.option("--date", "day", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+                  help="Day to compute for (default: today).")
+    @click.option("--workers", type=int, default=1, show_default=True, help="Worker processes.")
+    @click.option("--chunk-size", type=int, default=1000, show_default=True, help="Users per worker task.")
+    def precompute_recommendations_command(day, workers, chunk_size):
+        """Store today's recommendation for every active user."""
+        today = day.date() if day else date.today()
+        stats = precompute_recommendations(
+            db.session,
+            app.config["SQLALCHEMY_DATABASE_URI"],
+            today,
+            workers=workers,
+            chunk_size=chunk_size,
+        )
+        click.echo(
+            f"Precomputed {stats['users']} recommendations for {today} "
+            f"in {stats['seconds']:.2f}s ({stats['users_per_second']:.1f} users/s)."
+        )
+
+    @app.cli.command("import-bp")
+    @click.option("--user-id", type=int, required=True, help="User to import readings for.")
+    @click.argument("csv_file", type=click.File("r", encoding="utf-8-sig"))
+    def import_bp_command(user_id, csv_file):
+        """Bulk-import BP readings from a device CSV export."""
+        if db.session.get(User, user_id) is None:
+            raise click.ClickException(f"No user with id {user_id}.")
+        try:
+            stats = import_bp_csv(db.session, user_id, csv_file)
+        except ValueError as e:
+            db.session.rollback()
+            raise click.ClickException(str(e))
+
+        if stats["inserted"]:
+            award_badges_for_events(db.session, date.today(), user_id, [BP_INSERT])
+        db.session.commit()
+
+        for error in stats["errors"]:
+            click.echo(f"line {error['line']}: {error['error']}", err=True)
+        click.echo(
+            f"Read {stats['rows']} rows: {stats['inserted']} inserted, {stats['duplicates']} duplicates "
+            f"skipped, {stats['rejected']} rejected in {stats['seconds']:.2f}s "
+            f"({stats['rows_per_second']:.0f} rows/s)."
+        )
+
+    @app.cli.command("check-window-store")
+    @click.option("--user-id", "user_ids", type=int, multiple=True, help="Only these users (repeatable).")
+    @click.option("--date", "day", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+                  help="Day the windows end on (default: today).")
+    def check_window_store_command(user_ids, day):
+        """Compare window-store stats and recommendations with the raw-readings path."""
+        today = day.date() if day else date.today()
+        user_ids = list(user_ids) or db.session.execute(db.select(User.id).order_by(User.id)).scalars().all()
+        store = get_window_store()
+
+        failed = 0
+        for user_id in user_ids:
+            mismatches = check_consistency(store, db.session, user_id, today)
+            store.discard(user_id)
+            for mismatch in mismatches:
+                click.echo(f"user {user_id}, {mismatch['check']}: store={mismatch['store']} "
+                           f"db={mismatch['db']}", err=True)
+            failed += bool(mismatches)
+
+        click.echo(f"Checked {len(user_ids)} users: {failed} inconsistent.")
+        if failed:
+            raise SystemExit(1)
@@ -8,3 +8,60 @@ class Config:
 
     SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(INSTANCE_DIR, "bp_guardian.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # SQLite pragmas + pool settings, see backend/sqlite_profile.py
+    # ("default" or "production")
+    SQLITE_PROFILE = os.environ.get("SQLITE_PROFILE", "default")
+
+    # Max number of BP + mood items accepted by POST /api/batch
+    BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", 500))
+
+    # Page size for GET /api/bp and /api/mood: default and server-side cap
+    LIST_DEFAULT_LIMIT = int(os.environ.get("LIST_DEFAULT_LIMIT", 20))
+    LIST_MAX_LIMIT = int(os.environ.get("LIST_MAX_LIMIT", 200))
+
+    # Max changes returned by one GET /api/sync call
+    SYNC_MAX_CHANGES = int(os.environ.get("SYNC_MAX_CHANGES", 1000))
+
+    # Per-user response cache: "memory" (per process), "disk" (shared
+    # SQLite file for all workers on the host) or "none"
+    RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "memory")
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 10000))
+    RESPONSE_CACHE_PATH = os.environ.get(
+        "RESPONSE_CACHE_PATH", os.path.join(INSTANCE_DIR, "response_cache.db")
+    )
+
+    # Validated-user cache used by get_current_user_id (X-User-Id path)
+    AUTH_CACHE_MAX_ENTRIES = int(os.environ.get("AUTH_CACHE_MAX_ENTRIES", 10000))
+    AUTH_CACHE_TTL_SECONDS = float(os.environ.get("AUTH_CACHE_TTL_SECONDS", 300))
+
+    # In-process 7/30/365-day window stats (services/window_store.py):
+    # cap on day buckets held across all users (one per user per active
+    # day, ~240 bytes each)
+    WINDOW_STORE_MAX_BUCKETS = int(os.environ.get("WINDOW_STORE_MAX_BUCKETS", 250_000))
+
+    # Shared secret for staff endpoints (/api/admin/...), sent in the
+    # X-Admin-Token header; unset disables them
+    ADMIN_API_TOKEN = os.environ.get("ADMIN_API_TOKEN")
+
+    # Max user ids per POST /api/recommendations/batch
+    RECOMMENDATION_BATCH_MAX_USERS = int(os.environ.get("RECOMMENDATION_BATCH_MAX_USERS", 1000))
+
+    # Seconds a classified population snapshot is reused by
+    # /api/admin/population (0 = query on every request)
+    POPULATION_CACHE_SECONDS = float(os.environ.get("POPULATION_CACHE_SECONDS", 60))
+
+    # Lifetime of signed session tokens issued by /api/auth/login
+    SESSION_TOKEN_MAX_AGE = int(os.environ.get("SESSION_TOKEN_MAX_AGE", 30 * 24 * 3600))
+
+    # Return the per-request SQL query count in an X-Query-Count header
+    EXPOSE_QUERY_COUNT = os.environ.get("EXPOSE_QUERY_COUNT", "0") == "1"
+
+    # Password hashing: werkzeug method string including its cost, e.g.
+    # "scrypt:32768:8:1" or "pbkdf2:sha256:600000". Stored hashes made with
+    # other parameters are upgraded on the next successful login.
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    # Dedicated hashing threads (0 = hash inline on the request thread)
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+    # Queued + running hash jobs before register/login answer 503
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 64))
@@ -0,0 +1,226 @@
+"""
+Request and database instrumentation.
+
+Per-request SQL query counting: every statement executed while handling
+a request increments g.query_count. With EXPOSE_QUERY_COUNT enabled the
+count is returned in the X-Query-Count response header.
+
+Metrics: request counts, latency, per-request query counts and SQL time
+(by route and method), DB totals, pool state and timings of selected
+service functions are kept in a per-app Metrics registry and rendered in
+the Prometheus text format by GET /metrics.
+"""
+import functools
+import threading
+import time
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+
+
+# -------------------------
+# Query counting
+# -------------------------
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = g.get("query_count", 0) + 1
+
+
+def init_query_counter(app, engine):
+    event.listen(engine, "before_cursor_execute", _count_query)
+
+    @app.after_request
+    def add_query_count_header(response):
+        if app.config["EXPOSE_QUERY_COUNT"]:
+            response.headers["X-Query-Count"] = str(g.get("query_count", 0))
+        return response
+
+
+# -------------------------
+# Metrics registry
+# -------------------------
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+METRIC_PREFIX = "bp_guardian"
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}          # (route, method, status) -> count
+        self.latency = {}           # (route, method) -> _Histogram
+        self.request_queries = {}   # (route, method) -> _Histogram
+        self.request_sql_time = {}  # (route, method) -> _Histogram
+        self.services = {}          # function -> _Histogram
+        self.queries_total = 0
+        self.query_seconds_total = 0.0
+
+    def _histogram(self, family, key, buckets):
+        histogram = family.get(key)
+        if histogram is None:
+            histogram = family[key] = _Histogram(buckets)
+        return histogram
+
+    def observe_request(self, route, method, status, seconds, queries, sql_seconds):
+        key = (route, method)
+        with self._lock:
+            self.requests[(route, method, status)] = self.requests.get((route, method, status), 0) + 1
+            self._histogram(self.latency, key, LATENCY_BUCKETS).observe(seconds)
+            self._histogram(self.request_queries, key, QUERY_COUNT_BUCKETS).observe(queries)
+            self._histogram(self.request_sql_time, key, LATENCY_BUCKETS).observe(sql_seconds)
+
+    def observe_query(self, seconds):
+        with self._lock:
+            self.queries_total += 1
+            self.query_seconds_total += seconds
+
+    def observe_service(self, name, seconds):
+        with self._lock:
+            self._histogram(self.services, name, LATENCY_BUCKETS).observe(seconds)
+
+    # -------------------------
+    # Prometheus text format
+    # -------------------------
+
+    def render(self, pool=None) -> str:
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+
+        def histogram(name, help_text, family, label_names):
+            header(name, "histogram", help_text)
+            for key, h in sorted(family.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                base = dict(zip(label_names, key))
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f"{METRIC_PREFIX}_{name}_bucket{{{_labels(**base, le=bound)}}} {cumulative}")
+                lines.append(f'{METRIC_PREFIX}_{name}_bucket{{{_labels(**base, le="+Inf")}}} {h.count}')
+                lines.append(f"{METRIC_PREFIX}_{name}_sum{{{_labels(**base)}}} {h.sum}")
+                lines.append(f"{METRIC_PREFIX}_{name}_count{{{_labels(**base)}}} {h.count}")
+
+        with self._lock:
+            header("http_requests_total", "counter", "HTTP requests by route, method and status.")
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f"{METRIC_PREFIX}_http_requests_total{{{_labels(route=route, method=method, status=status)}}} {count}")
+
+            histogram("http_request_duration_seconds", "Request latency.", self.latency, ("route", "method"))
+            histogram("http_request_queries", "SQL statements per request.", self.request_queries, ("route", "method"))
+            histogram("http_request_sql_seconds", "Time spent in SQL per request.", self.request_sql_time, ("route", "method"))
+            histogram("service_duration_seconds", "Service function run time.", self.services, ("function",))
+
+            header("db_queries_total", "counter", "SQL statements executed.")
+            lines.append(f"{METRIC_PREFIX}_db_queries_total {self.queries_total}")
+            header("db_query_seconds_total", "counter", "Total time spent executing SQL.")
+            lines.append(f"{METRIC_PREFIX}_db_query_seconds_total {self.query_seconds_total}")
+
+        if pool is not None:
+            for name, attr, help_text in (
+                ("db_pool_size", "size", "Configured pool size."),
+                ("db_pool_checked_out", "checkedout", "Connections currently in use."),
+                ("db_pool_checked_in", "checkedin", "Idle connections in the pool."),
+                ("db_pool_overflow", "overflow", "Connections opened beyond pool_size."),
+            ):
+                # Only QueuePool-style pools report these
+                fn = getattr(pool, attr, None)
+                if fn is not None:
+                    header(name, "gauge", help_text)
+                    lines.append(f"{METRIC_PREFIX}_{name} {fn()}")
+
+        return "\n".join(lines) + "\n"
+
+
+def get_metrics():
+    return current_app.extensions["metrics"]
+
+
+def timed(name):
+    """
+    Record a function's run time under service_duration_seconds when it
+    runs inside an app with metrics (no-op elsewhere, e.g. CLI workers).
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if has_app_context() and "metrics" in current_app.extensions:
+                    get_metrics().observe_service(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+# -------------------------
+# Hooks
+# -------------------------
+
+def init_metrics(app, engine):
+    metrics = app.extensions["metrics"] = Metrics()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info.pop("query_started")
+        metrics.observe_query(seconds)
+        if has_request_context():
+            g.sql_seconds = g.get("sql_seconds", 0.0) + seconds
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    def record(status):
+        if g.get("request_recorded") or "request_started" not in g:
+            return
+        g.request_recorded = True
+        # Route template, not the raw path, to keep label cardinality bounded
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        metrics.observe_request(
+            route, request.method, status,
+            time.perf_counter() - g.request_started,
+            g.get("query_count", 0),
+            g.get("sql_seconds", 0.0),
+        )
+
+    @app.after_request
+    def record_request(response):
+        record(response.status_code)
+        return response
+
+    @app.teardown_request
+    def record_failed_request(exc):
+        if exc is not None:
+            record(500)
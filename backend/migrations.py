@@ -0,0 +1,145 @@
+"""
+Minimal versioned schema migrations.
+
+db.create_all() only creates missing tables; it never adds indexes or
+columns to tables that already exist. Every schema change that must
+reach existing databases is registered here as a numbered step. Applied
+versions are recorded in the schema_migrations table, so each step runs
+exactly once per database. Steps should be idempotent so they are also
+safe on a database that create_all() has just built from the models.
+"""
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from .models import BPReading, DailyRollup, MoodLog, UserBadge
+from .services.rollups import rebuild_daily_rollups
+
+
+MIGRATIONS = []
+
+
+def migration(version: int, description: str):
+    """
+    Register a migration step. Steps run in ascending version order.
+    """
+    def decorator(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return decorator
+
+
+def _create_index(conn, table, name):
+    """
+    Create the model-declared index `name` on `table` if it is missing.
+    """
+    for index in table.indexes:
+        if index.name == name:
+            index.create(conn, checkfirst=True)
+            return
+    raise LookupError(f"Index {name} is not declared on {table.name}")
+
+
+# -------------------------
+# Migration steps
+# -------------------------
+
+@migration(1, "Composite (user_id, timestamp) indexes and unique user badges")
+def _add_user_timestamp_indexes(conn):
+    _create_index(conn, BPReading.__table__, "ix_bp_readings_user_id_timestamp")
+    _create_index(conn, MoodLog.__table__, "ix_mood_logs_user_id_timestamp")
+
+    # Older databases may hold duplicate awards; keep the earliest one
+    conn.execute(text(
+        "DELETE FROM user_badges WHERE id NOT IN ("
+        " SELECT MIN(id) FROM user_badges GROUP BY user_id, badge_id"
+        ")"
+    ))
+    _create_index(conn, UserBadge.__table__, "uq_user_badges_user_id_badge_id")
+
+
+@migration(2, "Backfill daily_rollups from existing readings and mood logs")
+def _backfill_daily_rollups(conn):
+    rebuild_daily_rollups(conn)
+
+
+@migration(3, "Add users.data_updated_at")
+def _add_user_data_updated_at(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("users")}
+    if "data_updated_at" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN data_updated_at DATETIME"))
+
+
+@migration(4, "Seed change_log from existing readings, mood logs and badge awards")
+def _seed_change_log(conn):
+    # Existing rows become the start of each user's change sequence, in time order
+    if conn.execute(text("SELECT 1 FROM change_log LIMIT 1")).first():
+        return
+    conn.execute(text(
+        "INSERT INTO change_log (user_id, kind, row_id)"
+        " SELECT user_id, kind, row_id FROM ("
+        "  SELECT user_id, 'bp' AS kind, id AS row_id, timestamp AS ts FROM bp_readings"
+        "  UNION ALL SELECT user_id, 'mood', id, timestamp FROM mood_logs"
+        "  UNION ALL SELECT user_id, 'badge', id, earned_at FROM user_badges"
+        " ) ORDER BY ts"
+    ))
+
+
+@migration(5, "Add client_id idempotency keys to bp_readings and mood_logs")
+def _add_client_ids(conn):
+    for table in (BPReading.__table__, MoodLog.__table__):
+        columns = {c["name"] for c in inspect(conn).get_columns(table.name)}
+        if "client_id" not in columns:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN client_id VARCHAR(36)"))
+    _create_index(conn, BPReading.__table__, "uq_bp_readings_user_id_client_id")
+    _create_index(conn, MoodLog.__table__, "uq_mood_logs_user_id_client_id")
+
+
+@migration(6, "Add a (day, user_id) index to daily_rollups")
+def _add_daily_rollups_day_index(conn):
+    _create_index(conn, DailyRollup.__table__, "ix_daily_rollups_day_user_id")
+
+
+# -------------------------
+# Runner
+# -------------------------
+
+def get_schema_version(conn) -> int:
+    if not inspect(conn).has_table("schema_migrations"):
+        return 0
+    version = conn.execute(text("SELECT MAX(version) FROM schema_migrations")).scalar()
+    return version or 0
+
+
+def upgrade(engine):
+    """
+    Apply all pending migrations, each in its own transaction.
+    Returns the list of versions that were applied.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            " version INTEGER PRIMARY KEY,"
+            " description VARCHAR(255) NOT NULL,"
+            " applied_at DATETIME NOT NULL"
+            ")"
+        ))
+        current = get_schema_version(conn)
+
+    applied = []
+    for version, description, fn in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as conn:
+            fn(conn)
+            conn.execute(
+                text(
+                    "INSERT INTO schema_migrations (version, description, applied_at) "
+                    "VALUES (:version, :description, :applied_at)"
+                ),
+                {"version": version, "description": description, "applied_at": datetime.utcnow()},
+            )
+        applied.append(version)
+
+    return applied
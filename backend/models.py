@@ -10,6 +10,8 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     name = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Last time a BP reading or mood log was written for this user
+    data_updated_at = db.Column(db.DateTime)
 
     bp_readings = db.relationship("BPReading", back_populates="user", cascade="all, delete-orphan")
     mood_logs = db.relationship("MoodLog", back_populates="user", cascade="all, delete-orphan")
@@ -25,9 +27,16 @@ class BPReading(db.Model):
     systolic = db.Column(db.Integer, nullable=False)
     diastolic = db.Column(db.Integer, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Optional client-generated UUID; makes retried writes idempotent
+    client_id = db.Column(db.String(36))
 
     user = db.relationship("User", back_populates="bp_readings")
 
+    __table_args__ = (
+        db.Index("ix_bp_readings_user_id_timestamp", "user_id", "timestamp"),
+        db.Index("uq_bp_readings_user_id_client_id", "user_id", "client_id", unique=True),
+    )
+
 
 class MoodLog(db.Model):
     __tablename__ = "mood_logs"
@@ -38,9 +47,16 @@ class MoodLog(db.Model):
     mood_level = db.Column(db.Integer, nullable=False)  # 1–3 scale
     note = db.Column(db.String(255))
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Optional client-generated UUID; makes retried writes idempotent
+    client_id = db.Column(db.String(36))
 
     user = db.relationship("User", back_populates="mood_logs")
 
+    __table_args__ = (
+        db.Index("ix_mood_logs_user_id_timestamp", "user_id", "timestamp"),
+        db.Index("uq_mood_logs_user_id_client_id", "user_id", "client_id", unique=True),
+    )
+
 
 class Badge(db.Model):
     __tablename__ = "badges"
@@ -61,3 +77,76 @@ class UserBadge(db.Model):
 
     user = db.relationship("User", back_populates="user_badges")
     badge = db.relationship("Badge")
+
+    __table_args__ = (
+        db.Index("uq_user_badges_user_id_badge_id", "user_id", "badge_id", unique=True),
+    )
+
+
+class DailyRollup(db.Model):
+    """
+    Per-user, per-day aggregates of BP readings and mood logs.
+    Maintained in the same transaction as every insert (see services/rollups.py).
+    """
+    __tablename__ = "daily_rollups"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+
+    bp_count = db.Column(db.Integer, nullable=False, default=0)
+    systolic_sum = db.Column(db.Integer, nullable=False, default=0)
+    systolic_min = db.Column(db.Integer)
+    systolic_max = db.Column(db.Integer)
+    diastolic_sum = db.Column(db.Integer, nullable=False, default=0)
+    diastolic_min = db.Column(db.Integer)
+    diastolic_max = db.Column(db.Integer)
+
+    mood_count = db.Column(db.Integer, nullable=False, default=0)
+    mood_sum = db.Column(db.Integer, nullable=False, default=0)
+    mood_min = db.Column(db.Integer)
+    mood_max = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.Index("uq_daily_rollups_user_id_day", "user_id", "day", unique=True),
+        # Covering index for "who has data since day X" across all users
+        db.Index("ix_daily_rollups_day_user_id", "day", "user_id"),
+    )
+
+
+class DailyRecommendation(db.Model):
+    """
+    Precomputed /api/recommendation/today payload for one user and day
+    (see services/recommendations.py).
+    """
+    __tablename__ = "daily_recommendations"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    # Snapshot time: data written after this makes the row stale
+    computed_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index("uq_daily_recommendations_user_id_day", "user_id", "day", unique=True),
+    )
+
+
+class ChangeLog(db.Model):
+    """
+    Append-only change sequence for delta sync: one row per created BP
+    reading, mood log or badge award. The id is the sync cursor; it only
+    ever grows (AUTOINCREMENT, never reused), so it is monotonic per user.
+    """
+    __tablename__ = "change_log"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    kind = db.Column(db.String(10), nullable=False)  # "bp", "mood" or "badge"
+    row_id = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_change_log_user_id_id", "user_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
@@ -1,11 +1,49 @@
-from flask import Blueprint, jsonify, request, abort, render_template
-from datetime import datetime, timedelta, date
-from werkzeug.security import generate_password_hash, check_password_hash
+import hashlib
+import hmac
+import io
+import json
+from types import SimpleNamespace
+from flask import Blueprint, jsonify, request, abort, render_template, current_app, url_for
+from datetime import datetime, timedelta, date, timezone
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 
 from ..db import db
-from ..models import BPReading, MoodLog, User, Badge, UserBadge
-from ..services.rules_engine import get_daily_recommendation
-from ..services.badges import evaluate_and_award_badges
+from ..models import User
+from ..services.badges import BP_INSERT, MOOD_INSERT, award_badges_for_events, get_user_badges
+from ..services.ingest import (
+    validate_bp_payload,
+    validate_mood_payload,
+    insert_bp_readings,
+    insert_mood_logs,
+    pending_stamp_change,
+    serialize_bp_row,
+    serialize_mood_row,
+    to_utc_naive,
+)
+from ..services.rollups import get_daily_rollups
+from ..services.cache import get_response_cache
+from ..services.downsample import downsample_bp_rows, downsample_mood_rows
+from ..services.export import EXPORT_FORMATS, export_history
+from ..services.importer import import_bp_csv
+from ..services.sync import get_changes, get_latest_cursor
+from ..services.window_store import WINDOW_DAYS, get_window_store
+from ..services.population import CATEGORIES, FILTER_FIELDS, get_population_cache, summarize_population
+from ..instrumentation import get_metrics
+from ..services.recommendations import compute_recommendations, get_stored_recommendation
+from ..services.auth import get_user_id_cache, issue_session_token, verify_session_token
+from ..services.passwords import HasherBusy, get_password_hasher
+from ..services.series import (
+    bp_series_rows,
+    mood_series_rows,
+    bp_page_rows,
+    decode_cursor,
+    encode_cursor,
+    mood_page_rows,
+    serialize_bp_point,
+    serialize_bp_summary,
+    serialize_mood_point,
+)
 
 api_bp = Blueprint("api", __name__)
 
@@ -16,9 +54,18 @@ api_bp = Blueprint("api", __name__)
 def get_current_user_id():
     """
     Prototype auth:
-    - Frontend sends header: X-User-Id: <user_id>
-    - We verify the user exists.
+    - Preferred: header Authorization: Bearer <token> from /api/auth/login,
+      verified by signature only (no database access).
+    - Fallback: header X-User-Id: <user_id>; we verify the user exists,
+      remembering validated ids for a short time.
     """
+    auth_header = request.headers.get("Authorization", "")
+    if auth_header.startswith("Bearer "):
+        user_id_int = verify_session_token(auth_header[len("Bearer "):].strip())
+        if user_id_int is None:
+            abort(401, description="Invalid or expired session token")
+        return user_id_int
+
     user_id = request.headers.get("X-User-Id")
     if not user_id:
         abort(401, description="Missing X-User-Id header")
@@ -28,13 +75,129 @@ def get_current_user_id():
     except ValueError:
         abort(401, description="Invalid X-User-Id header")
 
+    user_cache = get_user_id_cache()
+    if user_id_int in user_cache:
+        return user_id_int
+
     user = db.session.get(User, user_id_int)
     if not user:
         abort(401, description="User not found")
 
+    user_cache.add(user_id_int)
     return user_id_int
 
 
+def require_admin():
+    """
+    Staff endpoints: header X-Admin-Token must match ADMIN_API_TOKEN
+    (endpoints are disabled while it is unset).
+    """
+    expected = current_app.config.get("ADMIN_API_TOKEN")
+    given = request.headers.get("X-Admin-Token", "")
+    if not expected or not hmac.compare_digest(given.encode(), expected.encode()):
+        abort(403, description="Admin token required")
+
+
+def _commit_user_write(user_id: int, events, bp_rows=(), mood_rows=()):
+    """
+    Commit a write of this user's data: award any badges the write
+    events unlocked (same transaction), commit, and fold the new rows
+    into the window store. Cached responses are invalidated by the
+    users.data_updated_at stamp the insert moved.
+    Returns the newly awarded badge codes.
+    """
+    new_badges = award_badges_for_events(db.session, date.today(), user_id, events)
+    stamp_change = pending_stamp_change(db.session, user_id)
+    db.session.commit()
+    if stamp_change is not None:
+        get_window_store().apply_rows(
+            user_id, stamp_change,
+            bp_rows=[r for r in bp_rows if not r.get("replayed")],
+            mood_rows=[r for r in mood_rows if not r.get("replayed")],
+        )
+    return new_badges
+
+
+def _retry_on_conflict(write):
+    """
+    Run a write; if a concurrent request with the same client_id committed
+    first (unique violation), roll back and run it once more so it
+    resolves to the stored row.
+    """
+    try:
+        return write()
+    except IntegrityError:
+        db.session.rollback()
+        return write()
+
+
+def _make_etag(user_id: int, endpoint: str, params, updated_at) -> str:
+    """
+    Strong validator for a per-user response: changes whenever the
+    request parameters or the user's data (users.data_updated_at) change.
+    """
+    stamp = updated_at.isoformat() if updated_at else "-"
+    raw = f"{user_id}:{endpoint}:{json.dumps(params, sort_keys=True)}:{stamp}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _not_modified(etag: str, last_modified) -> bool:
+    """
+    RFC 9110: If-None-Match wins; If-Modified-Since only applies without it.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def _data_stamp(user_id: int):
+    """
+    The user's users.data_updated_at (None before any write).
+    """
+    return db.session.execute(select(User.data_updated_at).where(User.id == user_id)).scalar()
+
+
+def _cached_json(user_id: int, endpoint: str, params, build):
+    """
+    Serve `build(updated_at)` through the per-user response cache, with
+    an ETag and Last-Modified taken from the user's latest write
+    (`updated_at`, users.data_updated_at). A matching
+    conditional request gets 304 after a single primary-key lookup,
+    before the cache or any analytics query runs.
+
+    Responses that depend on the date carry it as params["day"]; their
+    Last-Modified is never earlier than the start of that day, so an
+    If-Modified-Since from a previous day does not match.
+    """
+    updated_at = _data_stamp(user_id)
+    etag = _make_etag(user_id, endpoint, params, updated_at)
+
+    changed = [updated_at] if updated_at else []
+    if "day" in params:
+        changed.append(datetime.fromisoformat(params["day"]))
+    last_modified = max(changed).replace(microsecond=0, tzinfo=timezone.utc) if changed else None
+
+    if _not_modified(etag, last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        cache = get_response_cache()
+        key = cache.make_key(user_id, endpoint, params, updated_at)
+        body = cache.get(key)
+        if body is None:
+            body = jsonify(build(updated_at)).get_data(as_text=True)
+            cache.set(key, body)
+        response = current_app.response_class(body, status=200, mimetype="application/json")
+
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # Browsers may keep the body but must revalidate before reusing it
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
 # -----------------------
 # PAGES (Frontend routes)
 # -----------------------
@@ -72,9 +235,23 @@ def ping():
     return jsonify({"status": "ok", "message": "BP Guardian backend is running"}), 200
 
 
+@api_bp.route("/metrics", methods=["GET"])
+def metrics():
+    return current_app.response_class(
+        get_metrics().render(db.engine.pool),
+        mimetype="text/plain; version=0.0.4",
+    )
+
+
 # -----------------------
 # AUTH ENDPOINTS
 # -----------------------
+def _hasher_busy_response():
+    response = jsonify({"error": "Server is busy, please try again shortly"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
 @api_bp.route("/api/auth/register", methods=["POST"])
 def register():
     data = request.get_json() or {}
@@ -89,7 +266,10 @@ def register():
     if existing:
         return jsonify({"error": "Email already registered"}), 400
 
-    password_hash = generate_password_hash(password)
+    try:
+        password_hash = get_password_hasher().hash(password)
+    except HasherBusy:
+        return _hasher_busy_response()
     user = User(email=email, password_hash=password_hash, name=name)
 
     db.session.add(user)
@@ -112,18 +292,93 @@ def login():
     if not email or not password:
         return jsonify({"error": "email and password are required"}), 400
 
+    hasher = get_password_hasher()
     user = User.query.filter_by(email=email).first()
-    if not user or not check_password_hash(user.password_hash, password):
-        return jsonify({"error": "Invalid email or password"}), 401
+    try:
+        if not user or not hasher.verify(user.password_hash, password):
+            return jsonify({"error": "Invalid email or password"}), 401
+
+        # Upgrade hashes made with older method/cost settings
+        if hasher.needs_rehash(user.password_hash):
+            user.password_hash = hasher.hash(password)
+            db.session.commit()
+    except HasherBusy:
+        return _hasher_busy_response()
 
     return jsonify({
         "message": "Login successful",
+        "token": issue_session_token(user.id),
         "user_id": user.id,
         "email": user.email,
         "name": user.name
     }), 200
 
 
+# -----------------------
+# LIST PAGINATION
+# -----------------------
+def _parse_range_bound(value, end_of_day=False):
+    """
+    `from`/`to` filter value: an ISO date or datetime. A bare date used as
+    an upper bound covers the whole day.
+    """
+    if len(value) == 10:
+        day = date.fromisoformat(value)
+        return datetime.combine(day, datetime.max.time() if end_of_day else datetime.min.time())
+    return to_utc_naive(datetime.fromisoformat(value))
+
+
+def _list_page(user_id: int, fetch_page, serialize):
+    """
+    Keyset-paginated list response. Query params:
+      - limit:  page size (capped at LIST_MAX_LIMIT)
+      - before: cursor, return older rows (default: start at the newest)
+      - after:  cursor, return newer rows
+      - from/to: inclusive ISO date or datetime bounds
+    The body stays a plain list (newest first); the cursor for the next
+    page in the same direction is in X-Next-Cursor and a Link rel="next"
+    header, absent on the last page.
+    """
+    config = current_app.config
+    try:
+        limit = int(request.args.get("limit", config["LIST_DEFAULT_LIMIT"]))
+    except ValueError:
+        limit = config["LIST_DEFAULT_LIMIT"]
+    limit = max(1, min(limit, config["LIST_MAX_LIMIT"]))
+
+    filters = {}
+    for param in ("before", "after"):
+        if request.args.get(param):
+            position = decode_cursor(request.args[param])
+            if position is None:
+                return jsonify({"error": f"invalid {param} cursor"}), 400
+            filters[param] = position
+    try:
+        if request.args.get("from"):
+            filters["start"] = _parse_range_bound(request.args["from"])
+        if request.args.get("to"):
+            filters["end"] = _parse_range_bound(request.args["to"], end_of_day=True)
+    except ValueError:
+        return jsonify({"error": "from and to must be ISO 8601 dates"}), 400
+
+    rows, has_more = fetch_page(db.session, user_id, limit, **filters)
+    response = jsonify([serialize(r._mapping) for r in rows])
+
+    if has_more and rows:
+        # Continue in the direction being paged: older by default, newer for `after`
+        forward = "after" in filters and "before" not in filters
+        next_param = "after" if forward else "before"
+        next_cursor = encode_cursor(rows[0] if forward else rows[-1])
+        args = request.args.to_dict()
+        args.pop("before", None)
+        args.pop("after", None)
+        args[next_param] = next_cursor
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{url_for(request.endpoint, **args)}>; rel="next"'
+
+    return response, 200
+
+
 # -----------------------
 # BP ENDPOINTS
 # -----------------------
@@ -132,65 +387,26 @@ def add_bp_reading():
     user_id = get_current_user_id()
     data = request.get_json() or {}
 
-    try:
-        systolic = int(data.get("systolic"))
-        diastolic = int(data.get("diastolic"))
-    except (TypeError, ValueError):
-        return jsonify({"error": "systolic and diastolic must be integers"}), 400
-
-    if systolic <= 0 or diastolic <= 0:
-        return jsonify({"error": "systolic and diastolic must be positive values"}), 400
-
-    timestamp = None
-    timestamp_str = data.get("timestamp")
-    if timestamp_str:
-        try:
-            timestamp = datetime.fromisoformat(timestamp_str)
-        except ValueError:
-            return jsonify({"error": "timestamp must be ISO 8601"}), 400
-
-    reading = BPReading(user_id=user_id, systolic=systolic, diastolic=diastolic)
-    if timestamp:
-        reading.timestamp = timestamp
-
-    db.session.add(reading)
-    db.session.commit()
+    values, error = validate_bp_payload(data)
+    if error:
+        return jsonify({"error": error}), 400
 
-    return jsonify({
-        "id": reading.id,
-        "user_id": reading.user_id,
-        "systolic": reading.systolic,
-        "diastolic": reading.diastolic,
-        "timestamp": reading.timestamp.isoformat()
-    }), 201
+    def write():
+        [row] = insert_bp_readings(db.session, user_id, [values])
+        if row.get("replayed"):
+            # Retry of a write that already succeeded: return the original row
+            return jsonify({**serialize_bp_row(row), "new_badges": []}), 200
+        new_badges = _commit_user_write(user_id, [BP_INSERT], bp_rows=[row])
+        return jsonify({**serialize_bp_row(row), "new_badges": new_badges}), 201
+
+    return _retry_on_conflict(write)
 
 
 @api_bp.route("/api/bp", methods=["GET"])
 def list_bp_readings():
     user_id = get_current_user_id()
 
-    try:
-        limit = int(request.args.get("limit", 20))
-    except ValueError:
-        limit = 20
-
-    readings = (
-        BPReading.query
-        .filter_by(user_id=user_id)
-        .order_by(BPReading.timestamp.desc())
-        .limit(limit)
-        .all()
-    )
-
-    return jsonify([
-        {
-            "id": r.id,
-            "user_id": r.user_id,
-            "systolic": r.systolic,
-            "diastolic": r.diastolic,
-            "timestamp": r.timestamp.isoformat()
-        } for r in readings
-    ]), 200
+    return _list_page(user_id, bp_page_rows, serialize_bp_row)
 
 
 # -----------------------
@@ -201,66 +417,193 @@ def add_mood_log():
     user_id = get_current_user_id()
     data = request.get_json() or {}
 
-    try:
-        mood_level = int(data.get("mood_level"))
-    except (TypeError, ValueError):
-        return jsonify({"error": "mood_level must be an integer (1,2,3)"}), 400
+    values, error = validate_mood_payload(data)
+    if error:
+        return jsonify({"error": error}), 400
 
-    if mood_level not in (1, 2, 3):
-        return jsonify({"error": "mood_level must be 1, 2, or 3"}), 400
+    def write():
+        [row] = insert_mood_logs(db.session, user_id, [values])
+        if row.get("replayed"):
+            # Retry of a write that already succeeded: return the original row
+            return jsonify({**serialize_mood_row(row), "new_badges": []}), 200
+        new_badges = _commit_user_write(user_id, [MOOD_INSERT], mood_rows=[row])
+        return jsonify({**serialize_mood_row(row), "new_badges": new_badges}), 201
 
-    note = data.get("note")
+    return _retry_on_conflict(write)
 
-    timestamp = None
-    timestamp_str = data.get("timestamp")
-    if timestamp_str:
-        try:
-            timestamp = datetime.fromisoformat(timestamp_str)
-        except ValueError:
-            return jsonify({"error": "timestamp must be ISO 8601"}), 400
 
-    mood_log = MoodLog(user_id=user_id, mood_level=mood_level, note=note)
-    if timestamp:
-        mood_log.timestamp = timestamp
+@api_bp.route("/api/mood", methods=["GET"])
+def list_mood_logs():
+    user_id = get_current_user_id()
 
-    db.session.add(mood_log)
-    db.session.commit()
+    return _list_page(user_id, mood_page_rows, serialize_mood_row)
 
-    return jsonify({
-        "id": mood_log.id,
-        "user_id": mood_log.user_id,
-        "mood_level": mood_log.mood_level,
-        "note": mood_log.note,
-        "timestamp": mood_log.timestamp.isoformat()
-    }), 201
 
+# -----------------------
+# IMPORT (device CSV exports)
+# -----------------------
+@api_bp.route("/api/import/bp", methods=["POST"])
+def import_bp_readings():
+    """
+    Bulk-import BP readings from a CSV upload (multipart field "file") or
+    a raw text/csv body. The file is parsed as a stream and committed in
+    chunks; duplicate timestamps are skipped, so a failed upload can be
+    sent again as is.
+    """
+    user_id = get_current_user_id()
+    upload = request.files.get("file")
+    stream = upload.stream if upload else request.stream
+    lines = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    try:
+        stats = import_bp_csv(db.session, user_id, lines)
+    except (ValueError, UnicodeDecodeError) as e:
+        db.session.rollback()
+        # Chunks before the error stay committed (each one moved
+        # users.data_updated_at, so cached responses are already stale):
+        # award what they unlocked and re-warm the window store
+        _commit_user_write(user_id, [BP_INSERT])
+        get_window_store().discard(user_id)
+        return jsonify({"error": f"Could not read CSV: {e}"}), 400
+
+    new_badges = _commit_user_write(user_id, [BP_INSERT]) if stats["inserted"] else []
+    # Bulk imports are not folded in row by row; re-warm on next read
+    get_window_store().discard(user_id)
+    return jsonify({**stats, "new_badges": new_badges}), 200
 
-@api_bp.route("/api/mood", methods=["GET"])
-def list_mood_logs():
+
+# -----------------------
+# DELTA SYNC (offline client)
+# -----------------------
+@api_bp.route("/api/sync", methods=["GET"])
+def sync_changes():
+    """
+    BP readings, mood logs and badge awards created after `since` (a
+    cursor from a previous call; 0 = from the beginning). Without `since`
+    only the current cursor is returned, for clients that already hold
+    the full data. Returns at most SYNC_MAX_CHANGES changes plus the
+    cursor to resume from; has_more says whether to call again right away.
+    """
     user_id = get_current_user_id()
+    if "since" not in request.args:
+        cursor = get_latest_cursor(db.session, user_id)
+        return jsonify({"bp": [], "mood": [], "badges": [], "cursor": cursor, "has_more": False}), 200
+    try:
+        since = int(request.args["since"])
+    except ValueError:
+        return jsonify({"error": "since must be a cursor returned by /api/sync"}), 400
 
+    max_changes = current_app.config["SYNC_MAX_CHANGES"]
     try:
-        limit = int(request.args.get("limit", 3))
+        limit = max(1, min(int(request.args.get("limit", max_changes)), max_changes))
     except ValueError:
-        limit = 20
-
-    moods = (
-        MoodLog.query
-        .filter_by(user_id=user_id)
-        .order_by(MoodLog.timestamp.desc())
-        .limit(limit)
-        .all()
+        limit = max_changes
+
+    return jsonify(get_changes(db.session, user_id, since, limit)), 200
+
+
+# -----------------------
+# EXPORT
+# -----------------------
+@api_bp.route("/api/export", methods=["GET"])
+def export_data():
+    """
+    Full BP + mood history as a streamed download.
+      - format: csv (default) or ndjson
+      - gzip=1: gzip-compress the stream on the fly
+    """
+    user_id = get_current_user_id()
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+    compress = request.args.get("gzip") == "1"
+
+    response = current_app.response_class(
+        export_history(db.engine, user_id, fmt, compress),
+        mimetype=EXPORT_FORMATS[fmt],
     )
+    filename = f"bp_guardian_export_{datetime.utcnow().date().isoformat()}.{fmt}"
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
 
-    return jsonify([
-        {
-            "id": m.id,
-            "user_id": m.user_id,
-            "mood_level": m.mood_level,
-            "note": m.note,
-            "timestamp": m.timestamp.isoformat()
-        } for m in moods
-    ]), 200
+
+# -----------------------
+# BATCH ENDPOINT (offline sync)
+# -----------------------
+@api_bp.route("/api/batch", methods=["POST"])
+def batch_ingest():
+    """
+    Insert many BP readings and mood logs in one request/transaction.
+
+    Body: {"bp": [<bp payload>, ...], "mood": [<mood payload>, ...]}
+    Each item is validated with the same rules as POST /api/bp and
+    POST /api/mood. Valid items are inserted, invalid ones are reported;
+    the response lists one result per item, in request order.
+    """
+    user_id = get_current_user_id()
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({"error": "body must be a JSON object"}), 400
+
+    bp_items = data.get("bp") or []
+    mood_items = data.get("mood") or []
+    if not isinstance(bp_items, list) or not isinstance(mood_items, list):
+        return jsonify({"error": "bp and mood must be arrays"}), 400
+
+    max_items = current_app.config["BATCH_MAX_ITEMS"]
+    if len(bp_items) + len(mood_items) > max_items:
+        return jsonify({"error": f"at most {max_items} items per batch"}), 413
+
+    bp_results, bp_valid = _validate_batch(bp_items, validate_bp_payload)
+    mood_results, mood_valid = _validate_batch(mood_items, validate_mood_payload)
+
+    def write():
+        bp_rows = insert_bp_readings(db.session, user_id, [v for _, v in bp_valid])
+        mood_rows = insert_mood_logs(db.session, user_id, [v for _, v in mood_valid])
+        events = (
+            ([BP_INSERT] if any(not r.get("replayed") for r in bp_rows) else [])
+            + ([MOOD_INSERT] if any(not r.get("replayed") for r in mood_rows) else [])
+        )
+        new_badges = _commit_user_write(user_id, events, bp_rows, mood_rows) if events else []
+        return bp_rows, mood_rows, new_badges
+
+    bp_rows, mood_rows, new_badges = _retry_on_conflict(write)
+
+    # 201 = inserted now, 200 = replay of an earlier write (same client_id)
+    for (index, _), row in zip(bp_valid, bp_rows):
+        status = 200 if row.get("replayed") else 201
+        bp_results[index] = {"index": index, "status": status, "data": serialize_bp_row(row)}
+    for (index, _), row in zip(mood_valid, mood_rows):
+        status = 200 if row.get("replayed") else 201
+        mood_results[index] = {"index": index, "status": status, "data": serialize_mood_row(row)}
+
+    replayed = sum(1 for r in bp_rows + mood_rows if r.get("replayed"))
+    return jsonify({
+        "bp": bp_results,
+        "mood": mood_results,
+        "new_badges": new_badges,
+        "inserted": len(bp_rows) + len(mood_rows) - replayed,
+        "replayed": replayed,
+        "rejected": (len(bp_items) - len(bp_rows)) + (len(mood_items) - len(mood_rows))
+    }), 200
+
+
+def _validate_batch(items, validator):
+    """
+    Validate every item; return (results, valid) where results holds an
+    error entry for each rejected index and valid is [(index, values)].
+    """
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        values, error = validator(item)
+        if error:
+            results[index] = {"index": index, "status": 400, "error": error}
+        else:
+            valid.append((index, values))
+    return results, valid
 
 
 # -----------------------
@@ -287,29 +630,33 @@ def classify_mood_from_avg(avg_mood: float) -> str:
 @api_bp.route("/api/dashboard", methods=["GET"])
 def dashboard():
     user_id = get_current_user_id()
-
     range_param = request.args.get("range", "week")
+
+    # Optional cap on points per series (shape-preserving downsampling)
+    try:
+        max_points = int(request.args["max_points"])
+    except (KeyError, ValueError):
+        max_points = None
+
+    return _cached_json(
+        user_id, "dashboard",
+        {"range": range_param, "max_points": max_points, "day": datetime.utcnow().date().isoformat()},
+        lambda updated_at: _build_dashboard(user_id, range_param, max_points),
+    )
+
+
+def _build_dashboard(user_id: int, range_param: str, max_points=None):
     days = _get_range_days(range_param)
 
     end_dt = datetime.utcnow()
     start_dt = end_dt - timedelta(days=days)
 
-    bp_readings = (
-        BPReading.query
-        .filter(BPReading.user_id == user_id, BPReading.timestamp >= start_dt)
-        .order_by(BPReading.timestamp.asc())
-        .all()
-    )
-
-    mood_logs = (
-        MoodLog.query
-        .filter(MoodLog.user_id == user_id, MoodLog.timestamp >= start_dt)
-        .order_by(MoodLog.timestamp.asc())
-        .all()
-    )
+    # Column projections: plain row tuples, no ORM instances
+    bp_readings = bp_series_rows(db.session, user_id, start_dt)
+    mood_logs = mood_series_rows(db.session, user_id, start_dt)
 
     if not bp_readings:
-        return jsonify({
+        return {
             "range": range_param,
             "start_date": start_dt.date().isoformat(),
             "end_date": end_dt.date().isoformat(),
@@ -319,63 +666,65 @@ def dashboard():
             "bp_series": [],
             "mood_series": [],
             "daily_summary": {"bp_daily": [], "mood_daily": [], "correlation_points": []}
-        }), 200
+        }
 
     last_bp = bp_readings[-1]
     highest_bp = max(bp_readings, key=lambda r: (r.systolic, r.diastolic))
     lowest_bp = min(bp_readings, key=lambda r: (r.systolic, r.diastolic))
 
-    last_bp_obj = {"systolic": last_bp.systolic, "diastolic": last_bp.diastolic, "timestamp": last_bp.timestamp.isoformat()}
-    highest_bp_obj = {"systolic": highest_bp.systolic, "diastolic": highest_bp.diastolic, "timestamp": highest_bp.timestamp.isoformat()}
-    lowest_bp_obj = {"systolic": lowest_bp.systolic, "diastolic": lowest_bp.diastolic, "timestamp": lowest_bp.timestamp.isoformat()}
-
-    bp_series = [{"timestamp": r.timestamp.isoformat(), "systolic": r.systolic, "diastolic": r.diastolic} for r in bp_readings]
-    mood_series = [{"timestamp": m.timestamp.isoformat(), "mood_level": m.mood_level, "note": m.note} for m in mood_logs]
-
-    # Group BP by date
-    bp_by_date = {}
-    for r in bp_readings:
-        d = r.timestamp.date()
-        bp_by_date.setdefault(d, {"systolic": [], "diastolic": []})
-        bp_by_date[d]["systolic"].append(r.systolic)
-        bp_by_date[d]["diastolic"].append(r.diastolic)
+    last_bp_obj = serialize_bp_summary(last_bp)
+    highest_bp_obj = serialize_bp_summary(highest_bp)
+    lowest_bp_obj = serialize_bp_summary(lowest_bp)
+
+    full_bp_readings, full_mood_logs = bp_readings, mood_logs
+
+    # Extremes above come from the full series; min/max bucketing keeps them
+    if max_points:
+        bp_readings = downsample_bp_rows(bp_readings, max_points)
+        mood_logs = downsample_mood_rows(mood_logs, max_points)
+
+    bp_series = [serialize_bp_point(r) for r in bp_readings]
+    mood_series = [serialize_mood_point(m) for m in mood_logs]
+
+    # Per-day aggregates: the first day is only partly inside the window,
+    # so it is summed from the rows loaded above; every later day comes
+    # from the rollup table (at most one row per day)
+    first_day = start_dt.date()
+    first_bp = [r for r in full_bp_readings if r.timestamp.date() == first_day]
+    first_mood = [m for m in full_mood_logs if m.timestamp.date() == first_day]
+    days = [SimpleNamespace(
+        day=first_day,
+        bp_count=len(first_bp),
+        systolic_sum=sum(r.systolic for r in first_bp),
+        diastolic_sum=sum(r.diastolic for r in first_bp),
+        mood_count=len(first_mood),
+        mood_sum=sum(m.mood_level for m in first_mood),
+    )]
+    days += get_daily_rollups(db.session, user_id, first_day + timedelta(days=1))
 
     bp_daily = []
-    for d, vals in sorted(bp_by_date.items()):
-        avg_sys = sum(vals["systolic"]) / len(vals["systolic"])
-        avg_dia = sum(vals["diastolic"]) / len(vals["diastolic"])
-        bp_daily.append({"date": d.isoformat(), "avg_systolic": round(avg_sys, 1), "avg_diastolic": round(avg_dia, 1)})
-
-    # Group mood by date
-    mood_by_date = {}
-    for m in mood_logs:
-        d = m.timestamp.date()
-        if d not in mood_by_date:
-            mood_by_date[d] = []
-        mood_by_date[d].append(m.mood_level)
-        
     mood_daily = []
-    for d, levels in sorted(mood_by_date.items()):
-        avg_mood = sum(levels) / len(levels)
-        category = classify_mood_from_avg(avg_mood)
-        mood_daily.append({"date": d.isoformat(), "avg_mood": round(avg_mood, 2), "mood_category": category})
-
     correlation_points = []
-    for d in sorted(bp_by_date.keys()):
-        if d in mood_by_date:
-            avg_sys = sum(bp_by_date[d]["systolic"]) / len(bp_by_date[d]["systolic"])
-            avg_dia = sum(bp_by_date[d]["diastolic"]) / len(bp_by_date[d]["diastolic"])
-            avg_mood = sum(mood_by_date[d]) / len(mood_by_date[d])
+    for day in days:
+        d = day.day.isoformat()
+        if day.bp_count:
+            avg_sys = day.systolic_sum / day.bp_count
+            avg_dia = day.diastolic_sum / day.bp_count
+            bp_daily.append({"date": d, "avg_systolic": round(avg_sys, 1), "avg_diastolic": round(avg_dia, 1)})
+        if day.mood_count:
+            avg_mood = day.mood_sum / day.mood_count
             category = classify_mood_from_avg(avg_mood)
+            mood_daily.append({"date": d, "avg_mood": round(avg_mood, 2), "mood_category": category})
+        if day.bp_count and day.mood_count:
             correlation_points.append({
-                "date": d.isoformat(),
+                "date": d,
                 "avg_systolic": round(avg_sys, 1),
                 "avg_diastolic": round(avg_dia, 1),
                 "avg_mood": round(avg_mood, 2),
                 "mood_category": category
             })
 
-    return jsonify({
+    return {
         "range": range_param,
         "start_date": start_dt.date().isoformat(),
         "end_date": end_dt.date().isoformat(),
@@ -389,7 +738,7 @@ def dashboard():
             "mood_daily": mood_daily,
             "correlation_points": correlation_points
         }
-    }), 200
+    }
 
 
 # -----------------------
@@ -399,8 +748,117 @@ def dashboard():
 def recommendation_today():
     user_id = get_current_user_id()
     today = date.today()
-    result = get_daily_recommendation(db.session, today, user_id)
-    return jsonify(result), 200
+    return _cached_json(
+        user_id, "recommendation", {"day": today.isoformat()},
+        lambda updated_at: _load_recommendation(user_id, today, updated_at),
+    )
+
+
+def _load_recommendation(user_id: int, today: date, updated_at):
+    # Nightly precomputed row, unless new data arrived since it was built;
+    # otherwise computed from the window store, not from raw readings
+    stored = get_stored_recommendation(db.session, user_id, today)
+    if stored is not None:
+        return stored
+    return get_window_store().recommendation(db.session, user_id, today, updated_at)
+
+
+@api_bp.route("/api/recommendations/batch", methods=["POST"])
+def recommendations_batch():
+    """
+    Today's recommendation for many patients in one call (integrations).
+
+    Body: {"user_ids": [1, 2, ...]}. All readings and mood logs are loaded
+    with one IN-clause range query per table, so the query count does not
+    grow with the number of patients. Results are listed in request order,
+    with status 404 for unknown user ids.
+    """
+    require_admin()
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({"error": "body must be a JSON object"}), 400
+    user_ids = data.get("user_ids")
+    if not isinstance(user_ids, list) or not all(isinstance(u, int) and not isinstance(u, bool) for u in user_ids):
+        return jsonify({"error": "user_ids must be an array of integers"}), 400
+
+    max_users = current_app.config["RECOMMENDATION_BATCH_MAX_USERS"]
+    if len(user_ids) > max_users:
+        return jsonify({"error": f"at most {max_users} user ids per batch"}), 413
+
+    today = date.today()
+    unique_ids = list(dict.fromkeys(user_ids))
+    existing = set(db.session.execute(select(User.id).where(User.id.in_(unique_ids))).scalars())
+    results = compute_recommendations(db.session, [u for u in unique_ids if u in existing], today)
+
+    items = []
+    for user_id in user_ids:
+        if user_id in results:
+            items.append({"user_id": user_id, "status": 200, "data": results[user_id]})
+        else:
+            items.append({"user_id": user_id, "status": 404, "error": "user not found"})
+    return jsonify({"date": today.isoformat(), "results": items}), 200
+
+
+# -----------------------
+# ROLLING WINDOW STATS
+# -----------------------
+@api_bp.route("/api/stats", methods=["GET"])
+def window_stats():
+    """
+    BP averages/extremes, mood average and logging days over the last
+    `days` (7, 30 or 365) days, served from the in-process window store.
+    """
+    user_id = get_current_user_id()
+    try:
+        days = int(request.args.get("days", 7))
+    except ValueError:
+        days = None
+    if days not in WINDOW_DAYS:
+        return jsonify({"error": f"days must be one of {', '.join(str(d) for d in WINDOW_DAYS)}"}), 400
+
+    stats = get_window_store().window_stats(db.session, user_id, date.today(), days, _data_stamp(user_id))
+    return jsonify(stats), 200
+
+
+# -----------------------
+# ADMIN: POPULATION ANALYTICS
+# -----------------------
+@api_bp.route("/api/admin/population", methods=["GET"])
+def population_overview():
+    """
+    Cohort view of this week's classifications for all patients.
+
+    Filters (comma-separated values): bp_status, bp_risk_level, bp_trend,
+    mood_status, stress_impact, logging_status; plus min_bp_days and
+    date (YYYY-MM-DD, default today). limit > 0 adds a patient_list of the
+    matching patients with the highest average systolic.
+    """
+    require_admin()
+    args = request.args
+
+    try:
+        today = date.fromisoformat(args["date"]) if "date" in args else date.today()
+        min_bp_days = int(args.get("min_bp_days", 0))
+        limit = min(int(args.get("limit", 0)), current_app.config["LIST_MAX_LIMIT"])
+    except ValueError:
+        return jsonify({"error": "date must be YYYY-MM-DD; min_bp_days and limit must be integers"}), 400
+
+    filters = {
+        field: {value.strip() for value in args[field].split(",") if value.strip()}
+        for field in FILTER_FIELDS if args.get(field)
+    }
+    for field, values in filters.items():
+        unknown = values - set(CATEGORIES[field])
+        if unknown:
+            return jsonify({"error": f"unknown {field}: {', '.join(sorted(unknown))}"}), 400
+
+    population = get_population_cache().get(db.session, today)
+    summary = summarize_population(population, filters, min_bp_days, limit)
+    summary["filters"] = {
+        **{field: sorted(values) for field, values in filters.items()},
+        "min_bp_days": min_bp_days,
+    }
+    return jsonify(summary), 200
 
 
 # -----------------------
@@ -410,5 +868,8 @@ def recommendation_today():
 def get_badges():
     user_id = get_current_user_id()
     today = date.today()
-    result = evaluate_and_award_badges(db.session, today, user_id)
-    return jsonify(result), 200
+    # Badges are awarded when data is written; this is a pure read
+    return _cached_json(
+        user_id, "badges", {"day": today.isoformat()},
+        lambda updated_at: get_user_badges(db.session, today, user_id),
+    )
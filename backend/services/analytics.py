@@ -0,0 +1,247 @@
+"""
+Vectorized analytics over one user's analysis window.
+
+A ReadingWindow holds the window's BP readings and mood logs as
+contiguous NumPy arrays (timestamps, systolic, diastolic, mood) and
+computes every statistic used by rules_engine from them. Sums are taken
+over integer arrays and divided once, so averages are bit-for-bit the
+same as the original pure-Python `sum() / len()` passes.
+"""
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import select
+
+from ..models import BPReading, MoodLog
+
+
+TIMESTAMP_DTYPE = "datetime64[us]"
+
+
+def _timestamps(values):
+    return np.array(list(values), dtype=TIMESTAMP_DTYPE)
+
+
+def _ints(values):
+    return np.array(list(values), dtype=np.int64)
+
+
+def _group_by_day(timestamps, values):
+    """
+    Per-day (days, sums, counts) for `values`, days ascending.
+    """
+    days, inverse = np.unique(timestamps.astype("datetime64[D]"), return_inverse=True)
+    counts = np.bincount(inverse)
+    sums = np.bincount(inverse, weights=values)
+    return days, sums, counts
+
+
+def least_squares_slope(n, sx, sy, sxx, sxy):
+    """
+    Slope of the least-squares line through n points given their sums
+    (x, y, x*x, x*y). Works on scalars or arrays; NaN where it is
+    undefined (fewer than two distinct x).
+    """
+    num = np.asarray(n * sxy - sx * sy, dtype=np.float64)
+    den = np.asarray(n * sxx - sx * sx, dtype=np.float64)
+    out = np.full(num.shape, np.nan)
+    np.divide(num, den, out=out, where=den > 0)
+    return out
+
+
+def daily_trend_slope(days, avg_sys):
+    """
+    Least-squares slope of daily average systolic over day numbers
+    (ascending), in mmHg per day. None with fewer than two days.
+    """
+    if len(days) < 2:
+        return None
+    x = np.asarray(days, dtype=np.float64)
+    x = x - x[0]
+    y = np.asarray(avg_sys, dtype=np.float64)
+    return float(least_squares_slope(len(x), x.sum(), y.sum(), (x * x).sum(), (x * y).sum()))
+
+
+def _user_slices(sorted_user_ids):
+    """
+    {user_id: slice} over an array of user ids that is already sorted.
+    """
+    ids, starts, counts = np.unique(sorted_user_ids, return_index=True, return_counts=True)
+    return {int(u): slice(int(s), int(s + c)) for u, s, c in zip(ids, starts, counts)}
+
+
+class ReadingWindow:
+    """
+    A user's readings and mood logs for one analysis window.
+    """
+
+    def __init__(self, bp_timestamps, systolic, diastolic, mood_timestamps, mood_levels):
+        self.bp_timestamps = bp_timestamps
+        self.systolic = systolic
+        self.diastolic = diastolic
+        self.mood_timestamps = mood_timestamps
+        self.mood_levels = mood_levels
+
+    # ------------ Construction ------------ #
+
+    @classmethod
+    def from_readings(cls, bp_readings=(), mood_logs=()):
+        """
+        Build from any objects with BPReading/MoodLog attributes
+        (ORM instances or projected rows).
+        """
+        bp_readings = list(bp_readings)
+        mood_logs = list(mood_logs)
+        return cls(
+            _timestamps(r.timestamp for r in bp_readings),
+            _ints(r.systolic for r in bp_readings),
+            _ints(r.diastolic for r in bp_readings),
+            _timestamps(m.timestamp for m in mood_logs),
+            _ints(m.mood_level for m in mood_logs),
+        )
+
+    @classmethod
+    def load(cls, db_session, user_id: int, start_dt):
+        """
+        Load the window with one projected query per table, oldest first
+        (insertion order among equal timestamps).
+        """
+        bp_rows = db_session.execute(
+            select(BPReading.timestamp, BPReading.systolic, BPReading.diastolic)
+            .where(BPReading.user_id == user_id, BPReading.timestamp >= start_dt)
+            .order_by(BPReading.timestamp.asc(), BPReading.id.asc())
+        ).all()
+        mood_rows = db_session.execute(
+            select(MoodLog.timestamp, MoodLog.mood_level)
+            .where(MoodLog.user_id == user_id, MoodLog.timestamp >= start_dt)
+            .order_by(MoodLog.timestamp.asc(), MoodLog.id.asc())
+        ).all()
+
+        bp_cols = list(zip(*bp_rows)) or [(), (), ()]
+        mood_cols = list(zip(*mood_rows)) or [(), ()]
+        return cls(
+            _timestamps(bp_cols[0]),
+            _ints(bp_cols[1]),
+            _ints(bp_cols[2]),
+            _timestamps(mood_cols[0]),
+            _ints(mood_cols[1]),
+        )
+
+    @classmethod
+    def load_many(cls, db_session, user_ids, start_dt):
+        """
+        Windows for many users from one ranged query per table, ordered by
+        (user_id, timestamp) and sliced per user in a single pass.
+        Returns {user_id: ReadingWindow}; users without data get empty windows.
+        """
+        user_ids = list(user_ids)
+        bp_rows = db_session.execute(
+            select(BPReading.user_id, BPReading.timestamp, BPReading.systolic, BPReading.diastolic)
+            .where(BPReading.user_id.in_(user_ids), BPReading.timestamp >= start_dt)
+            .order_by(BPReading.user_id, BPReading.timestamp, BPReading.id)
+        ).all()
+        mood_rows = db_session.execute(
+            select(MoodLog.user_id, MoodLog.timestamp, MoodLog.mood_level)
+            .where(MoodLog.user_id.in_(user_ids), MoodLog.timestamp >= start_dt)
+            .order_by(MoodLog.user_id, MoodLog.timestamp, MoodLog.id)
+        ).all()
+
+        bp_cols = list(zip(*bp_rows)) or [(), (), (), ()]
+        mood_cols = list(zip(*mood_rows)) or [(), (), ()]
+        bp_slices = _user_slices(_ints(bp_cols[0]))
+        mood_slices = _user_slices(_ints(mood_cols[0]))
+        bp_ts, systolic, diastolic = _timestamps(bp_cols[1]), _ints(bp_cols[2]), _ints(bp_cols[3])
+        mood_ts, mood_levels = _timestamps(mood_cols[1]), _ints(mood_cols[2])
+
+        empty = slice(0, 0)
+        windows = {}
+        for user_id in user_ids:
+            b = bp_slices.get(user_id, empty)
+            m = mood_slices.get(user_id, empty)
+            windows[user_id] = cls(bp_ts[b], systolic[b], diastolic[b], mood_ts[m], mood_levels[m])
+        return windows
+
+    # ------------ BP ------------ #
+
+    @property
+    def bp_count(self) -> int:
+        return len(self.systolic)
+
+    def latest_bp(self):
+        """
+        Last reading of the window as {systolic, diastolic, timestamp(datetime)}.
+        Windows from load() are ordered oldest first.
+        """
+        return {
+            "systolic": int(self.systolic[-1]),
+            "diastolic": int(self.diastolic[-1]),
+            "timestamp": self.bp_timestamps[-1].astype(datetime),
+        }
+
+    def bp_stats(self):
+        n = self.bp_count
+        return {
+            "avg_sys": int(self.systolic.sum()) / n,
+            "avg_dia": int(self.diastolic.sum()) / n,
+            "max_sys": int(self.systolic.max()),
+            "max_dia": int(self.diastolic.max()),
+            "min_sys": int(self.systolic.min()),
+            "min_dia": int(self.diastolic.min()),
+        }
+
+    def trend_slope(self):
+        """
+        Least-squares slope of daily average systolic, in mmHg per day
+        (see daily_trend_slope). None with fewer than two days of readings.
+        """
+        days, sys_sums, counts = _group_by_day(self.bp_timestamps, self.systolic)
+        return daily_trend_slope(days.astype(np.int64), sys_sums / counts)
+
+    def bp_logging_days(self) -> int:
+        return len(np.unique(self.bp_timestamps.astype("datetime64[D]")))
+
+    def bp_daily(self):
+        """
+        (days, avg_systolic, avg_diastolic) arrays, days ascending.
+        """
+        days, sys_sums, counts = _group_by_day(self.bp_timestamps, self.systolic)
+        _, dia_sums, _ = _group_by_day(self.bp_timestamps, self.diastolic)
+        return days, sys_sums / counts, dia_sums / counts
+
+    # ------------ Mood ------------ #
+
+    @property
+    def mood_count(self) -> int:
+        return len(self.mood_levels)
+
+    def avg_mood(self):
+        return int(self.mood_levels.sum()) / self.mood_count
+
+    def mood_logging_days(self) -> int:
+        return len(np.unique(self.mood_timestamps.astype("datetime64[D]")))
+
+    def mood_daily(self):
+        """
+        (days, avg_mood) arrays, days ascending.
+        """
+        days, sums, counts = _group_by_day(self.mood_timestamps, self.mood_levels)
+        return days, sums / counts
+
+    # ------------ BP vs mood ------------ #
+
+    def stress_day_split(self):
+        """
+        Daily average systolic on days that also have mood logs, split into
+        (stressed_days, calm_days, common_day_count). Stressed days have an
+        average mood < 2.0, calm days >= 2.5.
+        """
+        bp_days, avg_sys, _ = self.bp_daily()
+        mood_days, avg_mood = self.mood_daily()
+
+        common, bp_idx, mood_idx = np.intersect1d(bp_days, mood_days, return_indices=True)
+        common_sys = avg_sys[bp_idx]
+        common_mood = avg_mood[mood_idx]
+
+        stressed = common_sys[common_mood < 2.0]
+        calm = common_sys[common_mood >= 2.5]
+        return stressed.tolist(), calm.tolist(), len(common)
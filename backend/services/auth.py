@@ -0,0 +1,99 @@
+"""
+Authentication helpers for get_current_user_id.
+
+- UserIdCache: bounded TTL/LRU set of user ids known to exist, so the
+  X-User-Id path skips the users lookup on repeat requests.
+- Signed session tokens: issued by login and verified with SECRET_KEY
+  alone, without touching the database.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from sqlalchemy import event
+
+from ..models import User
+
+
+TOKEN_SALT = "bp-guardian-session"
+
+
+class UserIdCache:
+    """
+    Bounded set of validated user ids with per-entry expiry and LRU eviction.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, user_id):
+        with self._lock:
+            expires_at = self._entries.get(user_id)
+            if expires_at is None:
+                return False
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return False
+            self._entries.move_to_end(user_id)
+            return True
+
+    def add(self, user_id: int):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = time.monotonic() + self.ttl_seconds
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def init_auth(app):
+    app.extensions["user_id_cache"] = UserIdCache(
+        app.config["AUTH_CACHE_MAX_ENTRIES"], app.config["AUTH_CACHE_TTL_SECONDS"]
+    )
+
+
+def get_user_id_cache() -> UserIdCache:
+    return current_app.extensions["user_id_cache"]
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target):
+    if has_app_context() and "user_id_cache" in current_app.extensions:
+        get_user_id_cache().discard(target.id)
+
+
+# -------------------------
+# Signed session tokens
+# -------------------------
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt=TOKEN_SALT)
+
+
+def issue_session_token(user_id: int) -> str:
+    return _serializer().dumps({"uid": user_id})
+
+
+def verify_session_token(token: str):
+    """
+    User id from a valid, unexpired token, or None. No database access.
+    """
+    try:
+        data = _serializer().loads(token, max_age=current_app.config["SESSION_TOKEN_MAX_AGE"])
+    except (BadSignature, SignatureExpired):
+        return None
+    user_id = data.get("uid") if isinstance(data, dict) else None
+    return user_id if isinstance(user_id, int) else None
@@ -0,0 +1,220 @@
+"""
+Historical badge backfill.
+
+Each user's BP readings and mood logs are streamed once in timestamp
+order. For every rule in BADGE_DEFINITIONS a sliding window of distinct
+logging days is moved along the stream; the first event at which a rule
+holds gives its true earned_at. Users are split into chunks that are
+swept in parallel worker processes; the parent writes the awards.
+"""
+import heapq
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..models import BPReading, MoodLog, User, UserBadge
+from .badges import BADGE_DEFINITIONS, get_badge_catalog
+from .changes import BADGE_CHANGE, record_changes
+
+
+STREAM_BATCH_SIZE = 5000
+
+
+# -------------------------
+# Timeline sweep (pure Python, no DB)
+# -------------------------
+
+class _WindowCounter:
+    """
+    Distinct logging days inside a window of `window_days` calendar days
+    ending at the current event's day (None = all history).
+    """
+
+    def __init__(self, window_days):
+        self.window_days = window_days
+        self.days = deque()
+
+    def add(self, day):
+        if not self.days or self.days[-1] != day:
+            self.days.append(day)
+        if self.window_days is not None:
+            first_day = day - timedelta(days=self.window_days - 1)
+            while self.days[0] < first_day:
+                self.days.popleft()
+        return len(self.days)
+
+
+def sweep_user_timeline(events, rules=None):
+    """
+    events: iterable of (timestamp, source) in timestamp order, where
+    source is "bp" or "mood". Returns {code: earned_at} for every rule
+    that holds at some point, earned_at being the timestamp of the event
+    that first satisfied it.
+    """
+    rules = BADGE_DEFINITIONS if rules is None else rules
+    counters = {rule["code"]: _WindowCounter(rule["window_days"]) for rule in rules}
+    by_source = {}
+    for rule in rules:
+        by_source.setdefault(rule["source"], []).append(rule)
+
+    earned = {}
+    remaining = len(rules)
+    for timestamp, source in events:
+        day = timestamp.date()
+        for rule in by_source.get(source, ()):
+            code = rule["code"]
+            if code in earned:
+                continue
+            if counters[code].add(day) >= rule["min_days"]:
+                earned[code] = timestamp
+                remaining -= 1
+        if not remaining:
+            break
+    return earned
+
+
+# -------------------------
+# Streaming from the database
+# -------------------------
+
+def _stream(conn, model, source, user_ids, until):
+    stmt = (
+        select(model.user_id, model.timestamp)
+        .where(model.user_id.in_(user_ids), model.timestamp <= until)
+        .order_by(model.user_id, model.timestamp)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    for user_id, timestamp in conn.execute(stmt):
+        yield user_id, timestamp, source
+
+
+def sweep_users(conn, user_ids, until):
+    """
+    Stream readings and mood logs for these users once, ordered by
+    (user_id, timestamp), and sweep each user's merged timeline.
+    Returns [(user_id, code, earned_at), ...].
+    """
+    merged = heapq.merge(
+        _stream(conn, BPReading, "bp", user_ids, until),
+        _stream(conn, MoodLog, "mood", user_ids, until),
+        key=lambda e: (e[0], e[1]),
+    )
+
+    awards = []
+    for user_id, user_events in itertools.groupby(merged, key=lambda e: e[0]):
+        timeline = ((timestamp, source) for _, timestamp, source in user_events)
+        for code, earned_at in sweep_user_timeline(timeline).items():
+            awards.append((user_id, code, earned_at))
+    return awards
+
+
+def _sweep_chunk(database_uri, user_ids, until):
+    """
+    Worker entry point: own engine, one chunk of users.
+    """
+    engine = create_engine(database_uri)
+    try:
+        with engine.connect() as conn:
+            return sweep_users(conn, user_ids, until)
+    finally:
+        engine.dispose()
+
+
+# -------------------------
+# Driver
+# -------------------------
+
+def _write_awards(db_session, catalog, awards):
+    """
+    Store awards that are new or earlier than the stored earned_at; awards
+    already stored with an equal or earlier earned_at are left alone.
+    Records changes and stamps users.data_updated_at only for the rows
+    actually written. Returns (rows written, user ids with written rows).
+    """
+    if not awards:
+        return 0, set()
+    rows = [
+        {"user_id": user_id, "badge_id": catalog[code]["id"], "earned_at": earned_at}
+        for user_id, code, earned_at in awards
+    ]
+    stored = dict(
+        ((user_id, badge_id), earned_at)
+        for user_id, badge_id, earned_at in db_session.execute(
+            select(UserBadge.user_id, UserBadge.badge_id, UserBadge.earned_at)
+            .where(UserBadge.user_id.in_({row["user_id"] for row in rows}))
+        )
+    )
+    rows = [
+        row for row in rows
+        if (row["user_id"], row["badge_id"]) not in stored
+        or row["earned_at"] < stored[(row["user_id"], row["badge_id"])]
+    ]
+    if not rows:
+        return 0, set()
+
+    # The WHERE keeps a concurrent earlier award from being overwritten
+    stmt = sqlite_insert(UserBadge)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserBadge.user_id, UserBadge.badge_id],
+        set_={"earned_at": stmt.excluded.earned_at},
+        where=stmt.excluded.earned_at < UserBadge.earned_at,
+    )
+    written = db_session.execute(stmt.returning(UserBadge.user_id, UserBadge.id), rows).all()
+    if not written:
+        return 0, set()
+    # Corrected awards are re-announced to sync clients too; they dedupe by code
+    record_changes(db_session, BADGE_CHANGE, [(user_id, award_id) for user_id, award_id in written])
+
+    # Changes the users' ETags and marks stored recommendations stale
+    user_ids = {user_id for user_id, _ in written}
+    db_session.execute(
+        update(User).where(User.id.in_(user_ids)).values(data_updated_at=datetime.utcnow())
+    )
+    return len(written), user_ids
+
+
+def backfill_badges(db_session, database_uri, workers=1, chunk_size=500, user_ids=None, until=None):
+    """
+    Sweep every user's history (or only `user_ids`) and record each badge
+    at the time it was first earned. Commits once per chunk.
+    Returns {"users", "awards", "awarded_user_ids", "seconds", "users_per_second"}.
+    """
+    catalog = get_badge_catalog(db_session)
+    until = until or datetime.utcnow()
+    if user_ids is None:
+        user_ids = db_session.execute(select(User.id).order_by(User.id)).scalars().all()
+    chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+
+    started = time.perf_counter()
+    total_awards = 0
+    awarded_user_ids = set()
+
+    def write(awards):
+        nonlocal total_awards
+        written, written_user_ids = _write_awards(db_session, catalog, awards)
+        total_awards += written
+        awarded_user_ids.update(written_user_ids)
+        db_session.commit()
+
+    if workers <= 1:
+        for chunk in chunks:
+            write(_sweep_chunk(database_uri, chunk, until))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_sweep_chunk, database_uri, chunk, until) for chunk in chunks]
+            for future in futures:
+                write(future.result())
+
+    seconds = time.perf_counter() - started
+    return {
+        "users": len(user_ids),
+        "awards": total_awards,
+        "awarded_user_ids": sorted(awarded_user_ids),
+        "seconds": seconds,
+        "users_per_second": len(user_ids) / seconds if seconds else 0.0,
+    }
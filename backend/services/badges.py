@@ -1,36 +1,81 @@
+import weakref
 from datetime import datetime, timedelta, date
 
+from sqlalchemy import func, insert, literal, select, union_all
+
+from ..instrumentation import timed
 from ..models import BPReading, MoodLog, Badge, UserBadge
+from .changes import BADGE_CHANGE, record_changes
 
 
 # -------------------------
-# Badge definitions
+# Badge rule registry
 # -------------------------
 
+# Write events a rule can depend on
+BP_INSERT = "bp_insert"
+MOOD_INSERT = "mood_insert"
+
+# Which log each event writes to
+EVENT_SOURCES = {BP_INSERT: "bp", MOOD_INSERT: "mood"}
+
+# Each badge is a declarative rule:
+#   events      - write events that can change the outcome
+#   source      - which log is counted ("bp" or "mood")
+#   window_days - calendar days ending today (None = whole history)
+#   min_days    - distinct logging days required within the window
 BADGE_DEFINITIONS = [
     {
         "code": "FIRST_BP_READING",
         "name": "First Step",
-        "description": "Recorded your first blood pressure reading."
+        "description": "Recorded your first blood pressure reading.",
+        "events": (BP_INSERT,),
+        "source": "bp",
+        "window_days": None,
+        "min_days": 1,
     },
     {
         "code": "WEEKLY_BP_CONSISTENT_7",
         "name": "Consistency Star",
-        "description": "Logged blood pressure on 7 different days in the last 7 days."
+        "description": "Logged blood pressure on 7 different days in the last 7 days.",
+        "events": (BP_INSERT,),
+        "source": "bp",
+        "window_days": 7,
+        "min_days": 7,
     },
     {
         "code": "WEEKLY_MOOD_AWARE",
         "name": "Mood Aware",
-        "description": "Logged your mood on at least 5 days in the last 7 days."
+        "description": "Logged your mood on at least 5 days in the last 7 days.",
+        "events": (MOOD_INSERT,),
+        "source": "mood",
+        "window_days": 7,
+        "min_days": 5,
     },
     {
         "code": "MONTHLY_BP_CONSISTENT_20",
         "name": "Long-Run Logger",
-        "description": "Logged blood pressure on at least 20 days in the last 30 days."
+        "description": "Logged blood pressure on at least 20 days in the last 30 days.",
+        "events": (BP_INSERT,),
+        "source": "bp",
+        "window_days": 30,
+        "min_days": 20,
     },
 ]
 
 
+def rules_for_events(events):
+    """
+    Badge rules affected by any of the given write events.
+    """
+    events = set(events)
+    return [rule for rule in BADGE_DEFINITIONS if events.intersection(rule["events"])]
+
+
+# Badge catalog per database engine: {code: {"id", "code", "name", "description"}}
+_catalog_cache = weakref.WeakKeyDictionary()
+
+
 def ensure_badges_exist(db_session):
     """
     Ensure that all badge definitions exist in the Badge table.
@@ -51,52 +96,56 @@ def ensure_badges_exist(db_session):
             db_session.add(badge)
 
     db_session.commit()
+    _catalog_cache.pop(db_session.get_bind(), None)
 
 
-# -------------------------
-# Helper functions
-# -------------------------
-
-def get_earned_badge_codes(db_session, user_id: int):
+def get_badge_catalog(db_session):
     """
-    Return a set of badge codes that have already been earned
-    by this user.
+    Badge definitions with their database ids, loaded once per engine
+    and then served from memory.
     """
-    user_badges = (
-        db_session.query(UserBadge)
-        .join(Badge, UserBadge.badge_id == Badge.id)
-        .filter(UserBadge.user_id == user_id)
-        .all()
-    )
-    return {ub.badge.code for ub in user_badges}
+    engine = db_session.get_bind()
+    catalog = _catalog_cache.get(engine)
+    if catalog is None:
+        ensure_badges_exist(db_session)
+        by_code = {b.code: b for b in db_session.query(Badge).all()}
+        catalog = {
+            bd["code"]: {
+                "id": by_code[bd["code"]].id,
+                "code": bd["code"],
+                "name": by_code[bd["code"]].name,
+                "description": by_code[bd["code"]].description,
+            }
+            for bd in BADGE_DEFINITIONS
+        }
+        _catalog_cache[engine] = catalog
+    return catalog
 
 
-def get_user_badge_status(db_session, user_id: int):
+# -------------------------
+# Helper functions
+# -------------------------
+
+def _get_earned(db_session, user_id: int):
     """
-    Return a list of all badges with whether they are earned and when,
-    for this specific user.
+    {badge_id: earned_at} for this user, in one query.
     """
-    # All badge definitions
-    badges = {b.code: b for b in db_session.query(Badge).all()}
+    rows = db_session.execute(
+        select(UserBadge.badge_id, UserBadge.earned_at).where(UserBadge.user_id == user_id)
+    ).all()
+    return {badge_id: earned_at for badge_id, earned_at in rows}
 
-    # User's earned badges
-    earned_entries = (
-        db_session.query(UserBadge)
-        .join(Badge, UserBadge.badge_id == Badge.id)
-        .filter(UserBadge.user_id == user_id)
-        .all()
-    )
-    earned_map = {ub.badge.code: ub for ub in earned_entries}
 
+def _badge_status(catalog, earned):
     result = []
-    for code, badge in badges.items():
-        ub = earned_map.get(code)
+    for code, badge in catalog.items():
+        earned_at = earned.get(badge["id"])
         result.append({
-            "code": badge.code,
-            "name": badge.name,
-            "description": badge.description,
-            "earned": ub is not None,
-            "earned_at": ub.earned_at.isoformat() if ub else None
+            "code": badge["code"],
+            "name": badge["name"],
+            "description": badge["description"],
+            "earned": earned_at is not None,
+            "earned_at": earned_at.isoformat() if earned_at else None
         })
 
     # Sort: earned first, then by name
@@ -104,131 +153,161 @@ def get_user_badge_status(db_session, user_id: int):
     return result
 
 
+def get_user_badges(db_session, today: date, user_id: int):
+    """
+    Pure read of the user's badges (awards happen at write time):
+      - badges: list of all badges with earned flag and date
+      - newly_awarded: codes earned today
+    """
+    catalog = get_badge_catalog(db_session)
+    earned = _get_earned(db_session, user_id)
+    newly_awarded = [
+        code for code, b in catalog.items()
+        if b["id"] in earned and earned[b["id"]].date() == today
+    ]
+    return {
+        "badges": _badge_status(catalog, earned),
+        "newly_awarded": newly_awarded
+    }
+
+
 # -------------------------
-# Badge condition checks (per user)
+# Activity loading
 # -------------------------
 
-def has_any_bp_reading(db_session, user_id: int) -> bool:
+def _window_start(today: date, days: int) -> date:
     """
-    Check if user has at least one BP reading.
+    First calendar day of a `days`-long window ending today (inclusive).
     """
-    reading = (
-        db_session.query(BPReading)
-        .filter_by(user_id=user_id)
-        .first()
-    )
-    return reading is not None
+    return today - timedelta(days=days - 1)
 
 
-def check_weekly_bp_consistent_7(db_session, today: date, user_id: int) -> bool:
+def _widest_window(rules):
     """
-    True if this user has BP readings on 7 distinct days in the last 7 days.
+    Widest window among rules in days, or None if any rule needs all history.
     """
-    end_dt = datetime.combine(today, datetime.max.time())
-    start_dt = end_dt - timedelta(days=6)  # last 7 calendar days including today
+    windows = [rule["window_days"] for rule in rules]
+    return None if None in windows else max(windows)
 
-    readings = (
-        db_session.query(BPReading)
-        .filter(BPReading.user_id == user_id, BPReading.timestamp >= start_dt)
-        .all()
-    )
-    days = {r.timestamp.date() for r in readings}
-    return len(days) >= 7
 
-
-def check_weekly_mood_aware(db_session, today: date, user_id: int) -> bool:
+def load_logging_days(db_session, today: date, user_id: int, window_days=None, sources=("bp", "mood")):
     """
-    True if this user logged mood on at least 5 days in the last 7 days.
+    Distinct calendar days with BP readings and/or mood logs in the
+    window ending today (window_days=None: all history up to today),
+    fetched with a single SELECT DISTINCT date(...).
+    Returns {"bp": set(date), "mood": set(date)}.
     """
     end_dt = datetime.combine(today, datetime.max.time())
-    start_dt = end_dt - timedelta(days=6)
+    start_dt = None
+    if window_days is not None:
+        start_dt = datetime.combine(_window_start(today, window_days), datetime.min.time())
+
+    def distinct_days(model, kind):
+        stmt = (
+            select(literal(kind).label("kind"), func.date(model.timestamp).label("day"))
+            .where(model.user_id == user_id, model.timestamp <= end_dt)
+            .distinct()
+        )
+        if start_dt is not None:
+            stmt = stmt.where(model.timestamp >= start_dt)
+        return stmt
+
+    selects = []
+    if "bp" in sources:
+        selects.append(distinct_days(BPReading, "bp"))
+    if "mood" in sources:
+        selects.append(distinct_days(MoodLog, "mood"))
+
+    days = {"bp": set(), "mood": set()}
+    if not selects:
+        return days
+    stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+    for kind, day in db_session.execute(stmt):
+        days[kind].add(date.fromisoformat(day))
+    return days
+
+
+def rule_satisfied(rule, days, today: date) -> bool:
+    """
+    True if the logging-day sets satisfy this rule for the window ending today.
+    """
+    source_days = days[rule["source"]]
+    if rule["window_days"] is None:
+        count = sum(1 for d in source_days if d <= today)
+    else:
+        start_day = _window_start(today, rule["window_days"])
+        count = sum(1 for d in source_days if start_day <= d <= today)
+    return count >= rule["min_days"]
 
-    moods = (
-        db_session.query(MoodLog)
-        .filter(MoodLog.user_id == user_id, MoodLog.timestamp >= start_dt)
-        .all()
-    )
-    days = {m.timestamp.date() for m in moods}
-    return len(days) >= 5
 
+# -------------------------
+# Evaluation
+# -------------------------
 
-def check_monthly_bp_consistent_20(db_session, today: date, user_id: int) -> bool:
+def _evaluate_rules(db_session, today: date, user_id: int, rules, catalog, earned):
     """
-    True if this user logged BP on at least 20 days in the last 30 days.
+    Award every pending rule in `rules` that is now satisfied.
+    Uses one DISTINCT-days query over the widest window plus one bulk
+    insert, regardless of the number of rules. Does not commit.
+    Returns the newly awarded codes.
     """
-    end_dt = datetime.combine(today, datetime.max.time())
-    start_dt = end_dt - timedelta(days=29)
-
-    readings = (
-        db_session.query(BPReading)
-        .filter(BPReading.user_id == user_id, BPReading.timestamp >= start_dt)
-        .all()
-    )
-    days = {r.timestamp.date() for r in readings}
-    return len(days) >= 20
+    pending = [rule for rule in rules if catalog[rule["code"]]["id"] not in earned]
+    if not pending:
+        return []
+
+    sources = {rule["source"] for rule in pending}
+    days = load_logging_days(db_session, today, user_id, _widest_window(pending), sources)
+
+    newly_awarded_codes = [rule["code"] for rule in pending if rule_satisfied(rule, days, today)]
+    if newly_awarded_codes:
+        now = datetime.utcnow()
+        rows = [
+            {"user_id": user_id, "badge_id": catalog[code]["id"], "earned_at": now}
+            for code in newly_awarded_codes
+        ]
+        award_ids = db_session.execute(
+            insert(UserBadge).returning(UserBadge.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        record_changes(db_session, BADGE_CHANGE, [(user_id, award_id) for award_id in award_ids])
+        for row in rows:
+            earned[row["badge_id"]] = now
+
+    return newly_awarded_codes
+
+
+@timed("award_badges_for_events")
+def award_badges_for_events(db_session, today: date, user_id: int, events):
+    """
+    Incrementally evaluate only the rules affected by these write events.
+    Call inside the write's transaction; does not commit.
+    Returns the newly awarded codes.
+    """
+    rules = rules_for_events(events)
+    if not rules:
+        return []
 
+    catalog = get_badge_catalog(db_session)
+    earned = _get_earned(db_session, user_id)
+    return _evaluate_rules(db_session, today, user_id, rules, catalog, earned)
 
-# -------------------------
-# Main evaluation function
-# -------------------------
 
+@timed("evaluate_and_award_badges")
 def evaluate_and_award_badges(db_session, today: date, user_id: int):
     """
-    Check which badges this user should have based on their activity,
-    award any new ones, and return:
+    Full re-evaluation of every rule for this user (repair/maintenance;
+    the request path awards badges at write time). Commits new awards and
+    returns:
       - badges: list of all badges with earned flag and date
       - newly_awarded: list of codes just awarded in this call
     """
-    # Make sure badge definitions exist globally
-    ensure_badges_exist(db_session)
-
-    # What does this user already have?
-    earned_codes = get_earned_badge_codes(db_session, user_id)
+    catalog = get_badge_catalog(db_session)
+    earned = _get_earned(db_session, user_id)
 
-    newly_awarded_codes = []
-
-    # 1. FIRST_BP_READING
-    if "FIRST_BP_READING" not in earned_codes and has_any_bp_reading(db_session, user_id):
-        _award_badge_by_code(db_session, user_id, "FIRST_BP_READING")
-        newly_awarded_codes.append("FIRST_BP_READING")
-
-    # 2. WEEKLY_BP_CONSISTENT_7
-    if "WEEKLY_BP_CONSISTENT_7" not in earned_codes and check_weekly_bp_consistent_7(db_session, today, user_id):
-        _award_badge_by_code(db_session, user_id, "WEEKLY_BP_CONSISTENT_7")
-        newly_awarded_codes.append("WEEKLY_BP_CONSISTENT_7")
-
-    # 3. WEEKLY_MOOD_AWARE
-    if "WEEKLY_MOOD_AWARE" not in earned_codes and check_weekly_mood_aware(db_session, today, user_id):
-        _award_badge_by_code(db_session, user_id, "WEEKLY_MOOD_AWARE")
-        newly_awarded_codes.append("WEEKLY_MOOD_AWARE")
-
-    # 4. MONTHLY_BP_CONSISTENT_20
-    if "MONTHLY_BP_CONSISTENT_20" not in earned_codes and check_monthly_bp_consistent_20(db_session, today, user_id):
-        _award_badge_by_code(db_session, user_id, "MONTHLY_BP_CONSISTENT_20")
-        newly_awarded_codes.append("MONTHLY_BP_CONSISTENT_20")
-
-    db_session.commit()
-
-    # Final badge status for this user
-    all_status = get_user_badge_status(db_session, user_id)
+    newly_awarded_codes = _evaluate_rules(db_session, today, user_id, BADGE_DEFINITIONS, catalog, earned)
+    if newly_awarded_codes:
+        db_session.commit()
 
     return {
-        "badges": all_status,
+        "badges": _badge_status(catalog, earned),
         "newly_awarded": newly_awarded_codes
     }
-
-
-def _award_badge_by_code(db_session, user_id: int, code: str):
-    """
-    Helper: create a UserBadge entry for this user and badge code.
-    """
-    badge = db_session.query(Badge).filter_by(code=code).first()
-    if not badge:
-        return  # should not happen if ensure_badges_exist() worked
-
-    ub = UserBadge(
-        user_id=user_id,
-        badge_id=badge.id,
-        earned_at=datetime.utcnow()
-    )
-    db_session.add(ub)
@@ -0,0 +1,171 @@
+"""
+Per-user response cache.
+
+Cached bodies are keyed by (user_id, endpoint, params, data stamp), where
+the stamp is the user's users.data_updated_at. Every write that commits
+new data for a user moves that stamp in the database, so all workers stop
+serving older entries at once and those simply age out of the LRU.
+
+Backends:
+  - MemoryCacheBackend: in-process OrderedDict LRU (one per worker)
+  - DiskCacheBackend:   local SQLite file, shared by all workers on a host
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+
+# -------------------------
+# Backends
+# -------------------------
+
+class MemoryCacheBackend:
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskCacheBackend:
+    name = "disk"
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access)")
+
+    def _conn(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._conn()
+        row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def set(self, key, value):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, last_access) VALUES (?, ?, ?)",
+            (key, value, time.time()),
+        )
+        excess = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM entries ORDER BY last_access LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+# -------------------------
+# Cache front-end
+# -------------------------
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config):
+        kind = config["RESPONSE_CACHE_BACKEND"]
+        max_entries = config["RESPONSE_CACHE_MAX_ENTRIES"]
+        if kind == "memory":
+            return cls(MemoryCacheBackend(max_entries))
+        if kind == "disk":
+            return cls(DiskCacheBackend(config["RESPONSE_CACHE_PATH"], max_entries))
+        if kind == "none":
+            return cls(None)
+        raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {kind}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def make_key(self, user_id: int, endpoint: str, params, stamp) -> str:
+        """
+        `stamp` is the user's users.data_updated_at (None before any write).
+        """
+        stamp = stamp.isoformat() if stamp else "-"
+        return f"{user_id}:{endpoint}:{stamp}:{json.dumps(params, sort_keys=True)}"
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if self.enabled:
+            self.backend.set(key, value)
+
+    def stats(self):
+        return {
+            "backend": self.backend.name if self.enabled else "none",
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.backend) if self.enabled else 0,
+            "evictions": self.backend.evictions if self.enabled else 0,
+        }
+
+
+def init_response_cache(app):
+    app.extensions["response_cache"] = ResponseCache.from_config(app.config)
+
+
+def get_response_cache() -> ResponseCache:
+    return current_app.extensions["response_cache"]
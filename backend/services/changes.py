@@ -0,0 +1,23 @@
+"""
+Per-user change sequence for delta sync (see services/sync.py).
+
+Every insert of a BP reading, mood log or badge award appends a
+change_log row in the same transaction.
+"""
+from sqlalchemy import insert
+
+from ..models import ChangeLog
+
+
+BP_CHANGE = "bp"
+MOOD_CHANGE = "mood"
+BADGE_CHANGE = "badge"
+
+
+def record_changes(db_session, kind: str, user_row_ids):
+    """
+    Append changes for (user_id, row_id) pairs, in order. Does not commit.
+    """
+    rows = [{"user_id": user_id, "kind": kind, "row_id": row_id} for user_id, row_id in user_row_ids]
+    if rows:
+        db_session.execute(insert(ChangeLog), rows)
@@ -0,0 +1,80 @@
+"""
+Shape-preserving downsampling for chart series.
+
+Min/max bucketing: the series (already in time order) is cut into equal
+index buckets and each bucket keeps its lowest and highest point, in
+their original order. The first and last points are always kept, so a
+downsampled series still shows every peak and trough of the raw data,
+including the dashboard's highest/lowest/last reading.
+"""
+import numpy as np
+
+
+# Smallest useful output: first, last and one min/max bucket
+MIN_POINTS = 4
+
+
+def minmax_indices(keys, max_points: int):
+    """
+    Indices (ascending) of at most `max_points` points to keep from a
+    series whose per-point ordering key is `keys`. Ties keep the earliest
+    point, like Python's max()/min().
+    """
+    keys = np.asarray(keys)
+    n = len(keys)
+    max_points = max(max_points, MIN_POINTS)
+    if n <= max_points:
+        return np.arange(n)
+
+    # Interior points [1, n-1) split into buckets of two survivors each
+    n_buckets = (max_points - 2) // 2
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+
+    keep = [0, n - 1]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop <= start:
+            continue
+        bucket = keys[start:stop]
+        keep.append(start + int(np.argmin(bucket)))
+        keep.append(start + int(np.argmax(bucket)))
+    return np.unique(keep)
+
+
+def lexicographic_ranks(*columns):
+    """
+    Dense rank of each row's tuple of `columns` values (first column most
+    significant), so tuples can be compared as single integers. Equal
+    tuples share a rank.
+    """
+    columns = [np.asarray(c) for c in columns]
+    # np.lexsort sorts by its last key first
+    order = np.lexsort(columns[::-1])
+    changed = np.zeros(len(order), dtype=bool)
+    changed[1:] = np.logical_or.reduce([np.diff(c[order]) != 0 for c in columns])
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.cumsum(changed)
+    return ranks
+
+
+def downsample_bp_rows(rows, max_points: int):
+    """
+    BP rows ordered by timestamp, reduced to at most `max_points`.
+    Rows are ranked by (systolic, diastolic), the same key the dashboard
+    uses for highest_bp/lowest_bp.
+    """
+    if len(rows) <= max(max_points, MIN_POINTS):
+        return rows
+    systolic = np.fromiter((r.systolic for r in rows), dtype=np.int64, count=len(rows))
+    diastolic = np.fromiter((r.diastolic for r in rows), dtype=np.int64, count=len(rows))
+    keys = lexicographic_ranks(systolic, diastolic)
+    return [rows[i] for i in minmax_indices(keys, max_points)]
+
+
+def downsample_mood_rows(rows, max_points: int):
+    """
+    Mood rows ordered by timestamp, reduced to at most `max_points`.
+    """
+    if len(rows) <= max(max_points, MIN_POINTS):
+        return rows
+    keys = np.fromiter((r.mood_level for r in rows), dtype=np.int64, count=len(rows))
+    return [rows[i] for i in minmax_indices(keys, max_points)]
@@ -0,0 +1,154 @@
+"""
+Streaming full-history export.
+
+BP readings and mood logs are read in keyset pages on (timestamp, id),
+as in services/series.py, and merged by timestamp, then encoded a chunk
+at a time as CSV or NDJSON (optionally gzip-compressed on the fly). Each
+page is one short query on its own connection, so no cursor or read
+transaction stays open while the client downloads. Only one page per
+table is held in memory at once, however long the history is.
+"""
+import csv
+import heapq
+import io
+import json
+import zlib
+
+from sqlalchemy import literal, null, select, tuple_
+
+from ..models import BPReading, MoodLog
+
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+CSV_COLUMNS = ("type", "id", "timestamp", "systolic", "diastolic", "mood_level", "note")
+
+
+# -------------------------
+# Row source
+# -------------------------
+
+def _pages(engine, model, stmt):
+    """
+    Rows of `stmt` (ordered by timestamp, id) fetched EXPORT_BATCH_SIZE at
+    a time, each page resuming after the last row of the previous one.
+    """
+    position = tuple_(model.timestamp, model.id)
+    after = None
+    while True:
+        page = stmt if after is None else stmt.where(position > tuple_(*after))
+        with engine.connect() as conn:
+            rows = conn.execute(page.limit(EXPORT_BATCH_SIZE)).all()
+        yield from rows
+        if len(rows) < EXPORT_BATCH_SIZE:
+            return
+        after = (rows[-1].timestamp, rows[-1].id)
+
+
+def iter_history(engine, user_id: int):
+    """
+    Every BP reading and mood log of this user as rows with CSV_COLUMNS
+    attributes, oldest first (BP before mood at equal timestamps).
+    """
+    bp = (
+        select(
+            literal("bp").label("type"), BPReading.id, BPReading.timestamp,
+            BPReading.systolic, BPReading.diastolic,
+            null().label("mood_level"), null().label("note"),
+        )
+        .where(BPReading.user_id == user_id)
+        .order_by(BPReading.timestamp, BPReading.id)
+    )
+    mood = (
+        select(
+            literal("mood").label("type"), MoodLog.id, MoodLog.timestamp,
+            null().label("systolic"), null().label("diastolic"),
+            MoodLog.mood_level, MoodLog.note,
+        )
+        .where(MoodLog.user_id == user_id)
+        .order_by(MoodLog.timestamp, MoodLog.id)
+    )
+    return heapq.merge(_pages(engine, BPReading, bp), _pages(engine, MoodLog, mood), key=lambda r: r.timestamp)
+
+
+# -------------------------
+# Encoders
+# -------------------------
+
+def _batched(rows, size=EXPORT_BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_csv(rows):
+    """
+    CSV text chunks: a header line, then one chunk per batch of rows.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue()
+
+    for batch in _batched(rows):
+        buffer.seek(0)
+        buffer.truncate()
+        for row in batch:
+            writer.writerow((
+                row.type, row.id, row.timestamp.isoformat(),
+                row.systolic, row.diastolic, row.mood_level, row.note,
+            ))
+        yield buffer.getvalue()
+
+
+def iter_ndjson(rows):
+    """
+    NDJSON text chunks, one JSON object per line.
+    """
+    for batch in _batched(rows):
+        yield "".join(
+            json.dumps({
+                "type": row.type,
+                "id": row.id,
+                "timestamp": row.timestamp.isoformat(),
+                **({"systolic": row.systolic, "diastolic": row.diastolic} if row.type == "bp"
+                   else {"mood_level": row.mood_level, "note": row.note}),
+            }) + "\n"
+            for row in batch
+        )
+
+
+ENCODERS = {"csv": iter_csv, "ndjson": iter_ndjson}
+
+
+def gzip_chunks(chunks):
+    """
+    Compress a stream of byte chunks into a single gzip stream.
+    """
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_history(engine, user_id: int, fmt: str, compress: bool = False):
+    """
+    Generator of response chunks for a full export. Checks out a
+    connection per page rather than holding one for the whole download.
+    """
+    chunks = (chunk.encode() for chunk in ENCODERS[fmt](iter_history(engine, user_id)))
+    if compress:
+        chunks = gzip_chunks(chunks)
+    yield from chunks
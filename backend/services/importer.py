@@ -0,0 +1,139 @@
+"""
+Streaming bulk import of BP readings from device CSV exports.
+
+The CSV is read one line at a time, each row is checked with
+validate_bp_payload (the same rules as POST /api/bp), and valid rows are
+inserted in chunks through insert_bp_readings, so rollups and
+users.data_updated_at stay in step. Rows whose (user_id, timestamp)
+already exists, in the database or earlier in the file, are skipped.
+Only one chunk is held in memory, whatever the file size.
+
+Each chunk is committed on its own so the database write lock is held
+for one chunk at a time, not for the whole file. An import that fails
+part-way keeps the chunks before the failure; re-running the same file
+is safe because those rows are skipped as duplicates.
+"""
+import csv
+import time
+
+from sqlalchemy import select
+
+from ..models import BPReading
+from .ingest import insert_bp_readings, validate_bp_payload
+
+
+IMPORT_CHUNK_SIZE = 1000
+
+# Rejected rows listed in the report (all of them are counted)
+MAX_REPORTED_ERRORS = 100
+
+# Header spellings seen in device exports -> payload field
+COLUMN_ALIASES = {
+    "systolic": "systolic",
+    "sys": "systolic",
+    "diastolic": "diastolic",
+    "dia": "diastolic",
+    "timestamp": "timestamp",
+    "datetime": "timestamp",
+    "date": "timestamp",
+}
+
+
+def iter_csv_payloads(lines):
+    """
+    (line_number, payload) for every data row of a CSV text stream, with
+    header names mapped through COLUMN_ALIASES. Raises ValueError if the
+    header lacks a timestamp, systolic or diastolic column, or if a line
+    cannot be parsed as CSV (e.g. a field over the csv module's size limit).
+    """
+    reader = csv.reader(lines)
+    try:
+        header = next(reader, None) or []
+    except csv.Error as e:
+        raise ValueError(f"line {reader.line_num}: {e}") from e
+    fields = [COLUMN_ALIASES.get(name.strip().lower()) for name in header]
+    if any(field not in fields for field in ("timestamp", "systolic", "diastolic")):
+        raise ValueError("CSV header must include timestamp, systolic and diastolic columns")
+
+    while True:
+        try:
+            row = next(reader, None)
+        except csv.Error as e:
+            raise ValueError(f"line {reader.line_num}: {e}") from e
+        if row is None:
+            return
+        if not any(cell.strip() for cell in row):
+            continue
+        payload = {field: value.strip() for field, value in zip(fields, row) if field}
+        yield reader.line_num, payload
+
+
+def _existing_timestamps(db_session, user_id: int, timestamps):
+    rows = db_session.execute(
+        select(BPReading.timestamp).where(
+            BPReading.user_id == user_id,
+            BPReading.timestamp.in_(timestamps),
+        )
+    ).scalars()
+    return set(rows)
+
+
+def _insert_chunk(db_session, user_id: int, chunk, stats):
+    """
+    Insert the chunk's rows whose timestamps are not in the database yet
+    and commit.
+    """
+    existing = _existing_timestamps(db_session, user_id, {values["timestamp"] for values in chunk})
+    fresh = [values for values in chunk if values["timestamp"] not in existing]
+    stats["duplicates"] += len(chunk) - len(fresh)
+    insert_bp_readings(db_session, user_id, fresh)
+    db_session.commit()
+    stats["inserted"] += len(fresh)
+
+
+def import_bp_csv(db_session, user_id: int, lines, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Import BP readings for one user from CSV text lines. Commits once per
+    chunk. Rows with an empty timestamp are rejected rather than stamped
+    with the import time.
+    Returns {"rows", "inserted", "duplicates", "rejected", "errors",
+    "seconds", "rows_per_second"} where errors lists up to
+    MAX_REPORTED_ERRORS {"line", "error"} entries.
+    """
+    stats = {"rows": 0, "inserted": 0, "duplicates": 0, "rejected": 0, "errors": []}
+    started = time.perf_counter()
+
+    chunk = []
+    chunk_timestamps = set()
+    for line, payload in iter_csv_payloads(lines):
+        stats["rows"] += 1
+        if not payload.get("timestamp"):
+            values, error = None, "timestamp is required"
+        else:
+            values, error = validate_bp_payload(payload)
+        if error:
+            stats["rejected"] += 1
+            if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+                stats["errors"].append({"line": line, "error": error})
+            continue
+
+        # Repeated timestamps inside one chunk; earlier chunks are
+        # already in the database and caught by _insert_chunk
+        if values["timestamp"] in chunk_timestamps:
+            stats["duplicates"] += 1
+            continue
+        chunk.append(values)
+        chunk_timestamps.add(values["timestamp"])
+
+        if len(chunk) >= chunk_size:
+            _insert_chunk(db_session, user_id, chunk, stats)
+            chunk = []
+            chunk_timestamps = set()
+
+    if chunk:
+        _insert_chunk(db_session, user_id, chunk, stats)
+
+    seconds = time.perf_counter() - started
+    stats["seconds"] = seconds
+    stats["rows_per_second"] = stats["rows"] / seconds if seconds else 0.0
+    return stats
@@ -0,0 +1,270 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models import BPReading, MoodLog, User
+from .changes import BP_CHANGE, MOOD_CHANGE, record_changes
+from .rollups import apply_bp_rows, apply_mood_rows
+
+
+# db_session.info key for the stamp changes of the open transaction
+STAMP_CHANGES_KEY = "data_stamp_changes"
+
+
+# -------------------------
+# Payload validation
+# -------------------------
+
+def to_utc_naive(value: datetime) -> datetime:
+    """
+    Timestamps are stored as naive UTC; convert one that carries an
+    offset, leave a naive one as is.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def parse_timestamp(value):
+    """
+    Parse an optional ISO 8601 timestamp, normalized to naive UTC.
+    Returns (datetime_or_None, error_or_None).
+    """
+    if not value:
+        return None, None
+    try:
+        return to_utc_naive(datetime.fromisoformat(value)), None
+    except (TypeError, ValueError):
+        return None, "timestamp must be ISO 8601"
+
+
+def parse_client_id(value):
+    """
+    Parse an optional client-generated UUID (idempotency key).
+    Returns (canonical_string_or_None, error_or_None).
+    """
+    if value is None or value == "":
+        return None, None
+    try:
+        return str(uuid.UUID(str(value))), None
+    except ValueError:
+        return None, "client_id must be a UUID"
+
+
+def validate_bp_payload(data):
+    """
+    Validate a single BP reading payload.
+    Returns (values, error) where exactly one of them is None.
+    """
+    if not isinstance(data, dict):
+        return None, "each reading must be an object"
+
+    try:
+        systolic = int(data.get("systolic"))
+        diastolic = int(data.get("diastolic"))
+    except (TypeError, ValueError):
+        return None, "systolic and diastolic must be integers"
+
+    if systolic <= 0 or diastolic <= 0:
+        return None, "systolic and diastolic must be positive values"
+
+    timestamp, error = parse_timestamp(data.get("timestamp"))
+    if error:
+        return None, error
+
+    client_id, error = parse_client_id(data.get("client_id"))
+    if error:
+        return None, error
+
+    return {
+        "systolic": systolic,
+        "diastolic": diastolic,
+        "timestamp": timestamp or datetime.utcnow(),
+        "client_id": client_id,
+    }, None
+
+
+def validate_mood_payload(data):
+    """
+    Validate a single mood log payload.
+    Returns (values, error) where exactly one of them is None.
+    """
+    if not isinstance(data, dict):
+        return None, "each mood log must be an object"
+
+    try:
+        mood_level = int(data.get("mood_level"))
+    except (TypeError, ValueError):
+        return None, "mood_level must be an integer (1,2,3)"
+
+    if mood_level not in (1, 2, 3):
+        return None, "mood_level must be 1, 2, or 3"
+
+    timestamp, error = parse_timestamp(data.get("timestamp"))
+    if error:
+        return None, error
+
+    client_id, error = parse_client_id(data.get("client_id"))
+    if error:
+        return None, error
+
+    return {
+        "mood_level": mood_level,
+        "note": data.get("note"),
+        "timestamp": timestamp or datetime.utcnow(),
+        "client_id": client_id,
+    }, None
+
+
+# -------------------------
+# Inserts (caller commits)
+# -------------------------
+
+def _stored_by_client_id(db_session, model, user_id: int, client_ids):
+    """
+    {client_id: stored row dict} for rows this user already wrote.
+    """
+    if not client_ids:
+        return {}
+    rows = db_session.execute(
+        select(model.__table__).where(model.user_id == user_id, model.client_id.in_(client_ids))
+    ).mappings()
+    return {row["client_id"]: dict(row) for row in rows}
+
+
+def _insert_rows(db_session, model, user_id: int, values_list):
+    """
+    Bulk INSERT of validated values for one user, skipping replays: a
+    value whose client_id is already stored (or appears earlier in the
+    list) is not inserted again and comes back as the original row with
+    "replayed": True.
+    Returns (rows, new_rows): rows in values_list order, new_rows the
+    ones actually inserted.
+    """
+    rows = [{"user_id": user_id, **values} for values in values_list]
+    stored = _stored_by_client_id(
+        db_session, model, user_id, {row["client_id"] for row in rows if row.get("client_id")}
+    )
+
+    new_rows = []
+    first_by_client_id = {}
+    for row in rows:
+        client_id = row.get("client_id")
+        if client_id is None:
+            new_rows.append(row)
+        elif client_id not in stored and client_id not in first_by_client_id:
+            first_by_client_id[client_id] = row
+            new_rows.append(row)
+
+    if new_rows:
+        result = db_session.execute(
+            insert(model).returning(model.id, sort_by_parameter_order=True),
+            new_rows,
+        )
+        for row, new_id in zip(new_rows, result.scalars()):
+            row["id"] = new_id
+
+    inserted = {id(row) for row in new_rows}
+    out = []
+    for row in rows:
+        if id(row) in inserted:
+            out.append(row)
+        else:
+            original = stored.get(row["client_id"]) or first_by_client_id[row["client_id"]]
+            out.append({**original, "replayed": True})
+    return out, new_rows
+
+
+def insert_bp_readings(db_session, user_id: int, values_list):
+    """
+    Insert validated BP readings for one user with a single bulk INSERT
+    and fold them into the daily rollups. Values carrying an already
+    stored client_id are not inserted again (see _insert_rows).
+    Returns the rows as dicts (including their ids), in the same order as
+    values_list. Does not commit.
+    """
+    if not values_list:
+        return []
+
+    rows, new_rows = _insert_rows(db_session, BPReading, user_id, values_list)
+    if new_rows:
+        apply_bp_rows(db_session, user_id, new_rows)
+        record_changes(db_session, BP_CHANGE, [(user_id, row["id"]) for row in new_rows])
+        _touch_user(db_session, user_id)
+    return rows
+
+
+def insert_mood_logs(db_session, user_id: int, values_list):
+    """
+    Insert validated mood logs for one user with a single bulk INSERT
+    and fold them into the daily rollups. Values carrying an already
+    stored client_id are not inserted again (see _insert_rows).
+    Returns the rows as dicts (including their ids), in the same order as
+    values_list. Does not commit.
+    """
+    if not values_list:
+        return []
+
+    rows, new_rows = _insert_rows(db_session, MoodLog, user_id, values_list)
+    if new_rows:
+        apply_mood_rows(db_session, user_id, new_rows)
+        record_changes(db_session, MOOD_CHANGE, [(user_id, row["id"]) for row in new_rows])
+        _touch_user(db_session, user_id)
+    return rows
+
+
+def _touch_user(db_session, user_id: int):
+    """
+    Record that this user's data changed (used to detect stale
+    precomputed results and cached responses). The stamp it replaced and
+    the new one are kept in db_session.info until the transaction ends
+    (see pending_stamp_change).
+    """
+    # Runs after the insert, so the write lock is held and no other
+    # writer can move the stamp between these two statements
+    previous = db_session.execute(select(User.data_updated_at).where(User.id == user_id)).scalar()
+    stamp = datetime.utcnow()
+    db_session.execute(update(User).where(User.id == user_id).values(data_updated_at=stamp))
+    changes = db_session.info.setdefault(STAMP_CHANGES_KEY, {})
+    changes[user_id] = (changes.get(user_id, (previous,))[0], stamp)
+
+
+def pending_stamp_change(db_session, user_id: int):
+    """
+    (stamp before, stamp after) of this user's data_updated_at in the
+    current transaction, or None if it was not touched. Read it before
+    committing; it is dropped when the transaction ends.
+    """
+    return db_session.info.get(STAMP_CHANGES_KEY, {}).get(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _forget_stamp_changes(session):
+    session.info.pop(STAMP_CHANGES_KEY, None)
+
+
+# -------------------------
+# Serialization
+# -------------------------
+
+def serialize_bp_row(row):
+    return {
+        "id": row["id"],
+        "user_id": row["user_id"],
+        "systolic": row["systolic"],
+        "diastolic": row["diastolic"],
+        "timestamp": row["timestamp"].isoformat()
+    }
+
+
+def serialize_mood_row(row):
+    return {
+        "id": row["id"],
+        "user_id": row["user_id"],
+        "mood_level": row["mood_level"],
+        "note": row["note"],
+        "timestamp": row["timestamp"].isoformat()
+    }
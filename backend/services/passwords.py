@@ -0,0 +1,76 @@
+"""
+Password hashing off the request thread.
+
+KDF work runs on a small dedicated thread pool (hashlib releases the GIL
+while hashing), so at most PASSWORD_HASH_WORKERS hashes use CPU at once
+and other endpoints keep their share during login storms. At most
+PASSWORD_HASH_MAX_PENDING hash jobs may be queued or running; beyond
+that callers get HasherBusy immediately instead of piling up.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Too many password hash jobs are already pending."""
+
+
+class PasswordHasher:
+    def __init__(self, method: str, workers: int, max_pending: int):
+        self.method = method
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash") if workers > 0 else None
+        self._slots = threading.BoundedSemaphore(max_pending) if workers > 0 else None
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            # PASSWORD_HASH_WORKERS=0: hash inline on the request thread
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """
+        True if the stored hash was made with a different method or cost.
+        """
+        stored_method = password_hash.split("$", 1)[0]
+        return stored_method != self.method
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+def _normalize_method(method: str) -> str:
+    """
+    Werkzeug writes defaults into the hash prefix ("scrypt" is stored as
+    "scrypt:32768:8:1"); resolve them so needs_rehash compares like with like.
+    """
+    return generate_password_hash("", method).split("$", 1)[0]
+
+
+def init_password_hasher(app):
+    app.extensions["password_hasher"] = PasswordHasher(
+        _normalize_method(app.config["PASSWORD_HASH_METHOD"]),
+        app.config["PASSWORD_HASH_WORKERS"],
+        app.config["PASSWORD_HASH_MAX_PENDING"],
+    )
+
+
+def get_password_hasher() -> PasswordHasher:
+    return current_app.extensions["password_hasher"]
@@ -0,0 +1,303 @@
+"""
+Cohort analytics for clinic staff.
+
+load_population() runs one grouped query over daily_rollups for the
+recommendation analysis window (see rules_engine.get_analysis_window),
+one row per user (users without data included), and classifies every
+user at once with NumPy using the same thresholds as rules_engine:
+bp_status / bp_risk_level, mood_status, stress_impact (daily averages on
+days with both BP and mood) and logging_status.
+
+bp_trend is the same as the per-user engine's: the least-squares slope
+of daily average systolic (analytics.least_squares_slope over sums taken
+in SQL), labelled by rules_engine.classify_bp_trend.
+
+The classified snapshot is kept per day for POPULATION_CACHE_SECONDS so
+that filtered views of the same cohort only re-mask the arrays. Only one
+request at a time rebuilds it: others wait for that rebuild, or keep
+serving the expired snapshot for the same day while it runs.
+"""
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import and_, case, cast, Float, func, select
+
+from ..models import DailyRollup, User
+from .analytics import least_squares_slope
+from .rules_engine import ANALYSIS_DAYS, classify_bp_trend
+
+
+FILTER_FIELDS = ("bp_status", "bp_risk_level", "bp_trend", "mood_status", "stress_impact", "logging_status")
+
+CATEGORIES = {
+    "bp_status": ("normal", "elevated", "stage1", "stage2", "no_data"),
+    "bp_risk_level": ("low", "borderline", "moderate", "high", "unknown"),
+    "bp_trend": ("improving", "stable", "worsening", "unknown"),
+    "mood_status": ("calm", "medium", "high_stress", "no_data"),
+    "stress_impact": ("likely", "possible", "unclear", "unknown"),
+    "logging_status": ("consistent", "semi_consistent", "irregular", "no_data"),
+}
+
+
+# -------------------------
+# Query
+# -------------------------
+
+def _population_query(start_day):
+    r = DailyRollup
+    has_bp = r.bp_count > 0
+    both = and_(has_bp, r.mood_count > 0)
+    stressed = and_(both, r.mood_sum < 2 * r.mood_count)      # avg mood < 2.0
+    calm = and_(both, 2 * r.mood_sum >= 5 * r.mood_count)     # avg mood >= 2.5
+    day_sys = cast(r.systolic_sum, Float) / r.bp_count
+    x = func.julianday(r.day) - func.julianday(start_day)
+
+    def count_if(cond):
+        return func.sum(case((cond, 1), else_=0))
+
+    agg = (
+        select(
+            r.user_id,
+            func.sum(r.bp_count).label("bp_count"),
+            func.sum(r.systolic_sum).label("sys_sum"),
+            func.sum(r.diastolic_sum).label("dia_sum"),
+            count_if(has_bp).label("bp_days"),
+            func.sum(r.mood_count).label("mood_count"),
+            func.sum(r.mood_sum).label("mood_sum"),
+            count_if(both).label("common_days"),
+            func.sum(case((stressed, day_sys))).label("stressed_sum"),
+            count_if(stressed).label("stressed_days"),
+            func.sum(case((calm, day_sys))).label("calm_sum"),
+            count_if(calm).label("calm_days"),
+            func.sum(case((has_bp, x))).label("sx"),
+            func.sum(case((has_bp, x * x))).label("sxx"),
+            func.sum(case((has_bp, day_sys))).label("sy"),
+            func.sum(case((has_bp, x * day_sys))).label("sxy"),
+        )
+        .where(r.day >= start_day)
+        .group_by(r.user_id)
+        .subquery()
+    )
+    columns = [c for c in agg.c if c.name != "user_id"]
+    return (
+        select(User.id, *columns)
+        .outerjoin(agg, agg.c.user_id == User.id)
+        .order_by(User.id)
+    ), [c.name for c in columns]
+
+
+# -------------------------
+# Bulk classification (mirrors rules_engine)
+# -------------------------
+
+def _divide(num, den):
+    out = np.full(len(num), np.nan)
+    np.divide(num, den, out=out, where=den > 0)
+    return out
+
+
+def _classify(arrays):
+    bp_count = arrays["bp_count"]
+    has_bp = bp_count > 0
+    has_mood = arrays["mood_count"] > 0
+
+    avg_sys = _divide(arrays["sys_sum"], bp_count)
+    avg_dia = _divide(arrays["dia_sum"], bp_count)
+    with np.errstate(invalid="ignore"):
+        bp_status = np.select(
+            [~has_bp,
+             (avg_sys < 120) & (avg_dia < 80),
+             (avg_sys >= 120) & (avg_sys <= 129) & (avg_dia < 80),
+             ((avg_sys >= 130) & (avg_sys <= 139)) | ((avg_dia >= 80) & (avg_dia <= 89))],
+            ["no_data", "normal", "elevated", "stage1"],
+            "stage2",
+        )
+    bp_risk_level = np.select(
+        [bp_status == status for status in CATEGORIES["bp_status"]],
+        CATEGORIES["bp_risk_level"],
+        "unknown",
+    )
+
+    # Least-squares slope of daily average systolic (mmHg/day)
+    n = arrays["bp_days"]
+    slope = least_squares_slope(n, arrays["sx"], arrays["sy"], arrays["sxx"], arrays["sxy"])
+    bp_trend = classify_bp_trend(slope)
+
+    avg_mood = _divide(arrays["mood_sum"], arrays["mood_count"])
+    with np.errstate(invalid="ignore"):
+        mood_status = np.select(
+            [~has_bp | ~has_mood, avg_mood < 1.5, avg_mood < 2.5],
+            ["no_data", "high_stress", "medium"],
+            "calm",
+        )
+
+    stress_diff = (_divide(arrays["stressed_sum"], arrays["stressed_days"])
+                   - _divide(arrays["calm_sum"], arrays["calm_days"]))
+    with np.errstate(invalid="ignore"):
+        stress_impact = np.select(
+            [~has_bp,
+             ~has_mood | (arrays["common_days"] < 3) | np.isnan(stress_diff),
+             stress_diff >= 5,
+             stress_diff >= 2],
+            ["unknown", "unclear", "likely", "possible"],
+            "unclear",
+        )
+
+    num_days = ANALYSIS_DAYS
+    logging_status = np.select(
+        [~has_bp, n >= min(5, num_days), n >= min(3, num_days)],
+        ["no_data", "consistent", "semi_consistent"],
+        "irregular",
+    )
+
+    return {
+        "avg_sys": avg_sys,
+        "avg_dia": avg_dia,
+        "slope": slope,
+        "bp_status": bp_status,
+        "bp_risk_level": bp_risk_level,
+        "bp_trend": bp_trend,
+        "mood_status": mood_status,
+        "stress_impact": stress_impact,
+        "logging_status": logging_status,
+    }
+
+
+def load_population(db_session, today):
+    """
+    Per-user aggregates and classifications for every user, as arrays
+    aligned with "user_id" (one grouped query).
+    """
+    start_day = today - timedelta(days=ANALYSIS_DAYS - 1)
+    stmt, names = _population_query(start_day)
+    rows = db_session.execute(stmt).all()
+
+    # One float matrix; NULL aggregates (no rows for the user) become 0
+    table = np.array([tuple(row) for row in rows], dtype=np.float64).reshape(len(rows), len(names) + 1)
+    table = np.nan_to_num(table, copy=False)
+    arrays = {name: table[:, i + 1] for i, name in enumerate(names)}
+    return {
+        "day": today,
+        "start_day": start_day,
+        "user_id": table[:, 0].astype(np.int64),
+        "bp_count": arrays["bp_count"].astype(np.int64),
+        "bp_days": arrays["bp_days"].astype(np.int64),
+        **_classify(arrays),
+    }
+
+
+# -------------------------
+# Snapshot cache + summaries
+# -------------------------
+
+class PopulationCache:
+    """
+    The latest classified population per day, reused for `ttl_seconds`.
+    Rebuilds are single-flight (see module docstring).
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.rebuilds = 0
+        self._snapshots = {}  # day -> (expires_at, population)
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+
+    def _lookup(self, today):
+        """
+        (population, fresh) for today's snapshot, or (None, False).
+        """
+        with self._lock:
+            entry = self._snapshots.get(today)
+        if entry is None:
+            return None, False
+        return entry[1], entry[0] > time.monotonic()
+
+    def get(self, db_session, today):
+        population, fresh = self._lookup(today)
+        if fresh:
+            return population
+        if population is not None and not self._rebuild_lock.acquire(blocking=False):
+            # Someone is already refreshing today's snapshot
+            return population
+        if population is None:
+            self._rebuild_lock.acquire()
+
+        try:
+            # A rebuild may have finished while we waited for the lock
+            population, fresh = self._lookup(today)
+            if fresh:
+                return population
+            started = time.monotonic()
+            population = load_population(db_session, today)
+            self.rebuilds += 1
+            if self.ttl_seconds > 0:
+                with self._lock:
+                    self._snapshots = {today: (started + self.ttl_seconds, population)}
+            return population
+        finally:
+            self._rebuild_lock.release()
+
+
+def init_population_cache(app):
+    app.extensions["population_cache"] = PopulationCache(app.config["POPULATION_CACHE_SECONDS"])
+
+
+def get_population_cache() -> PopulationCache:
+    return current_app.extensions["population_cache"]
+
+
+def _mean(values):
+    values = values[~np.isnan(values)]
+    return round(float(values.mean()), 2) if len(values) else None
+
+
+def summarize_population(population, filters=None, min_bp_days=0, limit=0):
+    """
+    Cohort summary for the users matching `filters` ({field: set of
+    categories}) and having at least `min_bp_days` days with BP readings.
+    With limit > 0 also lists up to `limit` matching patients, highest
+    average systolic first.
+    """
+    mask = population["bp_days"] >= min_bp_days
+    for field, allowed in (filters or {}).items():
+        mask &= np.isin(population[field], list(allowed))
+
+    summary = {
+        "date": population["day"].isoformat(),
+        "window_start": population["start_day"].isoformat(),
+        "patients": int(mask.sum()),
+    }
+    for field in FILTER_FIELDS:
+        labels, counts = np.unique(population[field][mask], return_counts=True)
+        found = dict(zip(labels.tolist(), counts.tolist()))
+        summary[field] = {label: found.get(label, 0) for label in CATEGORIES[field]}
+
+    summary["avg_systolic"] = _mean(population["avg_sys"][mask])
+    summary["avg_diastolic"] = _mean(population["avg_dia"][mask])
+    summary["avg_trend_mmhg_per_day"] = _mean(population["slope"][mask])
+
+    # Share of patients with BP and mood data whose BP rises on stressful days
+    stress = summary["stress_impact"]
+    assessable = stress["likely"] + stress["possible"] + stress["unclear"]
+    summary["stress_impact_prevalence"] = (
+        round((stress["likely"] + stress["possible"]) / assessable, 4) if assessable else None
+    )
+
+    if limit > 0:
+        idx = np.flatnonzero(mask & (population["bp_count"] > 0))
+        idx = idx[np.argsort(-population["avg_sys"][idx], kind="stable")][:limit]
+        summary["patient_list"] = [
+            {
+                "user_id": int(population["user_id"][i]),
+                "avg_systolic": round(float(population["avg_sys"][i]), 1),
+                "avg_diastolic": round(float(population["avg_dia"][i]), 1),
+                "bp_days": int(population["bp_days"][i]),
+                **{field: str(population[field][i]) for field in FILTER_FIELDS},
+            }
+            for i in idx
+        ]
+    return summary
@@ -0,0 +1,125 @@
+"""
+Nightly precomputation of daily recommendations.
+
+precompute_recommendations() builds today's recommendation for every
+user with data in the analysis window and stores it in
+daily_recommendations. Chunks of users are loaded with one ranged query
+per table (ordered by user_id, timestamp) and computed in a process
+pool; results are written back with one bulk upsert per chunk.
+
+The endpoint serves the stored row unless the user has written data
+after the row's snapshot time, in which case it computes live.
+"""
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..models import DailyRecommendation, DailyRollup, User
+from .analytics import ReadingWindow
+from .rules_engine import build_daily_recommendation, get_analysis_window
+
+
+def get_stored_recommendation(db_session, user_id: int, today: date):
+    """
+    Precomputed payload for this user and day, or None if missing or if
+    data has been written since it was computed. One query.
+    """
+    payload = db_session.execute(
+        select(DailyRecommendation.payload)
+        .join(User, User.id == DailyRecommendation.user_id)
+        .where(
+            DailyRecommendation.user_id == user_id,
+            DailyRecommendation.day == today,
+            or_(User.data_updated_at.is_(None), User.data_updated_at <= DailyRecommendation.computed_at),
+        )
+    ).scalar()
+    return json.loads(payload) if payload is not None else None
+
+
+def get_active_user_ids(db_session, today: date):
+    """
+    Users with any BP reading or mood log in today's analysis window.
+    Read from daily_rollups (a row exists for every user-day with data)
+    as a range search on its (day, user_id) index, so only the window's
+    rollup rows are visited rather than every reading and mood log.
+    Deduplicated here: with DISTINCT, SQLite prefers scanning the whole
+    (user_id, day) index to avoid a sort.
+    """
+    start_dt, _ = get_analysis_window(today)
+    stmt = select(DailyRollup.user_id).where(DailyRollup.day >= start_dt.date())
+    return sorted(set(db_session.execute(stmt).scalars()))
+
+
+def compute_recommendations(db_session, user_ids, today: date):
+    """
+    {user_id: recommendation dict} for many users from two ranged queries.
+    """
+    start_dt, _ = get_analysis_window(today)
+    windows = ReadingWindow.load_many(db_session, user_ids, start_dt)
+    return {user_id: build_daily_recommendation(window, today) for user_id, window in windows.items()}
+
+
+def _compute_chunk(database_uri, user_ids, today):
+    """
+    Worker entry point: own engine, one chunk of users.
+    Returns [(user_id, payload_json)].
+    """
+    engine = create_engine(database_uri)
+    try:
+        with engine.connect() as conn:
+            results = compute_recommendations(conn, user_ids, today)
+    finally:
+        engine.dispose()
+    return [(user_id, json.dumps(result)) for user_id, result in results.items()]
+
+
+def _write_chunk(db_session, today, computed_at, rows):
+    if not rows:
+        return
+    values = [
+        {"user_id": user_id, "day": today, "payload": payload, "computed_at": computed_at}
+        for user_id, payload in rows
+    ]
+    stmt = sqlite_insert(DailyRecommendation)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyRecommendation.user_id, DailyRecommendation.day],
+        set_={"payload": stmt.excluded.payload, "computed_at": stmt.excluded.computed_at},
+    )
+    db_session.execute(stmt, values)
+
+
+def precompute_recommendations(db_session, database_uri, today: date, workers=1, chunk_size=1000):
+    """
+    Precompute and store today's recommendation for all active users.
+    Commits once per chunk. Returns {"users", "seconds", "users_per_second"}.
+    """
+    # Snapshot before reading: anything written after this marks rows stale
+    computed_at = datetime.utcnow()
+    started = time.perf_counter()
+
+    user_ids = get_active_user_ids(db_session, today)
+    chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+
+    def write(rows):
+        _write_chunk(db_session, today, computed_at, rows)
+        db_session.commit()
+
+    if workers <= 1:
+        for chunk in chunks:
+            write(_compute_chunk(database_uri, chunk, today))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_compute_chunk, database_uri, chunk, today) for chunk in chunks]
+            for future in futures:
+                write(future.result())
+
+    seconds = time.perf_counter() - started
+    return {
+        "users": len(user_ids),
+        "seconds": seconds,
+        "users_per_second": len(user_ids) / seconds if seconds else 0.0,
+    }
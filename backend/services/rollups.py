@@ -0,0 +1,186 @@
+from sqlalchemy import delete, func, literal, select, true
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..models import BPReading, MoodLog, DailyRollup
+
+
+BP_FIELDS = ("bp_count", "systolic_sum", "systolic_min", "systolic_max",
+             "diastolic_sum", "diastolic_min", "diastolic_max")
+MOOD_FIELDS = ("mood_count", "mood_sum", "mood_min", "mood_max")
+
+
+# -------------------------
+# Incremental maintenance (called from services/ingest.py)
+# -------------------------
+
+def _group_by_day(rows, value_keys):
+    """
+    Aggregate inserted rows into {day: {count, sums, mins, maxes}}.
+    """
+    by_day = {}
+    for row in rows:
+        d = row["timestamp"].date()
+        agg = by_day.get(d)
+        if agg is None:
+            agg = by_day[d] = {"count": 0}
+            for key in value_keys:
+                agg[key] = {"sum": 0, "min": row[key], "max": row[key]}
+        agg["count"] += 1
+        for key in value_keys:
+            v = row[key]
+            agg[key]["sum"] += v
+            agg[key]["min"] = min(agg[key]["min"], v)
+            agg[key]["max"] = max(agg[key]["max"], v)
+    return by_day
+
+
+def _upsert(db_session, values, fields):
+    """
+    Add `values` (a list of rollup dicts) into existing rows:
+    counts and sums are added, min/max are merged.
+    """
+    stmt = sqlite_insert(DailyRollup)
+    excluded = stmt.excluded
+    update = {}
+    for field in fields:
+        col = getattr(DailyRollup, field)
+        new = getattr(excluded, field)
+        if field.endswith("_min"):
+            update[field] = func.min(func.coalesce(col, new), new)
+        elif field.endswith("_max"):
+            update[field] = func.max(func.coalesce(col, new), new)
+        else:
+            update[field] = col + new
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyRollup.user_id, DailyRollup.day],
+        set_=update,
+    )
+    db_session.execute(stmt, values)
+
+
+def apply_bp_rows(db_session, user_id: int, rows):
+    """
+    Fold newly inserted BP rows into the user's daily rollups. Does not commit.
+    """
+    if not rows:
+        return
+    values = []
+    for d, agg in _group_by_day(rows, ("systolic", "diastolic")).items():
+        values.append({
+            "user_id": user_id,
+            "day": d,
+            "bp_count": agg["count"],
+            "systolic_sum": agg["systolic"]["sum"],
+            "systolic_min": agg["systolic"]["min"],
+            "systolic_max": agg["systolic"]["max"],
+            "diastolic_sum": agg["diastolic"]["sum"],
+            "diastolic_min": agg["diastolic"]["min"],
+            "diastolic_max": agg["diastolic"]["max"],
+        })
+    _upsert(db_session, values, BP_FIELDS)
+
+
+def apply_mood_rows(db_session, user_id: int, rows):
+    """
+    Fold newly inserted mood rows into the user's daily rollups. Does not commit.
+    """
+    if not rows:
+        return
+    values = []
+    for d, agg in _group_by_day(rows, ("mood_level",)).items():
+        values.append({
+            "user_id": user_id,
+            "day": d,
+            "mood_count": agg["count"],
+            "mood_sum": agg["mood_level"]["sum"],
+            "mood_min": agg["mood_level"]["min"],
+            "mood_max": agg["mood_level"]["max"],
+        })
+    _upsert(db_session, values, MOOD_FIELDS)
+
+
+# -------------------------
+# Full rebuild from raw data
+# -------------------------
+
+def rebuild_daily_rollups(db_session, user_id=None):
+    """
+    Recompute rollups from bp_readings and mood_logs with two grouped
+    INSERT ... SELECT statements. Works with a Session or a Connection.
+    Does not commit.
+    """
+    clear = delete(DailyRollup)
+    if user_id is not None:
+        clear = clear.where(DailyRollup.user_id == user_id)
+    db_session.execute(clear)
+
+    bp_day = func.date(BPReading.timestamp)
+    bp_select = (
+        select(
+            BPReading.user_id,
+            bp_day,
+            func.count(),
+            func.sum(BPReading.systolic),
+            func.min(BPReading.systolic),
+            func.max(BPReading.systolic),
+            func.sum(BPReading.diastolic),
+            func.min(BPReading.diastolic),
+            func.max(BPReading.diastolic),
+            literal(0),
+            literal(0),
+        )
+        .group_by(BPReading.user_id, bp_day)
+    )
+    if user_id is not None:
+        bp_select = bp_select.where(BPReading.user_id == user_id)
+
+    db_session.execute(
+        sqlite_insert(DailyRollup).from_select(
+            ["user_id", "day", *BP_FIELDS, "mood_count", "mood_sum"],
+            bp_select,
+        )
+    )
+
+    mood_day = func.date(MoodLog.timestamp)
+    mood_select = (
+        select(
+            MoodLog.user_id,
+            mood_day,
+            literal(0), literal(0), literal(0),
+            func.count(),
+            func.sum(MoodLog.mood_level),
+            func.min(MoodLog.mood_level),
+            func.max(MoodLog.mood_level),
+        )
+        .group_by(MoodLog.user_id, mood_day)
+    )
+    if user_id is not None:
+        mood_select = mood_select.where(MoodLog.user_id == user_id)
+
+    # SQLite needs a WHERE clause to tell the upsert's ON from a join
+    upsert = sqlite_insert(DailyRollup).from_select(
+        ["user_id", "day", "bp_count", "systolic_sum", "diastolic_sum", *MOOD_FIELDS],
+        mood_select.where(true()),
+    )
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[DailyRollup.user_id, DailyRollup.day],
+        set_={field: getattr(upsert.excluded, field) for field in MOOD_FIELDS},
+    )
+    db_session.execute(upsert)
+
+
+# -------------------------
+# Reads
+# -------------------------
+
+def get_daily_rollups(db_session, user_id: int, start_day):
+    """
+    Rollup rows for this user from start_day (inclusive), oldest first.
+    """
+    return (
+        db_session.query(DailyRollup)
+        .filter(DailyRollup.user_id == user_id, DailyRollup.day >= start_day)
+        .order_by(DailyRollup.day.asc())
+        .all()
+    )
@@ -1,6 +1,9 @@
 from datetime import datetime, timedelta, date
 
-from ..models import BPReading, MoodLog
+import numpy as np
+
+from ..instrumentation import timed
+from .analytics import ReadingWindow
 
 
 # ------------ Helper functions: BP classification & trends ------------ #
@@ -38,68 +41,60 @@ def compute_bp_stats(bp_readings):
     """
     Compute weekly average and min/max systolic/diastolic.
     """
-    systolics = [r.systolic for r in bp_readings]
-    diastolics = [r.diastolic for r in bp_readings]
-
-    avg_sys = sum(systolics) / len(systolics)
-    avg_dia = sum(diastolics) / len(diastolics)
-
-    max_sys = max(systolics)
-    max_dia = max(diastolics)
-    min_sys = min(systolics)
-    min_dia = min(diastolics)
-
-    return {
-        "avg_sys": avg_sys,
-        "avg_dia": avg_dia,
-        "max_sys": max_sys,
-        "max_dia": max_dia,
-        "min_sys": min_sys,
-        "min_dia": min_dia,
-    }
+    return _as_window(bp_readings).bp_stats()
 
 
 def compute_bp_trend(bp_readings):
     """
-    Rough trend: compare older half vs newer half.
+    Trend from the least-squares slope of daily average systolic.
     Returns: "improving", "worsening", "stable", or "unknown".
     """
-    if len(bp_readings) < 2:
-        return "unknown"
+    return _trend_from_window(_as_window(bp_readings))
 
-    sorted_readings = sorted(bp_readings, key=lambda r: r.timestamp)
 
-    mid = len(sorted_readings) // 2
-    older = sorted_readings[:mid]
-    newer = sorted_readings[mid:]
+def compute_bp_trend_slope(bp_readings):
+    """
+    Least-squares slope of daily average systolic in mmHg/day
+    (None with < 2 days of readings).
+    """
+    return _as_window(bp_readings).trend_slope()
 
-    def avg_sys(reads):
-        return sum(r.systolic for r in reads) / len(reads)
 
-    older_avg = avg_sys(older)
-    newer_avg = avg_sys(newer)
-    diff = newer_avg - older_avg  # positive = getting higher
+def classify_bp_trend(slope):
+    """
+    Label a daily-average systolic slope (mmHg/day) by the change it
+    projects over half the analysis window: +/-5 mmHg, as the old
+    newer-half vs older-half comparison. Takes one slope (None =
+    unknown) or an array of them (NaN = unknown).
+    """
+    projected = np.asarray(np.nan if slope is None else slope, dtype=np.float64) * ANALYSIS_DAYS / 2
+    with np.errstate(invalid="ignore"):
+        labels = np.select(
+            [np.isnan(projected), projected >= 5, projected <= -5],
+            ["unknown", "worsening", "improving"],
+            "stable",
+        )
+    return labels if labels.ndim else str(labels)
 
-    # Thresholds in mmHg – simple heuristic
-    if diff >= 5:
-        return "worsening"
-    elif diff <= -5:
-        return "improving"
-    else:
-        return "stable"
+
+def _trend_from_window(window):
+    return classify_bp_trend(window.trend_slope())
 
 
 def summarize_logging(bp_readings, start_dt, end_dt):
     """
     Days with any BP reading in the analysis window.
     """
-    if not bp_readings:
+    return _logging_from_window(_as_window(bp_readings), start_dt, end_dt)
+
+
+def _logging_from_window(window, start_dt, end_dt):
+    if not window.bp_count:
         return "no_data"
 
-    days_with_bp = {r.timestamp.date() for r in bp_readings}
     num_days = (end_dt.date() - start_dt.date()).days + 1
 
-    count = len(days_with_bp)
+    count = window.bp_logging_days()
 
     if count >= min(5, num_days):
         return "consistent"
@@ -109,6 +104,12 @@ def summarize_logging(bp_readings, start_dt, end_dt):
         return "irregular"
 
 
+def _as_window(bp_readings=(), mood_logs=()):
+    if isinstance(bp_readings, ReadingWindow):
+        return bp_readings
+    return ReadingWindow.from_readings(bp_readings, mood_logs)
+
+
 # ------------ Helper functions: mood & stress impact ------------ #
 
 def classify_mood_from_avg(avg_mood: float) -> str:
@@ -127,14 +128,17 @@ def compute_weekly_mood(mood_logs):
     """
     Compute weekly average mood and category.
     """
-    if not mood_logs:
+    return _mood_from_window(_as_window(mood_logs=mood_logs))
+
+
+def _mood_from_window(window):
+    if not window.mood_count:
         return {
             "avg_mood": None,
             "mood_category": "no_data"
         }
 
-    levels = [m.mood_level for m in mood_logs]
-    avg_mood = sum(levels) / len(levels)
+    avg_mood = window.avg_mood()
     category = classify_mood_from_avg(avg_mood)
 
     return {
@@ -150,41 +154,17 @@ def compute_stress_impact(bp_readings, mood_logs):
       - "possible": small difference
       - "unclear": too little data or no clear pattern
     """
-    if not bp_readings or not mood_logs:
-        return "unclear"
+    return _stress_from_window(_as_window(bp_readings, mood_logs))
 
-    # Group BP by date
-    bp_by_date = {}
-    for r in bp_readings:
-        d = r.timestamp.date()
-        bp_by_date.setdefault(d, {"sys": [], "dia": []})
-        bp_by_date[d]["sys"].append(r.systolic)
-        bp_by_date[d]["dia"].append(r.diastolic)
-
-    # Group mood by date
-    mood_by_date = {}
-    for m in mood_logs:
-        d = m.timestamp.date()
-        mood_by_date.setdefault(d, [])
-        mood_by_date[d].append(m.mood_level)
-
-    # Days with both BP & mood
-    common_days = [d for d in bp_by_date.keys() if d in mood_by_date]
-    if len(common_days) < 3:
-        return "unclear"
 
-    stressed_sys = []
-    calm_sys = []
-
-    for d in common_days:
-        avg_sys = sum(bp_by_date[d]["sys"]) / len(bp_by_date[d]["sys"])
-        avg_mood = sum(mood_by_date[d]) / len(mood_by_date[d])
+def _stress_from_window(window):
+    if not window.bp_count or not window.mood_count:
+        return "unclear"
 
-        # high stress days vs calm days
-        if avg_mood < 2.0:   # mostly stressed
-            stressed_sys.append(avg_sys)
-        elif avg_mood >= 2.5:  # mostly calm
-            calm_sys.append(avg_sys)
+    # Days with both BP & mood, split into high stress days vs calm days
+    stressed_sys, calm_sys, common_days = window.stress_day_split()
+    if common_days < 3:
+        return "unclear"
 
     if len(stressed_sys) < 1 or len(calm_sys) < 1:
         return "unclear"
@@ -203,6 +183,20 @@ def compute_stress_impact(bp_readings, mood_logs):
 
 # ------------ Main recommendation function ------------ #
 
+ANALYSIS_DAYS = 7
+
+
+def get_analysis_window(today: date):
+    """
+    (start_dt, end_dt) of the recommendation analysis window for `today`:
+    the ANALYSIS_DAYS calendar days ending today, from midnight.
+    """
+    end_dt = datetime.combine(today, datetime.max.time())
+    start_dt = datetime.combine(today - timedelta(days=ANALYSIS_DAYS - 1), datetime.min.time())
+    return start_dt, end_dt
+
+
+@timed("get_daily_recommendation")
 def get_daily_recommendation(db_session, today: date, user_id: int):
 
     """
@@ -215,27 +209,22 @@ def get_daily_recommendation(db_session, today: date, user_id: int):
 
     Returns a structured dict for the API.
     """
-    analysis_days = 7
-    end_dt = datetime.combine(today, datetime.max.time())
-    start_dt = end_dt - timedelta(days=analysis_days)
-
-    # Query data in range
-    bp_readings = (
-        db_session.query(BPReading)
-        .filter(BPReading.user_id == user_id,BPReading.timestamp >= start_dt)
-        .order_by(BPReading.timestamp.asc())
-        .all()
-    )
-
-    mood_logs = (
-        db_session.query(MoodLog)
-        .filter(MoodLog.user_id == user_id,MoodLog.timestamp >= start_dt)
-        .order_by(MoodLog.timestamp.asc())
-        .all()
-    )
+    start_dt, _ = get_analysis_window(today)
+
+    # Load the window once as arrays
+    window = ReadingWindow.load(db_session, user_id, start_dt)
+    return build_daily_recommendation(window, today)
+
+
+def build_daily_recommendation(window, today: date):
+    """
+    Recommendation for `today` from an already loaded ReadingWindow
+    (see get_analysis_window for the expected range).
+    """
+    start_dt, end_dt = get_analysis_window(today)
 
     # No BP data: can't give meaningful BP-based advice
-    if not bp_readings:
+    if not window.bp_count:
         recommendations = [
             "Start by measuring your blood pressure at least once a day for a few days.",
             "After each measurement, take a moment to record how you feel (stressed, okay, or calm).",
@@ -256,21 +245,21 @@ def get_daily_recommendation(db_session, today: date, user_id: int):
         }
 
     # Latest reading
-    latest = bp_readings[-1]
+    latest = window.latest_bp()
 
     # BP stats & classifications
-    bp_stats = compute_bp_stats(bp_readings)
+    bp_stats = window.bp_stats()
     bp_status = classify_bp_status(bp_stats["avg_sys"], bp_stats["avg_dia"])
     bp_risk = classify_bp_risk(bp_status)
-    bp_trend = compute_bp_trend(bp_readings)
+    bp_trend = _trend_from_window(window)
 
     # Mood & stress
-    mood_info = compute_weekly_mood(mood_logs)
+    mood_info = _mood_from_window(window)
     mood_status = mood_info["mood_category"]
-    stress_impact = compute_stress_impact(bp_readings, mood_logs)
+    stress_impact = _stress_from_window(window)
 
     # Logging consistency
-    logging_status = summarize_logging(bp_readings, start_dt, end_dt)
+    logging_status = _logging_from_window(window, start_dt, end_dt)
 
     # ------------ Build human-friendly recommendations ------------ #
 
@@ -387,9 +376,9 @@ def get_daily_recommendation(db_session, today: date, user_id: int):
     return {
         "date": str(today),
         "latest_bp": {
-            "systolic": latest.systolic,
-            "diastolic": latest.diastolic,
-            "timestamp": latest.timestamp.isoformat(),
+            "systolic": latest["systolic"],
+            "diastolic": latest["diastolic"],
+            "timestamp": latest["timestamp"].isoformat(),
         },
         "bp_status": bp_status,
         "bp_risk_level": bp_risk,
@@ -0,0 +1,128 @@
+"""
+Column-projection queries for the read endpoints.
+
+These select only the columns a response needs and return plain Row
+tuples, so no ORM instances are constructed and nothing is added to the
+session identity map. Serializers work straight from the rows.
+"""
+import base64
+from datetime import datetime
+
+from sqlalchemy import select, tuple_
+
+from ..models import BPReading, MoodLog
+
+
+# -------------------------
+# Range queries (dashboard)
+# -------------------------
+
+def bp_series_rows(db_session, user_id: int, start_dt):
+    """
+    (timestamp, systolic, diastolic) rows since start_dt, oldest first.
+    """
+    stmt = (
+        select(BPReading.timestamp, BPReading.systolic, BPReading.diastolic)
+        .where(BPReading.user_id == user_id, BPReading.timestamp >= start_dt)
+        .order_by(BPReading.timestamp.asc())
+    )
+    return db_session.execute(stmt).all()
+
+
+def mood_series_rows(db_session, user_id: int, start_dt):
+    """
+    (timestamp, mood_level, note) rows since start_dt, oldest first.
+    """
+    stmt = (
+        select(MoodLog.timestamp, MoodLog.mood_level, MoodLog.note)
+        .where(MoodLog.user_id == user_id, MoodLog.timestamp >= start_dt)
+        .order_by(MoodLog.timestamp.asc())
+    )
+    return db_session.execute(stmt).all()
+
+
+def serialize_bp_point(row):
+    return {"timestamp": row.timestamp.isoformat(), "systolic": row.systolic, "diastolic": row.diastolic}
+
+
+def serialize_bp_summary(row):
+    return {"systolic": row.systolic, "diastolic": row.diastolic, "timestamp": row.timestamp.isoformat()}
+
+
+def serialize_mood_point(row):
+    return {"timestamp": row.timestamp.isoformat(), "mood_level": row.mood_level, "note": row.note}
+
+
+# -------------------------
+# Keyset pages (list endpoints)
+# -------------------------
+
+def encode_cursor(row) -> str:
+    """
+    Opaque cursor for a row's (timestamp, id) position.
+    """
+    raw = f"{row.timestamp.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    (timestamp, id) from encode_cursor output, or None if malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _page_rows(db_session, model, columns, user_id, limit, before=None, after=None, start=None, end=None):
+    """
+    One page of rows, newest first, keyed on (timestamp, id) so every page
+    is an index range scan on (user_id, timestamp) however deep it is.
+      - before: (timestamp, id) - rows strictly older than this position
+      - after:  (timestamp, id) - rows strictly newer than this position
+      - start/end: inclusive timestamp bounds
+    Returns (rows, has_more) where has_more says whether another page
+    exists in the paging direction (older for `before`, newer for `after`).
+    """
+    position = tuple_(model.timestamp, model.id)
+    stmt = select(*columns).where(model.user_id == user_id)
+    if start is not None:
+        stmt = stmt.where(model.timestamp >= start)
+    if end is not None:
+        stmt = stmt.where(model.timestamp <= end)
+    if before is not None:
+        stmt = stmt.where(position < tuple_(*before))
+    if after is not None:
+        stmt = stmt.where(position > tuple_(*after))
+
+    if after is not None and before is None:
+        # Walk forward from the cursor, then present newest first
+        stmt = stmt.order_by(model.timestamp.asc(), model.id.asc())
+    else:
+        stmt = stmt.order_by(model.timestamp.desc(), model.id.desc())
+
+    rows = db_session.execute(stmt.limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if after is not None and before is None:
+        rows.reverse()
+    return rows, has_more
+
+
+def bp_page_rows(db_session, user_id: int, limit: int, **filters):
+    """
+    A page of BP rows for this user, newest first (see _page_rows).
+    """
+    columns = (BPReading.id, BPReading.user_id, BPReading.systolic, BPReading.diastolic, BPReading.timestamp)
+    return _page_rows(db_session, BPReading, columns, user_id, limit, **filters)
+
+
+def mood_page_rows(db_session, user_id: int, limit: int, **filters):
+    """
+    A page of mood rows for this user, newest first (see _page_rows).
+    """
+    columns = (MoodLog.id, MoodLog.user_id, MoodLog.mood_level, MoodLog.note, MoodLog.timestamp)
+    return _page_rows(db_session, MoodLog, columns, user_id, limit, **filters)
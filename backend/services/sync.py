@@ -0,0 +1,77 @@
+"""
+Delta sync: what changed for a user since a change_log cursor.
+
+A client keeps the id of the last change it has seen as its cursor;
+fetching what changed since then is one range scan on (user_id, id) plus
+one IN lookup per kind, so the cost follows the number of changes, not
+the length of the history.
+"""
+from sqlalchemy import func, select
+
+from ..models import BPReading, ChangeLog, MoodLog, UserBadge
+from .badges import get_badge_catalog
+from .changes import BADGE_CHANGE, BP_CHANGE, MOOD_CHANGE
+from .ingest import serialize_bp_row, serialize_mood_row
+
+
+def get_latest_cursor(db_session, user_id: int) -> int:
+    """
+    Cursor just past this user's newest change (0 if none).
+    """
+    latest = db_session.execute(
+        select(func.max(ChangeLog.id)).where(ChangeLog.user_id == user_id)
+    ).scalar()
+    return latest or 0
+
+
+def get_changes(db_session, user_id: int, since: int, limit: int):
+    """
+    Up to `limit` changes after cursor `since`, oldest first.
+    Returns {"bp", "mood", "badges", "cursor", "has_more"} where cursor is
+    the id to pass as `since` next time.
+    """
+    entries = db_session.execute(
+        select(ChangeLog.id, ChangeLog.kind, ChangeLog.row_id)
+        .where(ChangeLog.user_id == user_id, ChangeLog.id > since)
+        .order_by(ChangeLog.id)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    ids = {BP_CHANGE: [], MOOD_CHANGE: [], BADGE_CHANGE: []}
+    for entry in entries:
+        ids[entry.kind].append(entry.row_id)
+
+    def fetch(columns, model, row_ids):
+        if not row_ids:
+            return {}
+        rows = db_session.execute(select(*columns).where(model.id.in_(row_ids))).all()
+        return {row.id: row for row in rows}
+
+    bp = fetch(
+        (BPReading.id, BPReading.user_id, BPReading.systolic, BPReading.diastolic, BPReading.timestamp),
+        BPReading, ids[BP_CHANGE],
+    )
+    mood = fetch(
+        (MoodLog.id, MoodLog.user_id, MoodLog.mood_level, MoodLog.note, MoodLog.timestamp),
+        MoodLog, ids[MOOD_CHANGE],
+    )
+    awards = fetch((UserBadge.id, UserBadge.badge_id, UserBadge.earned_at), UserBadge, ids[BADGE_CHANGE])
+    codes = {b["id"]: b for b in get_badge_catalog(db_session).values()}
+
+    return {
+        # Keep change order; skip rows that no longer exist
+        "bp": [serialize_bp_row(bp[i]._mapping) for i in ids[BP_CHANGE] if i in bp],
+        "mood": [serialize_mood_row(mood[i]._mapping) for i in ids[MOOD_CHANGE] if i in mood],
+        "badges": [
+            {
+                "code": codes[awards[i].badge_id]["code"],
+                "name": codes[awards[i].badge_id]["name"],
+                "earned_at": awards[i].earned_at.isoformat(),
+            }
+            for i in ids[BADGE_CHANGE] if i in awards
+        ],
+        "cursor": entries[-1].id if entries else since,
+        "has_more": has_more,
+    }
@@ -0,0 +1,521 @@
+"""
+In-process rolling-window statistics per active user.
+
+For each cached user the store keeps one bucket per day (BP count, sums,
+min/max of systolic and diastolic; mood count, sum, min/max) covering the
+last 365 days, plus running totals for the 7, 30 and 365-day windows
+ending today. A write folds its rows into the bucket and the totals in
+O(1); when the day rolls over, buckets leaving a window are subtracted
+from its totals. Window min/max are updated in place on writes and only
+recombined from the buckets after a bucket has left the window.
+
+Users are warmed lazily from daily_rollups plus their latest reading
+(two queries) on first access. Memory is capped by the total number of
+buckets held: least recently used users are evicted first.
+
+Each entry carries the users.data_updated_at stamp its data reflects;
+readers pass the current stamp and a different one means re-warm, so a
+write committed by another process is seen on the next read, as with
+the response cache. Writes committed by this process are folded in only
+when the stamp they replaced is the entry's (nothing was missed) and
+then advance it.
+
+window_stats() answers the compute_bp_stats / compute_weekly_mood
+equivalents (plus logging days) and recommendation() the daily
+recommendation, both without reading any readings; window_stats_from_db()
+and rules_engine.get_daily_recommendation() are the same results from
+raw readings, and check_consistency() compares them.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select
+
+from ..instrumentation import timed
+from ..models import BPReading, User
+from .analytics import ReadingWindow, daily_trend_slope
+from .rollups import get_daily_rollups
+from .rules_engine import ANALYSIS_DAYS, build_daily_recommendation, classify_mood_from_avg, get_daily_recommendation
+
+
+WINDOW_DAYS = (ANALYSIS_DAYS, 30, 365)
+HORIZON_DAYS = max(WINDOW_DAYS)
+
+
+class _Bucket:
+    __slots__ = ("bp_count", "sys_sum", "sys_min", "sys_max", "dia_sum", "dia_min", "dia_max",
+                 "mood_count", "mood_sum", "mood_min", "mood_max")
+
+    def __init__(self):
+        self.bp_count = self.sys_sum = self.dia_sum = 0
+        self.mood_count = self.mood_sum = 0
+        self.sys_min = self.sys_max = self.dia_min = self.dia_max = None
+        self.mood_min = self.mood_max = None
+
+
+class _Totals(_Bucket):
+    __slots__ = ("bp_days", "mood_days", "extremes_stale")
+
+    def __init__(self):
+        super().__init__()
+        self.bp_days = self.mood_days = 0
+        self.extremes_stale = False
+
+
+def _min(a, b):
+    return b if a is None or b < a else a
+
+
+def _max(a, b):
+    return b if a is None or b > a else a
+
+
+class UserWindows:
+    """
+    Day buckets and 7/30/365-day running totals for one user, anchored
+    at `today` (windows cover today - days + 1 onwards, future days
+    included, like a `timestamp >= start` query).
+    """
+
+    def __init__(self, today: date):
+        self.today = today.toordinal()
+        self.buckets = {}  # day ordinal -> _Bucket
+        self.totals = {days: _Totals() for days in WINDOW_DAYS}
+        self.latest_bp = None  # (timestamp, id, systolic, diastolic)
+
+    # ------------ Writes ------------ #
+
+    def _bucket(self, day):
+        """
+        Bucket for `day` (an ordinal), or None when it is beyond the horizon.
+        """
+        if day <= self.today - HORIZON_DAYS:
+            return None
+        bucket = self.buckets.get(day)
+        if bucket is None:
+            bucket = self.buckets[day] = _Bucket()
+        return bucket
+
+    def _windows_for(self, day):
+        return [self.totals[days] for days in WINDOW_DAYS if day > self.today - days]
+
+    def add_bp(self, day: int, systolic: int, diastolic: int, count=1,
+               sys_sum=None, sys_min=None, sys_max=None, dia_sum=None, dia_min=None, dia_max=None):
+        """
+        Fold one reading (or a pre-aggregated day of `count` readings) in.
+        """
+        bucket = self._bucket(day)
+        if bucket is None:
+            return
+        sys_sum = systolic if sys_sum is None else sys_sum
+        dia_sum = diastolic if dia_sum is None else dia_sum
+        sys_lo, sys_hi = (systolic, systolic) if sys_min is None else (sys_min, sys_max)
+        dia_lo, dia_hi = (diastolic, diastolic) if dia_min is None else (dia_min, dia_max)
+
+        new_day = bucket.bp_count == 0
+        for target in [bucket, *self._windows_for(day)]:
+            target.bp_count += count
+            target.sys_sum += sys_sum
+            target.dia_sum += dia_sum
+            target.sys_min = _min(target.sys_min, sys_lo)
+            target.sys_max = _max(target.sys_max, sys_hi)
+            target.dia_min = _min(target.dia_min, dia_lo)
+            target.dia_max = _max(target.dia_max, dia_hi)
+        if new_day:
+            for totals in self._windows_for(day):
+                totals.bp_days += 1
+
+    def note_latest_bp(self, timestamp, reading_id, systolic, diastolic):
+        """
+        Keep the newest reading (ties go to the later id, as in
+        ReadingWindow.load).
+        """
+        if self.latest_bp is None or (timestamp, reading_id) > self.latest_bp[:2]:
+            self.latest_bp = (timestamp, reading_id, systolic, diastolic)
+
+    def add_mood(self, day: int, mood_level: int, count=1, mood_sum=None, mood_min=None, mood_max=None):
+        """
+        Fold one mood log (or a pre-aggregated day of `count` logs) in.
+        """
+        bucket = self._bucket(day)
+        if bucket is None:
+            return
+        mood_sum = mood_level if mood_sum is None else mood_sum
+        lo, hi = (mood_level, mood_level) if mood_min is None else (mood_min, mood_max)
+
+        new_day = bucket.mood_count == 0
+        for target in [bucket, *self._windows_for(day)]:
+            target.mood_count += count
+            target.mood_sum += mood_sum
+            target.mood_min = _min(target.mood_min, lo)
+            target.mood_max = _max(target.mood_max, hi)
+        if new_day:
+            for totals in self._windows_for(day):
+                totals.mood_days += 1
+
+    # ------------ Day roll-over ------------ #
+
+    def advance(self, today: date):
+        """
+        Move the windows forward to `today`, subtracting the buckets that
+        leave each window. Returns False when `today` is earlier than the
+        current anchor (the entry must be re-warmed).
+        """
+        new_today = today.toordinal()
+        if new_today < self.today:
+            return False
+        if new_today == self.today:
+            return True
+
+        for days in WINDOW_DAYS:
+            totals = self.totals[days]
+            # Days that were in the window and no longer are
+            first = self.today - days + 1
+            last = new_today - days
+            if last - first < len(self.buckets):
+                leaving = range(first, last + 1)
+            else:
+                leaving = [day for day in self.buckets if first <= day <= last]
+            for day in leaving:
+                bucket = self.buckets.get(day)
+                if bucket is None:
+                    continue
+                totals.bp_count -= bucket.bp_count
+                totals.sys_sum -= bucket.sys_sum
+                totals.dia_sum -= bucket.dia_sum
+                totals.mood_count -= bucket.mood_count
+                totals.mood_sum -= bucket.mood_sum
+                totals.bp_days -= 1 if bucket.bp_count else 0
+                totals.mood_days -= 1 if bucket.mood_count else 0
+                totals.extremes_stale = True
+
+        self.today = new_today
+        for day in [d for d in self.buckets if d <= new_today - HORIZON_DAYS]:
+            del self.buckets[day]
+        return True
+
+    def _refresh_extremes(self, days):
+        totals = self.totals[days]
+        totals.sys_min = totals.sys_max = totals.dia_min = totals.dia_max = None
+        totals.mood_min = totals.mood_max = None
+        start = self.today - days
+        for day, bucket in self.buckets.items():
+            if day <= start:
+                continue
+            if bucket.bp_count:
+                totals.sys_min = _min(totals.sys_min, bucket.sys_min)
+                totals.sys_max = _max(totals.sys_max, bucket.sys_max)
+                totals.dia_min = _min(totals.dia_min, bucket.dia_min)
+                totals.dia_max = _max(totals.dia_max, bucket.dia_max)
+            if bucket.mood_count:
+                totals.mood_min = _min(totals.mood_min, bucket.mood_min)
+                totals.mood_max = _max(totals.mood_max, bucket.mood_max)
+        totals.extremes_stale = False
+
+    # ------------ Reads ------------ #
+
+    def stats(self, days: int):
+        """
+        Statistics for the `days` window, same shape as window_stats_from_db.
+        """
+        totals = self.totals[days]
+        if totals.extremes_stale:
+            self._refresh_extremes(days)
+
+        bp_stats = None
+        if totals.bp_count:
+            bp_stats = {
+                "avg_sys": totals.sys_sum / totals.bp_count,
+                "avg_dia": totals.dia_sum / totals.bp_count,
+                "max_sys": totals.sys_max,
+                "max_dia": totals.dia_max,
+                "min_sys": totals.sys_min,
+                "min_dia": totals.dia_min,
+            }
+        avg_mood = totals.mood_sum / totals.mood_count if totals.mood_count else None
+        return _stats_dict(days, totals.bp_count, bp_stats, totals.bp_days,
+                           totals.mood_count, avg_mood, totals.mood_days)
+
+    def view(self, days: int):
+        """
+        Snapshot of the `days` window with the ReadingWindow methods that
+        rules_engine.build_daily_recommendation reads.
+        """
+        totals = self.totals[days]
+        if totals.extremes_stale:
+            self._refresh_extremes(days)
+        start = self.today - days
+        daily = sorted(
+            (day, b.bp_count, b.sys_sum, b.mood_count, b.mood_sum)
+            for day, b in self.buckets.items() if day > start
+        )
+        return WindowView(totals, daily, self.latest_bp)
+
+
+class WindowView:
+    """
+    ReadingWindow-compatible statistics for one window of a UserWindows,
+    computed from day buckets. Every value matches ReadingWindow's for
+    the same readings (integer sums divided once, same day grouping).
+    """
+
+    def __init__(self, totals, daily, latest_bp):
+        self.bp_count = totals.bp_count
+        self.mood_count = totals.mood_count
+        self._totals = (totals.sys_sum, totals.dia_sum, totals.sys_min, totals.sys_max,
+                        totals.dia_min, totals.dia_max, totals.bp_days, totals.mood_sum)
+        self._daily = daily  # [(day, bp_count, sys_sum, mood_count, mood_sum)], days ascending
+        self._latest_bp = latest_bp
+
+    def latest_bp(self):
+        timestamp, _, systolic, diastolic = self._latest_bp
+        return {"systolic": systolic, "diastolic": diastolic, "timestamp": timestamp}
+
+    def bp_stats(self):
+        sys_sum, dia_sum, sys_min, sys_max, dia_min, dia_max, _, _ = self._totals
+        return {
+            "avg_sys": sys_sum / self.bp_count,
+            "avg_dia": dia_sum / self.bp_count,
+            "max_sys": sys_max,
+            "max_dia": dia_max,
+            "min_sys": sys_min,
+            "min_dia": dia_min,
+        }
+
+    def trend_slope(self):
+        bp_days = [(day, sys_sum / count) for day, count, sys_sum, _, _ in self._daily if count]
+        return daily_trend_slope([day for day, _ in bp_days], [avg for _, avg in bp_days])
+
+    def bp_logging_days(self) -> int:
+        return self._totals[6]
+
+    def avg_mood(self):
+        return self._totals[7] / self.mood_count
+
+    def stress_day_split(self):
+        stressed, calm, common = [], [], 0
+        for _, bp_count, sys_sum, mood_count, mood_sum in self._daily:
+            if not bp_count or not mood_count:
+                continue
+            common += 1
+            avg_mood = mood_sum / mood_count
+            if avg_mood < 2.0:
+                stressed.append(sys_sum / bp_count)
+            elif avg_mood >= 2.5:
+                calm.append(sys_sum / bp_count)
+        return stressed, calm, common
+
+
+def _stats_dict(days, bp_count, bp_stats, bp_days, mood_count, avg_mood, mood_days):
+    return {
+        "days": days,
+        "bp_count": bp_count,
+        "bp_stats": bp_stats,
+        "bp_logging_days": bp_days,
+        "mood_count": mood_count,
+        "mood": {
+            "avg_mood": avg_mood,
+            "mood_category": classify_mood_from_avg(avg_mood) if mood_count else "no_data",
+        },
+        "mood_logging_days": mood_days,
+    }
+
+
+def load_user_windows(db_session, user_id: int, today: date) -> UserWindows:
+    """
+    Warm a user's buckets from daily_rollups and their latest reading
+    (two queries).
+    """
+    windows = UserWindows(today)
+    latest = db_session.execute(
+        select(BPReading.timestamp, BPReading.id, BPReading.systolic, BPReading.diastolic)
+        .where(BPReading.user_id == user_id)
+        .order_by(BPReading.timestamp.desc(), BPReading.id.desc())
+        .limit(1)
+    ).first()
+    if latest is not None:
+        windows.note_latest_bp(*latest)
+    start_day = today - timedelta(days=HORIZON_DAYS - 1)
+    for row in get_daily_rollups(db_session, user_id, start_day):
+        day = row.day.toordinal()
+        if row.bp_count:
+            windows.add_bp(day, None, None, row.bp_count, row.systolic_sum, row.systolic_min,
+                           row.systolic_max, row.diastolic_sum, row.diastolic_min, row.diastolic_max)
+        if row.mood_count:
+            windows.add_mood(day, None, row.mood_count, row.mood_sum, row.mood_min, row.mood_max)
+    return windows
+
+
+# -------------------------
+# Store
+# -------------------------
+
+class RollingWindowStore:
+    """
+    Bounded LRU of UserWindows, capped by the total number of day buckets.
+    """
+
+    def __init__(self, max_buckets: int):
+        self.max_buckets = max_buckets
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # user_id -> [UserWindows, data_updated_at]
+        self._warming = {}             # user_id -> token, see _warm
+        self._lock = threading.Lock()
+
+    def window_stats(self, db_session, user_id: int, today: date, days: int, stamp):
+        """
+        Stats for one of WINDOW_DAYS. `stamp` is the user's current
+        users.data_updated_at; the entry is re-warmed unless it matches.
+        """
+        if days not in WINDOW_DAYS:
+            raise ValueError(f"days must be one of {WINDOW_DAYS}")
+        return self._read(db_session, user_id, today, stamp, lambda windows: windows.stats(days))
+
+    @timed("window_store_recommendation")
+    def recommendation(self, db_session, user_id: int, today: date, stamp):
+        """
+        Today's recommendation from the ANALYSIS_DAYS window, the same
+        result as rules_engine.get_daily_recommendation.
+        """
+        view = self._read(db_session, user_id, today, stamp, lambda windows: windows.view(ANALYSIS_DAYS))
+        return build_daily_recommendation(view, today)
+
+    def _read(self, db_session, user_id: int, today: date, stamp, read):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                windows, entry_stamp = entry
+                if entry_stamp == stamp and windows.advance(today):
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return read(windows)
+                del self._entries[user_id]
+            self.misses += 1
+
+        windows = self._warm(db_session, user_id, today, stamp)
+        with self._lock:
+            return read(windows)
+
+    def _warm(self, db_session, user_id: int, today: date, stamp) -> UserWindows:
+        # `stamp` was read before the rollups, so the data is at least as
+        # new as it (a newer write only triggers another warm later). A
+        # write applied by this process meanwhile drops the token so the
+        # loaded entry is not kept.
+        token = object()
+        with self._lock:
+            self._warming[user_id] = token
+        windows = load_user_windows(db_session, user_id, today)
+        with self._lock:
+            if self._warming.get(user_id) is token:
+                del self._warming[user_id]
+                if self.max_buckets > 0:
+                    self._entries[user_id] = [windows, stamp]
+                    self._evict()
+        return windows
+
+    def _evict(self):
+        total = sum(len(windows.buckets) for windows, _ in self._entries.values())
+        while total > self.max_buckets and self._entries:
+            _, (windows, _) = self._entries.popitem(last=False)
+            total -= len(windows.buckets)
+            self.evictions += 1
+
+    def apply_rows(self, user_id: int, stamp_change, bp_rows=(), mood_rows=()):
+        """
+        Fold rows committed by this process into a cached user.
+        `stamp_change` is (stamp before, stamp after) of the write (see
+        ingest.pending_stamp_change). When the entry is not at the stamp
+        before, it missed another write and is dropped instead.
+        """
+        with self._lock:
+            self._warming.pop(user_id, None)
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            if stamp_change is None or entry[1] != stamp_change[0]:
+                del self._entries[user_id]
+                return
+            windows = entry[0]
+            for row in bp_rows:
+                windows.add_bp(row["timestamp"].toordinal(), row["systolic"], row["diastolic"])
+                windows.note_latest_bp(row["timestamp"], row["id"], row["systolic"], row["diastolic"])
+            for row in mood_rows:
+                windows.add_mood(row["timestamp"].toordinal(), row["mood_level"])
+            entry[1] = stamp_change[1]
+            self._evict()
+
+    def discard(self, user_id: int):
+        """
+        Forget a user (e.g. after a bulk import); re-warmed on next access.
+        """
+        with self._lock:
+            self._warming.pop(user_id, None)
+            self._entries.pop(user_id, None)
+
+    def info(self):
+        with self._lock:
+            return {
+                "users": len(self._entries),
+                "buckets": sum(len(windows.buckets) for windows, _ in self._entries.values()),
+                "max_buckets": self.max_buckets,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def init_window_store(app):
+    app.extensions["window_store"] = RollingWindowStore(app.config["WINDOW_STORE_MAX_BUCKETS"])
+
+
+def get_window_store() -> RollingWindowStore:
+    return current_app.extensions["window_store"]
+
+
+# -------------------------
+# Database path / consistency
+# -------------------------
+
+def window_stats_from_db(db_session, user_id: int, today: date, days: int):
+    """
+    The same statistics computed from raw readings (two queries).
+    """
+    start_dt = datetime.combine(today - timedelta(days=days - 1), datetime.min.time())
+    window = ReadingWindow.load(db_session, user_id, start_dt)
+    avg_mood = window.avg_mood() if window.mood_count else None
+    return _stats_dict(
+        days,
+        window.bp_count,
+        window.bp_stats() if window.bp_count else None,
+        window.bp_logging_days(),
+        window.mood_count,
+        avg_mood,
+        window.mood_logging_days(),
+    )
+
+
+def check_consistency(store, db_session, user_id: int, today: date):
+    """
+    Compare every window of the store, and the recommendation built from
+    it, with the raw-readings path. Returns [{"check", "store", "db"}]
+    for the results that differ.
+    """
+    stamp = db_session.execute(select(User.data_updated_at).where(User.id == user_id)).scalar()
+    mismatches = []
+    for days in WINDOW_DAYS:
+        cached = store.window_stats(db_session, user_id, today, days, stamp)
+        expected = window_stats_from_db(db_session, user_id, today, days)
+        if cached != expected:
+            mismatches.append({"check": f"{days} days", "store": cached, "db": expected})
+    cached = store.recommendation(db_session, user_id, today, stamp)
+    expected = get_daily_recommendation(db_session, today, user_id)
+    if cached != expected:
+        mismatches.append({"check": "recommendation", "store": cached, "db": expected})
+    return mismatches
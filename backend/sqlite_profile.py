@@ -0,0 +1,82 @@
+"""
+SQLite connection profiles.
+
+SQLITE_PROFILE selects one of SQLITE_PROFILES:
+  - default:    SQLite and SQLAlchemy defaults (rollback journal,
+                synchronous=FULL, the sqlite3 module's 5 s lock wait,
+                so a read transaction held longer than that makes
+                writers fail with "database is locked")
+  - production: WAL so readers never block on the writer,
+                synchronous=NORMAL, a busy timeout so concurrent writers
+                wait instead of failing with "database is locked",
+                memory-mapped I/O and a larger page cache, plus a sized
+                connection pool
+
+Engine options must be in place before db.init_app creates the engine;
+pragmas are applied to every new DBAPI connection afterwards.
+"""
+from sqlalchemy import event
+
+
+SQLITE_PROFILES = {
+    "default": {
+        "pragmas": {},
+        "engine_options": {},
+    },
+    "production": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,        # ms
+            "mmap_size": 268435456,      # 256 MiB
+            "cache_size": -65536,        # 64 MiB (negative = KiB)
+            "temp_store": "MEMORY",
+        },
+        "engine_options": {
+            "pool_size": 10,
+            "max_overflow": 10,
+            "pool_timeout": 30,
+            # Python-level lock wait, matches busy_timeout
+            "connect_args": {"timeout": 5},
+        },
+    },
+}
+
+
+def _get_profile(app):
+    name = app.config["SQLITE_PROFILE"]
+    try:
+        return SQLITE_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown SQLITE_PROFILE: {name}") from None
+
+
+def configure_engine_options(app):
+    """
+    Merge the profile's engine options under any explicit
+    SQLALCHEMY_ENGINE_OPTIONS. Call before db.init_app.
+    """
+    if not app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        return
+    options = dict(_get_profile(app)["engine_options"])
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def apply_pragmas(app, engine):
+    """
+    Run the profile's PRAGMAs on every new connection to `engine`.
+    Call before the engine opens its first connection.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = _get_profile(app)["pragmas"]
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
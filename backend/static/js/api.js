@@ -22,14 +22,49 @@ function requireAuth() {
   return auth;
 }
 
+/**
+ * Auth headers for the stored login: signed token when we have one,
+ * plus X-User-Id for older sessions.
+ */
+function authHeaders(auth) {
+  const headers = { "X-User-Id": String(auth.user_id) };
+  if (auth.token) headers["Authorization"] = `Bearer ${auth.token}`;
+  return headers;
+}
+
+// Writes the server deduplicates by client_id, so retries never double-insert
+const IDEMPOTENT_WRITE_PATHS = ["/api/bp", "/api/mood"];
+
+/**
+ * Random UUID v4 used as a write's idempotency key
+ */
+function newClientId() {
+  if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+  return "10000000-1000-4000-8000-100000000000".replace(/[018]/g, c =>
+    (c ^ (crypto.getRandomValues(new Uint8Array(1))[0] & (15 >> (c / 4)))).toString(16)
+  );
+}
+
 async function apiRequest(path, { method = "GET", body = null, authRequired = true } = {}) {
   const headers = {};
   const auth = getAuth();
 
+  // Tag the write once, so a queued retry carries the same key
+  if (method === "POST" && body && IDEMPOTENT_WRITE_PATHS.includes(path) && !body.client_id) {
+    body = { ...body, client_id: newClientId() };
+  }
+
   if (method !== "GET") headers["Content-Type"] = "application/json";
   if (authRequired) {
     if (!auth || !auth.user_id) throw new Error("Not logged in");
-    headers["X-User-Id"] = String(auth.user_id);
+    Object.assign(headers, authHeaders(auth));
+  }
+
+  // Revalidate the locally cached copy instead of refetching it
+  if (method === "GET") {
+    const { etag, lastModified } = retrieveOfflineValidators(path);
+    if (etag) headers["If-None-Match"] = etag;
+    if (lastModified) headers["If-Modified-Since"] = lastModified;
   }
 
   try {
@@ -39,6 +74,10 @@ async function apiRequest(path, { method = "GET", body = null, authRequired = tr
       body: body ? JSON.stringify(body) : null
     });
 
+    if (res.status === 304) {
+      return retrieveOfflineData(path);
+    }
+
     const text = await res.text();
     const data = text ? JSON.parse(text) : null;
 
@@ -49,7 +88,10 @@ async function apiRequest(path, { method = "GET", body = null, authRequired = tr
 
     // Cache successful GET responses for offline use
     if (method === "GET") {
-      saveOfflineData(path, data);
+      saveOfflineData(path, data, {
+        etag: res.headers.get("ETag"),
+        lastModified: res.headers.get("Last-Modified")
+      });
     }
 
     return data;
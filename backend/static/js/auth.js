@@ -47,7 +47,7 @@ document.addEventListener("DOMContentLoaded", () => {
         authRequired: false
       });
 
-      setAuth({ user_id: data.user_id, email: data.email, name: data.name });
+      setAuth({ user_id: data.user_id, email: data.email, name: data.name, token: data.token });
       showToast("Login successful.", "success");
       window.location.href = "/dashboard";
     } catch (e) {
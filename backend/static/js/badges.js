@@ -49,5 +49,8 @@ async function loadBadges() {
 document.addEventListener("DOMContentLoaded", async () => {
   requireAuth();
   document.getElementById("btnRefreshBadges").addEventListener("click", loadBadges);
+  window.addEventListener("bp:server-changes", (e) => {
+    if (e.detail.badges.length) loadBadges();
+  });
   await loadBadges();
 });
@@ -1,6 +1,9 @@
 let bpTrendChart = null;
 let corrChart = null;
 
+// More raw points than the chart can show; the server downsamples beyond this
+const DASHBOARD_MAX_POINTS = 500;
+
 function getSeriesFromDashboard(dash) {
   const bpDaily = dash.daily_summary?.bp_daily || [];
   const moodDaily = dash.daily_summary?.mood_daily || [];
@@ -108,7 +111,7 @@ async function loadDashboard() {
   const corrHint = document.getElementById("corrHint");
 
   try {
-    const dash = await apiRequest(`/api/dashboard?range=${encodeURIComponent(range)}`, { method: "GET" });
+    const dash = await apiRequest(`/api/dashboard?range=${encodeURIComponent(range)}&max_points=${DASHBOARD_MAX_POINTS}`, { method: "GET" });
 
     // Cards
     const last = dash.last_bp || null;
@@ -199,6 +202,12 @@ document.addEventListener("DOMContentLoaded", async () => {
     await loadRecommendation();
   });
 
+  // Readings or badges added on another device
+  window.addEventListener("bp:server-changes", async () => {
+    await loadDashboard();
+    await loadRecommendation();
+  });
+
   await loadDashboard();
   await loadRecommendation();
 });
@@ -109,6 +109,7 @@ document.addEventListener("DOMContentLoaded", async () => {
   document
     .getElementById("btnRefreshInsights")
     .addEventListener("click", loadInsights);
+  window.addEventListener("bp:server-changes", loadInsights);
 
   await loadInsights();
 });
@@ -1,3 +1,9 @@
+function showNewBadges(codes) {
+  if (codes && codes.length) {
+    showToast(`🏅 New badge unlocked: ${codes.join(", ")}`, "success");
+  }
+}
+
 document.addEventListener("DOMContentLoaded", () => {
   requireAuth();
 
@@ -21,6 +27,7 @@ document.addEventListener("DOMContentLoaded", () => {
         showToast("📱 BP saved offline. Will sync when online.", "info");
       } else {
         showToast("✓ BP saved.", "success");
+        showNewBadges(result.new_badges);
       }
       
       // Clear input fields
@@ -42,6 +49,7 @@ document.addEventListener("DOMContentLoaded", () => {
         showToast("📱 Mood saved offline. Will sync when online.", "info");
       } else {
         showToast("✓ Mood saved.", "success");
+        showNewBadges(result.new_badges);
       }
       
       // Clear input fields
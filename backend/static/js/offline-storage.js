@@ -84,11 +84,13 @@ function getOfflineData() {
 /**
  * Save offline data (for cached API responses)
  */
-function saveOfflineData(key, data) {
+function saveOfflineData(key, data, validators = {}) {
   try {
     const offlineData = getOfflineData();
     offlineData[key] = {
       data,
+      etag: validators.etag || null,
+      lastModified: validators.lastModified || null,
       timestamp: new Date().toISOString()
     };
     localStorage.setItem(OFFLINE_DATA_KEY, JSON.stringify(offlineData));
@@ -105,3 +107,12 @@ function retrieveOfflineData(key) {
   const offlineData = getOfflineData();
   return offlineData[key]?.data || null;
 }
+
+/**
+ * ETag / Last-Modified stored with the cached response for key
+ */
+function retrieveOfflineValidators(key) {
+  const entry = getOfflineData()[key];
+  if (!entry || !entry.data) return {};
+  return { etag: entry.etag || null, lastModified: entry.lastModified || null };
+}
@@ -9,6 +9,80 @@ function isOnline() {
   return navigator.onLine;
 }
 
+// Must not exceed BATCH_MAX_ITEMS on the server
+const BATCH_SYNC_SIZE = 200;
+
+const BATCH_PATHS = {
+  "/api/bp": "bp",
+  "/api/mood": "mood"
+};
+
+/**
+ * True if a queued item can be sent through /api/batch
+ */
+function isBatchableItem(item) {
+  return item.method === "POST" && item.authRequired && item.path in BATCH_PATHS;
+}
+
+/**
+ * Send a chunk of queued BP/mood items in a single /api/batch request.
+ * Returns { successCount, failedItems }.
+ */
+async function syncBatch(items) {
+  const payload = { bp: [], mood: [] };
+  const queued = { bp: [], mood: [] };
+
+  for (const item of items) {
+    const kind = BATCH_PATHS[item.path];
+    payload[kind].push(item.body || {});
+    queued[kind].push(item);
+  }
+
+  try {
+    const response = await fetch("/api/batch", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        ...authHeaders(getAuth())
+      },
+      body: JSON.stringify(payload)
+    });
+
+    if (!response.ok) {
+      console.error("Batch sync failed:", response.status);
+      return { successCount: 0, failedItems: items };
+    }
+
+    const data = await response.json();
+    let successCount = 0;
+    const failedItems = [];
+
+    for (const kind of ["bp", "mood"]) {
+      (data[kind] || []).forEach((result, index) => {
+        const item = queued[kind][index];
+        // 200 = the server already had this write (same client_id)
+        if (result.status === 201 || result.status === 200) {
+          removeFromOfflineQueue(item.id);
+          successCount++;
+        } else {
+          failedItems.push(item);
+          console.error("Sync failed for:", item.path, result.error);
+        }
+      });
+    }
+
+    if (data.new_badges && data.new_badges.length) {
+      showToast(`🏅 New badge unlocked: ${data.new_badges.join(", ")}`, "success");
+    }
+
+    console.log(`Batch synced ${successCount} item(s)`);
+    return { successCount, failedItems };
+  } catch (e) {
+    console.error("Batch sync error:", e);
+    return { successCount: 0, failedItems: items };
+  }
+}
+
 /**
  * Sync all offline queued requests to the server
  */
@@ -37,13 +111,26 @@ async function syncOfflineQueue() {
   let failureCount = 0;
   const failedItems = [];
 
-  for (const item of queue) {
+  // BP and mood writes are flushed together through /api/batch,
+  // anything else is replayed one request at a time.
+  const batchable = queue.filter(isBatchableItem);
+  const others = queue.filter(item => !isBatchableItem(item));
+
+  for (let i = 0; i < batchable.length; i += BATCH_SYNC_SIZE) {
+    const chunk = batchable.slice(i, i + BATCH_SYNC_SIZE);
+    const result = await syncBatch(chunk);
+    successCount += result.successCount;
+    failureCount += result.failedItems.length;
+    failedItems.push(...result.failedItems);
+  }
+
+  for (const item of others) {
     try {
       const response = await fetch(item.path, {
         method: item.method,
         headers: {
           "Content-Type": "application/json",
-          ...(item.authRequired ? { "X-User-Id": String(getAuth().user_id) } : {})
+          ...(item.authRequired ? authHeaders(getAuth()) : {})
         },
         body: item.body ? JSON.stringify(item.body) : null
       });
@@ -76,6 +163,61 @@ async function syncOfflineQueue() {
   console.log(`Sync complete: ${successCount} success, ${failureCount} failed`);
 }
 
+/**
+ * Revalidate every cached API response so the offline copies include
+ * changes made elsewhere. Unchanged responses come back as cheap 304s.
+ */
+async function refreshOfflineCache() {
+  const paths = Object.keys(getOfflineData()).filter(path => path.startsWith("/api/"));
+  for (const path of paths) {
+    try {
+      await apiRequest(path, { method: "GET" });
+    } catch (e) {
+      console.error("Offline cache refresh failed for:", path, e);
+    }
+  }
+}
+
+/**
+ * Pull server-side changes (readings, mood logs, badge awards) made since
+ * the last pull, e.g. from another device. The first pull only records
+ * the current cursor. When anything changed, the offline cache is
+ * refreshed and "bp:server-changes" is fired so open pages re-render.
+ */
+async function pullServerChanges() {
+  const auth = getAuth();
+  if (!auth || !auth.user_id || !isOnline()) return;
+
+  const cursorKey = `bp_sync_cursor_${auth.user_id}`;
+  let cursor = localStorage.getItem(cursorKey);
+  const changes = { bp: [], mood: [], badges: [] };
+
+  try {
+    let hasMore = true;
+    while (hasMore) {
+      const query = cursor === null ? "" : `?since=${encodeURIComponent(cursor)}`;
+      const res = await fetch(`/api/sync${query}`, { headers: authHeaders(auth) });
+      if (!res.ok) return;
+      const data = await res.json();
+
+      changes.bp.push(...data.bp);
+      changes.mood.push(...data.mood);
+      changes.badges.push(...data.badges);
+      cursor = String(data.cursor);
+      localStorage.setItem(cursorKey, cursor);
+      hasMore = data.has_more;
+    }
+  } catch (e) {
+    console.error("Pull changes error:", e);
+    return;
+  }
+
+  if (changes.bp.length || changes.mood.length || changes.badges.length) {
+    await refreshOfflineCache();
+    window.dispatchEvent(new CustomEvent("bp:server-changes", { detail: changes }));
+  }
+}
+
 /**
  * Listen for online event and sync when connection restored
  */
@@ -84,8 +226,9 @@ window.addEventListener("online", () => {
   showToast("Back online! Syncing your data...", "info");
   
   // Small delay to ensure connection is stable
-  setTimeout(() => {
-    syncOfflineQueue();
+  setTimeout(async () => {
+    await syncOfflineQueue();
+    await pullServerChanges();
   }, 500);
 });
 
@@ -100,9 +243,10 @@ window.addEventListener("offline", () => {
 /**
  * Try to sync on page load if we have queued items
  */
-document.addEventListener("DOMContentLoaded", () => {
+document.addEventListener("DOMContentLoaded", async () => {
   if (isOnline() && getOfflineQueue().length > 0) {
     console.log("Page loaded with offline items. Attempting sync...");
-    syncOfflineQueue();
+    await syncOfflineQueue();
   }
+  await pullServerChanges();
 });
@@ -1,4 +1,4 @@
-const CACHE_NAME = "bp-guardian-v2";
+const CACHE_NAME = "bp-guardian-v3";
 
 const STATIC_ASSETS = [
   "/static/css/styles.css",
@@ -65,6 +65,10 @@ self.addEventListener("fetch", (event) => {
 
   const { request } = event;
 
+  // API responses are revalidated by api.js, which keeps its own offline
+  // copy; serving them cache-first here would hide every later change
+  if (new URL(request.url).pathname.startsWith("/api/")) return;
+
   // For navigation requests (page loads), try network first then cache
   if (request.mode === "navigate") {
     event.respondWith(
@@ -101,7 +105,7 @@ self.addEventListener("fetch", (event) => {
     return;
   }
 
-  // For other GET requests (assets, API calls), use cache-first strategy
+  // For other GET requests (assets), use cache-first strategy
   event.respondWith(
     caches.match(request)
       .then(cached => {
@@ -0,0 +1,124 @@
+"""
+Compare the ORM-hydration and column-projection paths used to build the
+dashboard series.
+
+    python -m benchmarks.dashboard_projection [--sizes 10000 100000] [--repeat 5]
+
+Each size gets a fresh temporary SQLite database with one user whose
+readings are spread over the last year, so range=year returns all rows.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from backend import create_app
+from backend.config import Config
+from backend.db import db
+from backend.models import BPReading, MoodLog, User
+from backend.services.series import (
+    bp_series_rows,
+    mood_series_rows,
+    serialize_bp_point,
+    serialize_mood_point,
+)
+
+
+def seed(n_readings: int, seed_value: int = 42) -> int:
+    rng = random.Random(seed_value)
+    user = User(email="bench@example.com", password_hash="x", name="Bench")
+    db.session.add(user)
+    db.session.commit()
+
+    now = datetime.utcnow()
+    step = timedelta(days=364) / n_readings
+    bp_rows = []
+    mood_rows = []
+    for i in range(n_readings):
+        ts = now - timedelta(days=364) + step * i
+        bp_rows.append({
+            "user_id": user.id,
+            "systolic": rng.randint(100, 160),
+            "diastolic": rng.randint(60, 100),
+            "timestamp": ts,
+        })
+        mood_rows.append({"user_id": user.id, "mood_level": rng.randint(1, 3), "note": None, "timestamp": ts})
+
+    db.session.execute(insert(BPReading), bp_rows)
+    db.session.execute(insert(MoodLog), mood_rows)
+    db.session.commit()
+    return user.id
+
+
+def orm_path(user_id, start_dt):
+    bp_readings = (
+        BPReading.query
+        .filter(BPReading.user_id == user_id, BPReading.timestamp >= start_dt)
+        .order_by(BPReading.timestamp.asc())
+        .all()
+    )
+    mood_logs = (
+        MoodLog.query
+        .filter(MoodLog.user_id == user_id, MoodLog.timestamp >= start_dt)
+        .order_by(MoodLog.timestamp.asc())
+        .all()
+    )
+    bp_series = [{"timestamp": r.timestamp.isoformat(), "systolic": r.systolic, "diastolic": r.diastolic} for r in bp_readings]
+    mood_series = [{"timestamp": m.timestamp.isoformat(), "mood_level": m.mood_level, "note": m.note} for m in mood_logs]
+    return bp_series, mood_series
+
+
+def projection_path(user_id, start_dt):
+    bp_series = [serialize_bp_point(r) for r in bp_series_rows(db.session, user_id, start_dt)]
+    mood_series = [serialize_mood_point(m) for m in mood_series_rows(db.session, user_id, start_dt)]
+    return bp_series, mood_series
+
+
+def time_path(fn, user_id, start_dt, repeat):
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        t0 = time.perf_counter()
+        fn(user_id, start_dt)
+        timings.append(time.perf_counter() - t0)
+    # A dashboard request ends with a fresh session
+    db.session.remove()
+    return statistics.median(timings)
+
+
+def run(sizes, repeat):
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            class BenchConfig(Config):
+                SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tmp, "bench.db")
+
+            app = create_app(BenchConfig)
+            with app.app_context():
+                user_id = seed(n)
+                start_dt = datetime.utcnow() - timedelta(days=365)
+
+                assert orm_path(user_id, start_dt) == projection_path(user_id, start_dt)
+
+                orm = time_path(orm_path, user_id, start_dt, repeat)
+                proj = time_path(projection_path, user_id, start_dt, repeat)
+                print(f"{n:>8} readings  orm={orm * 1000:8.1f} ms  projection={proj * 1000:8.1f} ms  speedup={orm / proj:4.1f}x")
+
+                db.session.remove()
+                db.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Deterministic synthetic BP / mood histories.
+
+    generate(db.session, users=100, days=365, readings_per_day=3, seed=42)
+
+Every user gets a personal baseline blood pressure, then for each day
+(ending today, so dashboard windows are populated):
+  - the day is skipped with probability `gap_probability`, and a gap may
+    continue for several days (missed logging streaks)
+  - a mood log (level 1-3) is written with probability `mood_probability`
+  - `readings_per_day` BP readings are spread over the waking hours, with
+    systolic raised by up to 2 * `stress_mmhg` * `stress_correlation` on
+    high-stress days
+
+The same arguments and seed always produce the same rows (relative to
+today's date). Rows are bulk inserted in batches, then daily rollups are
+rebuilt.
+"""
+import random
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, update
+
+from backend.models import BPReading, MoodLog, User
+from backend.services.rollups import rebuild_daily_rollups
+
+
+INSERT_BATCH_SIZE = 50_000
+
+# Named dataset sizes; total BP rows are roughly users * days * readings_per_day
+SCALES = {
+    "1k": {"users": 5, "days": 100, "readings_per_day": 2},
+    "100k": {"users": 100, "days": 365, "readings_per_day": 3},
+    "10m": {"users": 2000, "days": 1825, "readings_per_day": 3},
+}
+
+
+def _user_history(rng, user_id, today, days, readings_per_day, gap_probability,
+                  mood_probability, stress_correlation, stress_mmhg):
+    base_sys = rng.gauss(125, 12)
+    base_dia = rng.gauss(80, 8)
+    gap_left = 0
+
+    for offset in range(days - 1, -1, -1):
+        day = today - timedelta(days=offset)
+        if gap_left:
+            gap_left -= 1
+            continue
+        if rng.random() < gap_probability:
+            gap_left = rng.choice((0, 0, 0, 1, 2, 4))
+            continue
+
+        day_start = datetime.combine(day, datetime.min.time())
+        mood_level = None
+        if rng.random() < mood_probability:
+            mood_level = rng.choice((1, 2, 2, 3, 3))
+            yield "mood", {
+                "user_id": user_id,
+                "mood_level": mood_level,
+                "note": None,
+                "timestamp": day_start + timedelta(hours=rng.uniform(7, 22)),
+            }
+
+        stress = (2 - mood_level) * stress_mmhg * stress_correlation if mood_level else 0.0
+        for i in range(readings_per_day):
+            hour = 7 + (15 * (i + rng.random())) / readings_per_day
+            yield "bp", {
+                "user_id": user_id,
+                "systolic": max(70, int(rng.gauss(base_sys + stress, 8))),
+                "diastolic": max(40, int(rng.gauss(base_dia + stress / 2, 5))),
+                "timestamp": day_start + timedelta(hours=hour),
+            }
+
+
+def generate(db_session, users, days, readings_per_day, gap_probability=0.1, mood_probability=0.8,
+             stress_correlation=0.5, stress_mmhg=8, seed=42, today=None):
+    """
+    Create `users` users with synthetic histories. Commits.
+    Returns {"user_ids", "bp_rows", "mood_rows"}.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+
+    user_rows = [
+        {"email": f"bench{seed}-{i}@example.com", "password_hash": "x", "name": f"Bench {i}"}
+        for i in range(users)
+    ]
+    user_ids = db_session.execute(
+        insert(User).returning(User.id, sort_by_parameter_order=True), user_rows
+    ).scalars().all()
+
+    batches = {"bp": [], "mood": []}
+    models = {"bp": BPReading, "mood": MoodLog}
+    totals = {"bp": 0, "mood": 0}
+
+    def flush(kind):
+        if batches[kind]:
+            db_session.execute(insert(models[kind]), batches[kind])
+            totals[kind] += len(batches[kind])
+            batches[kind] = []
+
+    for user_id in user_ids:
+        for kind, row in _user_history(rng, user_id, today, days, readings_per_day, gap_probability,
+                                       mood_probability, stress_correlation, stress_mmhg):
+            batches[kind].append(row)
+            if len(batches[kind]) >= INSERT_BATCH_SIZE:
+                flush(kind)
+    flush("bp")
+    flush("mood")
+
+    rebuild_daily_rollups(db_session)
+    db_session.execute(
+        update(User).where(User.id.in_(user_ids)).values(data_updated_at=datetime.utcnow())
+    )
+    db_session.commit()
+    return {"user_ids": list(user_ids), "bp_rows": totals["bp"], "mood_rows": totals["mood"]}
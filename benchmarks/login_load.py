@@ -0,0 +1,111 @@
+"""
+Latency of a cheap endpoint (/ping) while many clients log in at once,
+with password hashing inline on the request thread versus on the
+bounded hashing executor.
+
+    python -m benchmarks.login_load [--logins 200] [--login-threads 16] [--workers 2]
+
+Each mode serves the app from a threaded werkzeug server on a free local
+port; login clients and a /ping prober run concurrently against it.
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from werkzeug.serving import make_server
+
+from backend import create_app
+from backend.config import Config
+
+
+def _post_json(url, body):
+    req = urllib.request.Request(url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_mode(label, hash_workers, logins, login_threads):
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tmp, "bench.db")
+            PASSWORD_HASH_WORKERS = hash_workers
+            PASSWORD_HASH_MAX_PENDING = logins
+
+        app = create_app(BenchConfig)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        base = f"http://127.0.0.1:{server.server_port}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        _post_json(base + "/api/auth/register", {"email": "bench@example.com", "password": "pw"})
+
+        remaining = iter(range(logins))
+        lock = threading.Lock()
+        statuses = []
+
+        def login_client():
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                status = _post_json(base + "/api/auth/login", {"email": "bench@example.com", "password": "pw"})
+                with lock:
+                    statuses.append(status)
+
+        ping_latencies = []
+        done = threading.Event()
+
+        def prober():
+            while not done.is_set():
+                t0 = time.perf_counter()
+                with urllib.request.urlopen(base + "/ping") as resp:
+                    resp.read()
+                ping_latencies.append(time.perf_counter() - t0)
+
+        probe = threading.Thread(target=prober)
+        clients = [threading.Thread(target=login_client) for _ in range(login_threads)]
+        started = time.perf_counter()
+        probe.start()
+        for t in clients:
+            t.start()
+        for t in clients:
+            t.join()
+        seconds = time.perf_counter() - started
+        done.set()
+        probe.join()
+        server.shutdown()
+
+        ok = sum(1 for s in statuses if s == 200)
+        print(
+            f"{label:<10} logins/s={ok / seconds:7.1f}  ok={ok}/{len(statuses)}  "
+            f"ping p50={_percentile(ping_latencies, 50) * 1000:6.1f} ms  "
+            f"p99={_percentile(ping_latencies, 99) * 1000:6.1f} ms  (n={len(ping_latencies)})"
+        )
+
+
+def main():
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-threads", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=2, help="hashing executor size")
+    args = parser.parse_args()
+    run_mode("inline", 0, args.logins, args.login_threads)
+    run_mode("executor", args.workers, args.logins, args.login_threads)
+
+
+if __name__ == "__main__":
+    main()
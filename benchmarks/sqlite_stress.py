@@ -0,0 +1,133 @@
+"""
+Concurrent read/write stress run against each SQLite profile.
+
+    python -m benchmarks.sqlite_stress [--writers 2] [--readers 4]
+        [--long-readers 1] [--read-hold 6] [--seconds 15]
+
+Writer processes POST /api/bp and reader processes GET /api/bp for a
+fixed duration, each with its own app instance on one shared database
+file (like separate gunicorn workers). Long-reader processes meanwhile
+hold a read transaction open over the readings table for --read-hold
+seconds at a time, the way a report or export does. With the rollback
+journal that shared lock keeps writers from committing; once it outlasts
+the sqlite3 module's 5 s lock wait their requests fail with "database is
+locked". Under WAL readers never block the writer.
+
+Reports successful operations per second and failed requests per
+profile, with the number of failures that were "database is locked".
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from backend import create_app
+from backend.config import Config
+from backend.db import db
+from backend.models import BPReading, User
+from backend.sqlite_profile import SQLITE_PROFILES
+
+
+def _make_app(db_path, profile):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + db_path
+        SQLITE_PROFILE = profile
+        RESPONSE_CACHE_BACKEND = "none"
+        # Raise instead of returning a bare 500 so lock errors can be told apart
+        PROPAGATE_EXCEPTIONS = True
+
+    return create_app(BenchConfig)
+
+
+def _long_read(app, user_id, hold):
+    with app.app_context(), db.engine.connect() as conn:
+        # pysqlite only opens a transaction for writes; begin explicitly so
+        # the read lock (or WAL snapshot) is held until the rollback
+        conn.exec_driver_sql("BEGIN")
+        conn.execute(select(BPReading.systolic, BPReading.diastolic).where(BPReading.user_id == user_id)).all()
+        time.sleep(hold)
+        conn.rollback()
+
+
+def _worker(kind, db_path, profile, user_id, deadline, hold):
+    # Failed requests are counted, not logged
+    logging.disable(logging.CRITICAL)
+    app = _make_app(db_path, profile)
+    client = app.test_client()
+    headers = {"X-User-Id": str(user_id)}
+    ok = errors = locked = 0
+    while time.time() < deadline:
+        try:
+            if kind == "write":
+                resp = client.post("/api/bp", json={"systolic": 120, "diastolic": 80}, headers=headers)
+            elif kind == "read":
+                resp = client.get("/api/bp?limit=20", headers=headers)
+            else:
+                _long_read(app, user_id, hold)
+                resp = None
+        except OperationalError as e:
+            errors += 1
+            locked += "database is locked" in str(e)
+            continue
+        if resp is None or resp.status_code < 400:
+            ok += 1
+        else:
+            errors += 1
+    return kind, ok, errors, locked
+
+
+def run_profile(profile, writers, readers, long_readers, hold, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        app = _make_app(db_path, profile)
+        with app.app_context():
+            user = User(email="bench@example.com", password_hash="x")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            db.engine.dispose()
+
+        # Leave time for every worker to start before the clock runs
+        deadline = time.time() + 2 + seconds
+        kinds = ["write"] * writers + ["read"] * readers + ["long_read"] * long_readers
+        ok = dict.fromkeys(("write", "read", "long_read"), 0)
+        errors = dict.fromkeys(("write", "read", "long_read"), 0)
+        locked = 0
+        with ProcessPoolExecutor(max_workers=len(kinds)) as pool:
+            futures = [pool.submit(_worker, kind, db_path, profile, user_id, deadline, hold) for kind in kinds]
+            for future in futures:
+                kind, kind_ok, kind_errors, kind_locked = future.result()
+                ok[kind] += kind_ok
+                errors[kind] += kind_errors
+                locked += kind_locked
+
+        print(
+            f"{profile:<11} writes/s={ok['write'] / seconds:8.1f}  "
+            f"reads/s={ok['read'] / seconds:8.1f}  long reads={ok['long_read']:3d}  "
+            f"errors: write={errors['write']} read={errors['read']} long_read={errors['long_read']} "
+            f"(database is locked: {locked})"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--long-readers", type=int, default=1)
+    parser.add_argument("--read-hold", type=float, default=6.0,
+                        help="seconds each long read keeps its transaction open")
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--profiles", nargs="+", default=list(SQLITE_PROFILES))
+    args = parser.parse_args()
+
+    for profile in args.profiles:
+        run_profile(profile, args.writers, args.readers, args.long_readers, args.read_hold, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Timed scenarios over synthetic datasets, with JSON results.
+
+    python -m benchmarks.suite [--scales 1k 100k] [--repeat 5] [--output results.json]
+    python -m benchmarks.suite --compare old.json new.json
+
+For each scale in benchmarks.datagen.SCALES a fresh temporary SQLite
+database is generated (same seed, so the same data on every run) and
+these scenarios are timed for a fixed sample of users:
+
+  - dashboard_week / dashboard_month / dashboard_year: GET /api/dashboard
+  - get_daily_recommendation
+  - evaluate_and_award_badges (the user's awards are cleared first)
+  - post_bp / post_mood: POST /api/bp and /api/mood
+
+The response cache is disabled so every request does the full work.
+Results (per-scenario median/p95/mean in ms plus dataset and environment
+details, including the git commit) are printed and, with --output,
+written as JSON; --compare prints the ratio between two result files.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime
+
+from sqlalchemy import delete
+
+from backend import create_app
+from backend.config import Config
+from backend.db import db
+from backend.models import UserBadge
+from backend.services.badges import evaluate_and_award_badges
+from backend.services.rules_engine import get_daily_recommendation
+
+from .datagen import SCALES, generate
+
+
+SAMPLE_USERS = 10
+
+
+def _summary(timings):
+    timings = sorted(timings)
+    return {
+        "samples": len(timings),
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "min_ms": round(timings[0] * 1000, 3),
+    }
+
+
+def _time(fn, user_ids, repeat, setup=None):
+    timings = []
+    for _ in range(repeat):
+        for user_id in user_ids:
+            if setup:
+                setup(user_id)
+            t0 = time.perf_counter()
+            fn(user_id)
+            timings.append(time.perf_counter() - t0)
+            db.session.remove()
+    return _summary(timings)
+
+
+def _scenarios(app, client):
+    def get(path):
+        def run(user_id):
+            resp = client.get(path, headers={"X-User-Id": str(user_id)})
+            assert resp.status_code == 200, resp.status_code
+        return run
+
+    def post(path, body):
+        def run(user_id):
+            resp = client.post(path, json=body, headers={"X-User-Id": str(user_id)})
+            assert resp.status_code == 201, resp.status_code
+        return run
+
+    def clear_badges(user_id):
+        db.session.execute(delete(UserBadge).where(UserBadge.user_id == user_id))
+        db.session.commit()
+
+    today = date.today()
+    # Writes go last so the read scenarios see the generated data only
+    return [
+        ("dashboard_week", get("/api/dashboard?range=week"), None),
+        ("dashboard_month", get("/api/dashboard?range=month"), None),
+        ("dashboard_year", get("/api/dashboard?range=year"), None),
+        ("get_daily_recommendation", lambda user_id: get_daily_recommendation(db.session, today, user_id), None),
+        ("evaluate_and_award_badges", lambda user_id: evaluate_and_award_badges(db.session, today, user_id), clear_badges),
+        ("post_bp", post("/api/bp", {"systolic": 128, "diastolic": 84}), None),
+        ("post_mood", post("/api/mood", {"mood_level": 2}), None),
+    ]
+
+
+def run_scale(scale, repeat, seed):
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tmp, "bench.db")
+            RESPONSE_CACHE_BACKEND = "none"
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            t0 = time.perf_counter()
+            dataset = generate(db.session, seed=seed, **SCALES[scale])
+            generate_seconds = time.perf_counter() - t0
+
+            rng = random.Random(seed)
+            sample = sorted(rng.sample(dataset["user_ids"], min(SAMPLE_USERS, len(dataset["user_ids"]))))
+
+            client = app.test_client()
+            scenarios = {}
+            for name, fn, setup in _scenarios(app, client):
+                scenarios[name] = _time(fn, sample, repeat, setup)
+                print(f"  {scale:>5} {name:<26} median={scenarios[name]['median_ms']:9.2f} ms  "
+                      f"p95={scenarios[name]['p95_ms']:9.2f} ms")
+
+            db.session.remove()
+            db.engine.dispose()
+
+    return {
+        "dataset": {**SCALES[scale], "seed": seed, "bp_rows": dataset["bp_rows"], "mood_rows": dataset["mood_rows"]},
+        "generate_seconds": round(generate_seconds, 2),
+        "scenarios": scenarios,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales, repeat, seed):
+    results = {
+        "commit": _git_commit(),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "sample_users": SAMPLE_USERS,
+        "scales": {},
+    }
+    for scale in scales:
+        print(f"Scale {scale}: generating...")
+        results["scales"][scale] = run_scale(scale, repeat, seed)
+    return results
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old.get('commit')} -> {new.get('commit')} (median ms, ratio > 1 is slower)")
+    for scale, new_scale in new["scales"].items():
+        old_scale = old["scales"].get(scale)
+        if not old_scale:
+            continue
+        for name, stats in new_scale["scenarios"].items():
+            before = old_scale["scenarios"].get(name)
+            if not before:
+                continue
+            ratio = stats["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+            print(f"  {scale:>5} {name:<26} {before['median_ms']:9.2f} -> {stats['median_ms']:9.2f}  x{ratio:5.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["1k", "100k"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results JSON to this path.")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files.")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = run(args.scales, args.repeat, args.seed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import pytest
+
+from backend import create_app
+from backend.config import Config
+from backend.db import db
+from backend.models import User
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(tmp_path / "test.db")
+
+    app = create_app(TestConfig)
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user_id(app):
+    with app.app_context():
+        user = User(email="patient@example.com", password_hash="x", name="Patient")
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def auth_headers(user_id):
+    return {"X-User-Id": str(user_id)}
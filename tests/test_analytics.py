@@ -0,0 +1,130 @@
+import random
+from datetime import datetime, timedelta, date
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services.rules_engine import (
+    compute_bp_stats,
+    compute_bp_trend,
+    compute_bp_trend_slope,
+    compute_stress_impact,
+    compute_weekly_mood,
+    summarize_logging,
+    get_daily_recommendation,
+)
+
+
+# Pure-Python reference implementations (pre-vectorization behaviour; the
+# trend is the least-squares slope of daily averages)
+
+def ref_stats(readings):
+    sys_ = [r.systolic for r in readings]
+    dia = [r.diastolic for r in readings]
+    return {
+        "avg_sys": sum(sys_) / len(sys_), "avg_dia": sum(dia) / len(dia),
+        "max_sys": max(sys_), "max_dia": max(dia), "min_sys": min(sys_), "min_dia": min(dia),
+    }
+
+
+def ref_trend(readings):
+    by_day = {}
+    for r in readings:
+        by_day.setdefault(r.timestamp.date(), []).append(r.systolic)
+    if len(by_day) < 2:
+        return "unknown"
+    first = min(by_day)
+    xs = [(d - first).days for d in sorted(by_day)]
+    ys = [sum(by_day[d]) / len(by_day[d]) for d in sorted(by_day)]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    slope = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sum((x - mx) ** 2 for x in xs)
+    projected = slope * 7 / 2
+    return "worsening" if projected >= 5 else "improving" if projected <= -5 else "stable"
+
+
+def ref_stress(readings, moods):
+    if not readings or not moods:
+        return "unclear"
+    bp, md = {}, {}
+    for r in readings:
+        bp.setdefault(r.timestamp.date(), []).append(r.systolic)
+    for m in moods:
+        md.setdefault(m.timestamp.date(), []).append(m.mood_level)
+    common = [d for d in sorted(bp) if d in md]
+    if len(common) < 3:
+        return "unclear"
+    stressed, calm = [], []
+    for d in common:
+        avg_sys, avg_mood = sum(bp[d]) / len(bp[d]), sum(md[d]) / len(md[d])
+        if avg_mood < 2.0:
+            stressed.append(avg_sys)
+        elif avg_mood >= 2.5:
+            calm.append(avg_sys)
+    if not stressed or not calm:
+        return "unclear"
+    diff = sum(stressed) / len(stressed) - sum(calm) / len(calm)
+    return "likely" if diff >= 5 else "possible" if diff >= 2 else "unclear"
+
+
+def _random_window(rng, n_bp, n_mood, start):
+    def ts():
+        return start + timedelta(minutes=rng.randint(0, 7 * 24 * 60))
+    readings = [SimpleNamespace(timestamp=ts(), systolic=rng.randint(95, 170), diastolic=rng.randint(55, 105))
+                for _ in range(n_bp)]
+    moods = [SimpleNamespace(timestamp=ts(), mood_level=rng.randint(1, 3)) for _ in range(n_mood)]
+    return readings, moods
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_wrappers_match_reference(seed):
+    rng = random.Random(seed)
+    start = datetime(2026, 5, 1)
+    readings, moods = _random_window(rng, rng.randint(1, 40), rng.randint(0, 30), start)
+
+    assert compute_bp_stats(readings) == ref_stats(readings)
+    assert compute_bp_trend(readings) == ref_trend(readings)
+    assert compute_stress_impact(readings, moods) == ref_stress(readings, moods)
+    assert summarize_logging(readings, start, start + timedelta(days=7)) == summarize_logging(
+        list(reversed(readings)), start, start + timedelta(days=7))
+
+    mood = compute_weekly_mood(moods)
+    if moods:
+        assert mood["avg_mood"] == sum(m.mood_level for m in moods) / len(moods)
+    else:
+        assert mood == {"avg_mood": None, "mood_category": "no_data"}
+
+
+def test_trend_slope_is_least_squares():
+    start = datetime(2026, 5, 1)
+    readings = [SimpleNamespace(timestamp=start + timedelta(days=i), systolic=120 + 2 * i, diastolic=80)
+                for i in range(7)]
+    assert compute_bp_trend_slope(readings) == pytest.approx(2.0)
+    assert compute_bp_trend_slope(readings[:1]) is None
+    assert compute_bp_trend(readings) == "worsening"  # +7 mmHg over half a week
+
+    # Daily averages, not single readings: one spiky day does not tip it
+    readings = [SimpleNamespace(timestamp=start + timedelta(days=i, hours=h), systolic=s, diastolic=80)
+                for i in range(7) for h, s in ((8, 120), (20, 124))]
+    readings.append(SimpleNamespace(timestamp=start + timedelta(days=6, hours=21), systolic=150, diastolic=80))
+    assert compute_bp_trend(readings) == "stable"
+    assert compute_bp_trend(readings[-3:]) == "unknown"  # a single day
+
+
+def test_daily_recommendation_from_db(app, client, auth_headers, user_id):
+    today = date.today()
+    base = datetime.combine(today, datetime.min.time()) + timedelta(hours=8)
+    client.post("/api/batch", headers=auth_headers, json={
+        "bp": [{"systolic": 125 + 3 * i, "diastolic": 78, "timestamp": (base - timedelta(days=i)).isoformat()}
+               for i in range(5)],
+        "mood": [{"mood_level": 3, "timestamp": (base - timedelta(days=i)).isoformat()} for i in range(5)],
+    })
+
+    with app.app_context():
+        from backend.db import db
+        result = get_daily_recommendation(db.session, today, user_id)
+
+    assert result["latest_bp"] == {"systolic": 125, "diastolic": 78, "timestamp": base.isoformat()}
+    assert result["bp_status"] == "stage1"  # avg 131/78
+    assert result["bp_trend"] == "improving"
+    assert result["mood_status"] == "calm"
+    assert result["logging_status"] == "consistent"
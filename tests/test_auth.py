@@ -0,0 +1,59 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from backend.db import db
+from backend.models import User
+
+
+@pytest.fixture
+def app(app):
+    app.config["EXPOSE_QUERY_COUNT"] = True
+    return app
+
+
+def _queries(resp):
+    return int(resp.headers["X-Query-Count"])
+
+
+def test_repeat_requests_skip_user_lookup(app, client, auth_headers):
+    first = client.get("/api/bp", headers=auth_headers)
+    second = client.get("/api/bp", headers=auth_headers)
+    assert first.status_code == second.status_code == 200
+    assert _queries(first) - _queries(second) == 1
+
+
+def test_deleted_user_is_rejected(app, client, auth_headers, user_id):
+    assert client.get("/api/bp", headers=auth_headers).status_code == 200
+
+    with app.app_context():
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+
+    assert client.get("/api/bp", headers=auth_headers).status_code == 401
+
+
+def test_login_token_authenticates_without_database(app, client):
+    client.post("/api/auth/register", json={"email": "a@example.com", "password": "pw"})
+    login = client.post("/api/auth/login", json={"email": "a@example.com", "password": "pw"}).get_json()
+    token_headers = {"Authorization": f"Bearer {login['token']}"}
+
+    resp = client.get("/api/bp", headers=token_headers)
+    assert resp.status_code == 200
+    # Only the readings query; no users lookup even on the first request
+    assert _queries(resp) == 1
+
+    uncached = client.get("/api/bp", headers={"X-User-Id": str(login["user_id"])})
+    assert _queries(uncached) == 2
+
+
+def test_tampered_or_expired_token_rejected(app, client):
+    with app.app_context():
+        user = User(email="b@example.com", password_hash=generate_password_hash("pw"))
+        db.session.add(user)
+        db.session.commit()
+    token = client.post("/api/auth/login", json={"email": "b@example.com", "password": "pw"}).get_json()["token"]
+
+    assert client.get("/api/bp", headers={"Authorization": f"Bearer {token}x"}).status_code == 401
+
+    app.config["SESSION_TOKEN_MAX_AGE"] = -1
+    assert client.get("/api/bp", headers={"Authorization": f"Bearer {token}"}).status_code == 401
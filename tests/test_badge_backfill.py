@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from backend.db import db
+from backend.models import BPReading, ChangeLog, MoodLog, User, UserBadge
+from backend.services.badge_backfill import backfill_badges, sweep_user_timeline
+
+
+def test_sweep_finds_true_earned_at():
+    start = datetime(2025, 1, 1, 8, 0)
+    events = [(start + timedelta(days=d), "bp") for d in range(10)]
+    # Gap, then a mood streak
+    events += [(start + timedelta(days=40 + d, hours=1), "mood") for d in range(5)]
+
+    earned = sweep_user_timeline(events)
+
+    assert earned["FIRST_BP_READING"] == start
+    assert earned["WEEKLY_BP_CONSISTENT_7"] == start + timedelta(days=6)
+    assert earned["WEEKLY_MOOD_AWARE"] == start + timedelta(days=44, hours=1)
+    assert "MONTHLY_BP_CONSISTENT_20" not in earned
+
+
+def test_sliding_window_drops_old_days():
+    start = datetime(2025, 1, 1, 8, 0)
+    # 19 days, a 15-day gap, then 19 more: never 20 days inside 30
+    days = list(range(19)) + list(range(34, 53))
+    earned = sweep_user_timeline([(start + timedelta(days=d), "bp") for d in days])
+    assert "MONTHLY_BP_CONSISTENT_20" not in earned
+
+    earned = sweep_user_timeline([(start + timedelta(days=d), "bp") for d in range(20)])
+    assert earned["MONTHLY_BP_CONSISTENT_20"] == start + timedelta(days=19)
+
+
+def test_backfill_command_writes_history(app, user_id):
+    start = datetime(2025, 3, 1, 7, 30)
+    with app.app_context():
+        other = User(email="other@example.com", password_hash="x")
+        db.session.add(other)
+        db.session.flush()
+        db.session.execute(insert(BPReading), [
+            {"user_id": uid, "systolic": 120, "diastolic": 80, "timestamp": start + timedelta(days=d)}
+            for uid in (user_id, other.id) for d in range(7)
+        ])
+        db.session.execute(insert(MoodLog), [
+            {"user_id": other.id, "mood_level": 2, "timestamp": start + timedelta(days=d)} for d in range(5)
+        ])
+        # An award recorded later (when the user looked) gets corrected
+        db.session.execute(insert(UserBadge), [{"user_id": user_id, "badge_id": 1, "earned_at": datetime(2026, 1, 1)}])
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["backfill-badges"])
+    assert "Processed 2 users" in result.output
+    assert "users/s" in result.output
+
+    with app.app_context():
+        rows = db.session.query(UserBadge).filter_by(user_id=user_id).order_by(UserBadge.badge_id).all()
+        assert [(r.badge_id, r.earned_at) for r in rows] == [
+            (1, start),
+            (2, start + timedelta(days=6)),
+        ]
+
+        other_id = db.session.query(User.id).filter_by(email="other@example.com").scalar()
+        assert db.session.query(UserBadge).filter_by(user_id=other_id).count() == 3
+
+
+def test_backfill_with_worker_processes(app, user_id):
+    start = datetime(2025, 3, 1, 7, 30)
+    with app.app_context():
+        db.session.execute(insert(BPReading), [
+            {"user_id": user_id, "systolic": 120, "diastolic": 80, "timestamp": start}
+        ])
+        db.session.commit()
+        stats = backfill_badges(db.session, app.config["SQLALCHEMY_DATABASE_URI"], workers=2, chunk_size=1)
+        assert stats["users"] == 1
+        assert stats["awards"] == 1
+
+
+def test_rerun_without_new_awards_writes_nothing(app, user_id):
+    start = datetime(2025, 3, 1, 7, 30)
+    with app.app_context():
+        db.session.execute(insert(BPReading), [
+            {"user_id": user_id, "systolic": 120, "diastolic": 80, "timestamp": start + timedelta(days=d)}
+            for d in range(7)
+        ])
+        db.session.commit()
+        uri = app.config["SQLALCHEMY_DATABASE_URI"]
+
+        assert backfill_badges(db.session, uri)["awards"] == 2
+        changes = db.session.query(ChangeLog).count()
+        stamp = db.session.get(User, user_id).data_updated_at
+
+        again = backfill_badges(db.session, uri)
+        assert again["awards"] == 0 and again["awarded_user_ids"] == []
+        assert db.session.query(ChangeLog).count() == changes
+        db.session.expire_all()
+        assert db.session.get(User, user_id).data_updated_at == stamp
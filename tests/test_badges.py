@@ -0,0 +1,95 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event
+
+from backend.db import db
+from backend.services import badges
+from backend.services.badges import BP_INSERT, MOOD_INSERT, evaluate_and_award_badges, rules_for_events
+
+
+def _log_days(client, headers, kind, days_ago):
+    today = datetime.combine(date.today(), datetime.min.time()) + timedelta(hours=9)
+    if kind == "bp":
+        items = {"bp": [{"systolic": 120, "diastolic": 80, "timestamp": (today - timedelta(days=d)).isoformat()}
+                        for d in days_ago]}
+    else:
+        items = {"mood": [{"mood_level": 2, "timestamp": (today - timedelta(days=d)).isoformat()}
+                          for d in days_ago]}
+    return client.post("/api/batch", headers=headers, json=items).get_json()
+
+
+def _count_queries(app, fn):
+    statements = []
+    listener = lambda conn, cursor, stmt, *a: statements.append(stmt)  # noqa: E731
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            fn()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+    return statements
+
+
+def test_rules_declare_their_events():
+    assert {r["code"] for r in rules_for_events([MOOD_INSERT])} == {"WEEKLY_MOOD_AWARE"}
+    assert "WEEKLY_MOOD_AWARE" not in {r["code"] for r in rules_for_events([BP_INSERT])}
+
+
+def test_badges_awarded_at_write_time(client, auth_headers):
+    first = _log_days(client, auth_headers, "bp", range(6))
+    assert first["new_badges"] == ["FIRST_BP_READING"]
+
+    second = _log_days(client, auth_headers, "bp", [6])
+    assert second["new_badges"] == ["WEEKLY_BP_CONSISTENT_7"]
+
+    moods = _log_days(client, auth_headers, "mood", range(5))
+    assert moods["new_badges"] == ["WEEKLY_MOOD_AWARE"]
+
+    body = client.get("/api/badges", headers=auth_headers).get_json()
+    earned = {b["code"] for b in body["badges"] if b["earned"]}
+    assert earned == {"FIRST_BP_READING", "WEEKLY_BP_CONSISTENT_7", "WEEKLY_MOOD_AWARE"}
+    assert sorted(body["newly_awarded"]) == sorted(earned)
+
+
+def test_single_post_reports_new_badges(client, auth_headers):
+    resp = client.post("/api/bp", headers=auth_headers, json={"systolic": 120, "diastolic": 80})
+    assert resp.get_json()["new_badges"] == ["FIRST_BP_READING"]
+    resp = client.post("/api/bp", headers=auth_headers, json={"systolic": 121, "diastolic": 80})
+    assert resp.get_json()["new_badges"] == []
+
+
+def test_badges_endpoint_is_a_pure_read(app, client, auth_headers):
+    _log_days(client, auth_headers, "bp", range(3))
+    app.extensions["response_cache"].backend = None  # measure the uncached path
+
+    statements = _count_queries(app, lambda: client.get("/api/badges", headers=auth_headers))
+    badge_queries = [s for s in statements if "users" not in s.split("FROM")[-1]]
+    assert len(badge_queries) == 1
+    assert "user_badges" in badge_queries[0]
+    assert not any(s.lstrip().upper().startswith("INSERT") for s in statements)
+
+
+def test_full_evaluation_uses_fixed_query_count(app, client, auth_headers, user_id, monkeypatch):
+    with app.app_context():
+        db.session.execute(db.text(
+            "INSERT INTO bp_readings (user_id, systolic, diastolic, timestamp) VALUES (:u, 120, 80, :ts)"
+        ), {"u": user_id, "ts": datetime.utcnow()})
+        db.session.commit()
+
+    def run():
+        evaluate_and_award_badges(db.session, date.today(), user_id)
+
+    baseline = len(_count_queries(app, run))
+
+    extra = [
+        {"code": f"BP_{n}_DAYS", "name": f"BP {n}", "description": None,
+         "events": (BP_INSERT,), "source": "bp", "window_days": 30, "min_days": n}
+        for n in range(1, 11)
+    ]
+    monkeypatch.setattr(badges, "BADGE_DEFINITIONS", badges.BADGE_DEFINITIONS + extra)
+    badges._catalog_cache.clear()
+    with app.app_context():
+        badges.get_badge_catalog(db.session)
+
+    # earned lookup, distinct days, award insert, change_log insert
+    assert len(_count_queries(app, run)) <= baseline <= 4
@@ -0,0 +1,86 @@
+import pytest
+
+from backend.db import db
+from backend.models import BPReading, MoodLog
+
+
+def test_batch_inserts_valid_items_and_reports_rejections(app, client, auth_headers):
+    resp = client.post("/api/batch", headers=auth_headers, json={
+        "bp": [
+            {"systolic": 120, "diastolic": 80, "timestamp": "2026-01-01T08:00:00"},
+            {"systolic": "abc", "diastolic": 80},
+            {"systolic": 135, "diastolic": 85},
+        ],
+        "mood": [
+            {"mood_level": 2, "note": "ok"},
+            {"mood_level": 7},
+        ],
+    })
+
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["inserted"] == 3
+    assert body["rejected"] == 2
+    assert [r["status"] for r in body["bp"]] == [201, 400, 201]
+    assert [r["status"] for r in body["mood"]] == [201, 400]
+    assert body["bp"][0]["data"]["timestamp"] == "2026-01-01T08:00:00"
+    assert body["bp"][1]["error"] == "systolic and diastolic must be integers"
+    assert body["mood"][1]["error"] == "mood_level must be 1, 2, or 3"
+
+    with app.app_context():
+        assert db.session.query(BPReading).count() == 2
+        assert db.session.query(MoodLog).count() == 1
+        ids = [r["data"]["id"] for r in body["bp"] if r["status"] == 201]
+        stored = {r.id: r.systolic for r in db.session.query(BPReading).all()}
+        assert [stored[i] for i in ids] == [120, 135]
+
+
+def test_batch_rejects_oversized_payload(app, client, auth_headers):
+    app.config["BATCH_MAX_ITEMS"] = 2
+    resp = client.post("/api/batch", headers=auth_headers, json={
+        "bp": [{"systolic": 120, "diastolic": 80}] * 3,
+    })
+    assert resp.status_code == 413
+
+
+@pytest.mark.parametrize("body", [[{"systolic": 120, "diastolic": 80}], "bp", 3])
+def test_batch_rejects_non_object_body(client, auth_headers, body):
+    resp = client.post("/api/batch", headers=auth_headers, json=body)
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "body must be a JSON object"
+
+
+def test_single_post_still_validates(client, auth_headers):
+    resp = client.post("/api/bp", headers=auth_headers, json={"systolic": 0, "diastolic": 80})
+    assert resp.status_code == 400
+
+    resp = client.post("/api/mood", headers=auth_headers, json={"mood_level": 3, "note": "calm"})
+    assert resp.status_code == 201
+    assert resp.get_json()["note"] == "calm"
+
+
+def test_offset_timestamps_are_stored_and_returned_as_utc(app, client, auth_headers):
+    single = client.post("/api/bp", headers=auth_headers, json={
+        "systolic": 120, "diastolic": 80, "timestamp": "2026-01-01T08:00:00+02:00",
+    })
+    batch = client.post("/api/batch", headers=auth_headers, json={
+        "bp": [{"systolic": 130, "diastolic": 85, "timestamp": "2026-01-01T01:30:00-05:00"}],
+        "mood": [{"mood_level": 2, "timestamp": "2026-01-01T08:00:00+02:00"}],
+    })
+
+    assert single.status_code == 201
+    assert single.get_json()["timestamp"] == "2026-01-01T06:00:00"
+    body = batch.get_json()
+    assert body["bp"][0]["data"]["timestamp"] == "2026-01-01T06:30:00"
+    assert body["mood"][0]["data"]["timestamp"] == "2026-01-01T06:00:00"
+
+    listed = client.get("/api/bp", headers=auth_headers).get_json()
+    assert [r["timestamp"] for r in listed] == ["2026-01-01T06:30:00", "2026-01-01T06:00:00"]
+    # Range bounds with an offset are compared in UTC too
+    after = client.get("/api/bp?from=2026-01-01T08:15:00%2B02:00", headers=auth_headers).get_json()
+    assert [r["systolic"] for r in after] == [130]
+
+    with app.app_context():
+        stored = sorted(r.timestamp.isoformat() for r in db.session.query(BPReading).all())
+        assert stored == ["2026-01-01T06:00:00", "2026-01-01T06:30:00"]
+        assert db.session.query(MoodLog).one().timestamp.isoformat() == "2026-01-01T06:00:00"
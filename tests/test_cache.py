@@ -0,0 +1,104 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from backend import create_app
+from backend.db import db
+from backend.services.cache import DiskCacheBackend, MemoryCacheBackend, ResponseCache
+
+
+@contextmanager
+def capture_sql(app):
+    statements = []
+
+    def before(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+
+
+def test_repeat_dashboard_load_skips_reading_tables(app, client, auth_headers):
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 122, "diastolic": 81})
+    first = client.get("/api/dashboard?range=month", headers=auth_headers)
+
+    with capture_sql(app) as statements:
+        second = client.get("/api/dashboard?range=month", headers=auth_headers)
+
+    assert second.get_json() == first.get_json()
+    assert not any("bp_readings" in s or "mood_logs" in s or "daily_rollups" in s for s in statements)
+
+    stats = app.extensions["response_cache"].stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_write_invalidates_cached_responses(client, auth_headers):
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 122, "diastolic": 81})
+    assert len(client.get("/api/dashboard", headers=auth_headers).get_json()["bp_series"]) == 1
+
+    client.post("/api/batch", headers=auth_headers, json={"bp": [{"systolic": 150, "diastolic": 95}]})
+    body = client.get("/api/dashboard", headers=auth_headers).get_json()
+    assert len(body["bp_series"]) == 2
+    assert body["highest_bp"]["systolic"] == 150
+
+
+def test_badges_reflect_new_awards_after_write(client, auth_headers):
+    before = client.get("/api/badges", headers=auth_headers).get_json()
+    assert not any(b["earned"] for b in before["badges"])
+
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 122, "diastolic": 81})
+    after = client.get("/api/badges", headers=auth_headers).get_json()
+    assert any(b["code"] == "FIRST_BP_READING" and b["earned"] for b in after["badges"])
+
+
+def test_memory_backend_lru_eviction():
+    cache = ResponseCache(MemoryCacheBackend(max_entries=2))
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # a is now most recent
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_backend_is_shared_and_bounded(tmp_path):
+    path = str(tmp_path / "cache.db")
+    worker_a = ResponseCache(DiskCacheBackend(path, max_entries=2))
+    worker_b = ResponseCache(DiskCacheBackend(path, max_entries=2))
+
+    stamp = datetime(2026, 5, 1, 9, 30)
+    key = worker_a.make_key(7, "dashboard", {"range": "week"}, stamp)
+    worker_a.set(key, '{"ok": true}')
+    assert worker_b.get(worker_b.make_key(7, "dashboard", {"range": "week"}, stamp)) == '{"ok": true}'
+
+    newer = worker_b.make_key(7, "dashboard", {"range": "week"}, stamp + timedelta(microseconds=1))
+    assert newer != key
+
+    for i in range(3):
+        worker_a.set(f"k{i}", str(i))
+    assert len(worker_a.backend) == 2
+
+
+def test_memory_caches_in_two_workers_see_each_others_writes(app, client, auth_headers):
+    # A second app on the same database stands in for another worker process
+    worker_b = create_app(type("WorkerB", (), {**{k: v for k, v in app.config.items()}}))
+    client_b = worker_b.test_client()
+
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 122, "diastolic": 81})
+    assert len(client_b.get("/api/dashboard", headers=auth_headers).get_json()["bp_series"]) == 1
+
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 131, "diastolic": 84})
+    resp = client_b.get("/api/dashboard", headers=auth_headers)
+    assert len(resp.get_json()["bp_series"]) == 2
+    assert resp.headers["ETag"] == client.get("/api/dashboard", headers=auth_headers).headers["ETag"]
+
+    with worker_b.app_context():
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.db import db
+from backend.models import User
+
+
+@pytest.fixture
+def app(app):
+    app.config["EXPOSE_QUERY_COUNT"] = True
+    return app
+
+
+@pytest.mark.parametrize("path", ["/api/dashboard?range=week", "/api/recommendation/today", "/api/badges"])
+def test_if_none_match_returns_304_without_analytics(client, auth_headers, path):
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 120, "diastolic": 80})
+
+    first = client.get(path, headers=auth_headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert not etag.startswith("W/")
+    assert first.headers["Last-Modified"]
+
+    again = client.get(path, headers={**auth_headers, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+    # Only the users.data_updated_at lookup
+    assert again.headers["X-Query-Count"] == "1"
+
+
+def test_write_changes_validators(client, auth_headers):
+    first = client.get("/api/dashboard", headers=auth_headers)
+    etag = first.headers["ETag"]
+    # No writes yet: the response still changes with the day
+    assert first.last_modified.date() == datetime.utcnow().date()
+
+    client.post("/api/mood", headers=auth_headers, json={"mood_level": 2})
+
+    after = client.get("/api/dashboard", headers={**auth_headers, "If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
+
+
+def test_validators_differ_per_range_and_user(client, auth_headers):
+    week = client.get("/api/dashboard?range=week", headers=auth_headers).headers["ETag"]
+    month = client.get("/api/dashboard?range=month", headers=auth_headers).headers["ETag"]
+    assert week != month
+
+    resp = client.get("/api/dashboard?range=month", headers={**auth_headers, "If-None-Match": week})
+    assert resp.status_code == 200
+
+
+def test_if_modified_since(client, auth_headers):
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 120, "diastolic": 80})
+    first = client.get("/api/badges", headers=auth_headers)
+
+    resp = client.get("/api/badges", headers={**auth_headers, "If-Modified-Since": first.headers["Last-Modified"]})
+    assert resp.status_code == 304
+
+    resp = client.get("/api/badges", headers={**auth_headers, "If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+    assert resp.status_code == 200
+
+
+@pytest.mark.parametrize("path", ["/api/dashboard?range=week", "/api/recommendation/today"])
+def test_if_modified_since_from_an_earlier_day_does_not_match(app, client, auth_headers, user_id, path):
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 120, "diastolic": 80})
+    two_days_ago = datetime.utcnow() - timedelta(days=2)
+    with app.app_context():
+        db.session.get(User, user_id).data_updated_at = two_days_ago
+        db.session.commit()
+
+    # What a client cached two days ago: Last-Modified == that write
+    since = (two_days_ago + timedelta(seconds=1)).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    resp = client.get(path, headers={**auth_headers, "If-Modified-Since": since})
+    assert resp.status_code == 200
+    assert resp.last_modified.date() >= (datetime.utcnow() - timedelta(days=1)).date()
+
+    again = client.get(path, headers={**auth_headers, "If-Modified-Since": resp.headers["Last-Modified"]})
+    assert again.status_code == 304
@@ -0,0 +1,33 @@
+from datetime import date
+
+from sqlalchemy import select
+
+from backend.db import db
+from backend.models import BPReading, MoodLog, User
+from benchmarks.datagen import generate
+
+
+def _dump(app, seed):
+    with app.app_context():
+        stats = generate(db.session, users=3, days=20, readings_per_day=2, seed=seed, today=date(2026, 3, 1))
+        bp = db.session.execute(
+            select(BPReading.user_id, BPReading.systolic, BPReading.diastolic, BPReading.timestamp).order_by(BPReading.id)
+        ).all()
+        mood = db.session.execute(select(MoodLog.user_id, MoodLog.mood_level, MoodLog.timestamp).order_by(MoodLog.id)).all()
+        db.session.execute(BPReading.__table__.delete())
+        db.session.execute(MoodLog.__table__.delete())
+        db.session.execute(User.__table__.delete())
+        db.session.commit()
+        return stats, bp, mood
+
+
+def test_generator_is_deterministic(app):
+    stats, bp, mood = _dump(app, seed=7)
+    assert stats["bp_rows"] == len(bp) > 0
+    assert stats["mood_rows"] == len(mood) > 0
+    assert max(r.timestamp for r in bp).date() == date(2026, 3, 1)
+
+    _, bp_again, mood_again = _dump(app, seed=7)
+    # Same data apart from the freshly created user ids
+    assert [r[1:] for r in bp_again] == [r[1:] for r in bp]
+    assert [r[1:] for r in mood_again] == [r[1:] for r in mood]
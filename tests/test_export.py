@@ -0,0 +1,72 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+
+def _seed(client, auth_headers):
+    client.post("/api/batch", headers=auth_headers, json={
+        "bp": [
+            {"systolic": 120, "diastolic": 80, "timestamp": datetime(2026, 3, 1, 8, 0).isoformat()},
+            {"systolic": 130, "diastolic": 85, "timestamp": datetime(2026, 3, 3, 8, 0).isoformat()},
+        ],
+        "mood": [{"mood_level": 2, "note": "busy, tired", "timestamp": datetime(2026, 3, 2, 9, 0).isoformat()}],
+    })
+
+
+def test_export_csv_streams_merged_history(client, auth_headers):
+    _seed(client, auth_headers)
+
+    resp = client.get("/api/export?format=csv", headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    assert resp.mimetype == "text/csv"
+    assert "attachment" in resp.headers["Content-Disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+    assert [r["type"] for r in rows] == ["bp", "mood", "bp"]
+    assert rows[0]["systolic"] == "120" and rows[0]["mood_level"] == ""
+    assert rows[1]["note"] == "busy, tired"
+    assert rows[2]["timestamp"] == "2026-03-03T08:00:00"
+
+
+def test_export_ndjson_gzip(client, auth_headers):
+    _seed(client, auth_headers)
+
+    resp = client.get("/api/export?format=ndjson&gzip=1", headers=auth_headers)
+    assert resp.headers["Content-Encoding"] == "gzip"
+
+    lines = gzip.decompress(resp.data).decode().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert records[1] == {"type": "mood", "id": records[1]["id"], "timestamp": "2026-03-02T09:00:00",
+                          "mood_level": 2, "note": "busy, tired"}
+    assert set(records[0]) == {"type", "id", "timestamp", "systolic", "diastolic"}
+
+
+def test_export_rejects_unknown_format(client, auth_headers):
+    assert client.get("/api/export?format=xml", headers=auth_headers).status_code == 400
+    assert client.get("/api/export").status_code == 401
+
+
+def test_export_pages_on_timestamp_and_id(app, client, auth_headers, user_id, monkeypatch):
+    from backend.db import db
+    from backend.services import export
+
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    same = datetime(2026, 3, 1, 8, 0).isoformat()
+    client.post("/api/batch", headers=auth_headers, json={
+        "bp": [{"systolic": 110 + i, "diastolic": 70, "timestamp": same} for i in range(5)],
+        "mood": [{"mood_level": 1 + i % 3, "timestamp": datetime(2026, 3, 1 + i, 12, 0).isoformat()} for i in range(3)],
+    })
+
+    with app.app_context():
+        chunks = export.export_history(db.engine, user_id, "ndjson")
+        records = [json.loads(line) for line in next(chunks).decode().splitlines()]
+        # No connection stays checked out while the client is reading
+        assert db.engine.pool.checkedout() == 0
+        for chunk in chunks:
+            records += [json.loads(line) for line in chunk.decode().splitlines()]
+
+    assert [r.get("systolic") for r in records[:5]] == [110, 111, 112, 113, 114]
+    assert [r["type"] for r in records] == ["bp"] * 5 + ["mood"] * 3
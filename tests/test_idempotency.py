@@ -0,0 +1,80 @@
+import uuid
+
+from sqlalchemy import func, select
+
+from backend.db import db
+from backend.models import BPReading, DailyRollup, MoodLog
+
+
+def _count(app, model):
+    with app.app_context():
+        return db.session.execute(select(func.count(model.id))).scalar()
+
+
+def test_retried_post_returns_original_row(app, client, auth_headers):
+    client_id = str(uuid.uuid4())
+    body = {"systolic": 120, "diastolic": 80, "client_id": client_id}
+
+    first = client.post("/api/bp", headers=auth_headers, json=body)
+    retry = client.post("/api/bp", headers=auth_headers, json=body)
+
+    assert first.status_code == 201
+    assert retry.status_code == 200
+    assert retry.get_json()["id"] == first.get_json()["id"]
+    assert retry.get_json()["new_badges"] == []
+    assert _count(app, BPReading) == 1
+    with app.app_context():
+        assert db.session.execute(select(DailyRollup.bp_count)).scalar() == 1
+
+    # Keys are per user and optional
+    assert client.post("/api/bp", headers=auth_headers, json={"systolic": 120, "diastolic": 80}).status_code == 201
+    assert client.post("/api/bp", headers=auth_headers, json={**body, "client_id": "nope"}).status_code == 400
+
+
+def test_batch_replays_and_in_batch_duplicates(app, client, auth_headers):
+    seen = str(uuid.uuid4())
+    client.post("/api/mood", headers=auth_headers, json={"mood_level": 2, "client_id": seen})
+
+    repeated = str(uuid.uuid4())
+    resp = client.post("/api/batch", headers=auth_headers, json={
+        "mood": [
+            {"mood_level": 2, "client_id": seen},
+            {"mood_level": 3, "client_id": repeated},
+            {"mood_level": 3, "client_id": repeated},
+            {"mood_level": 1},
+        ],
+    }).get_json()
+
+    assert [r["status"] for r in resp["mood"]] == [200, 201, 200, 201]
+    assert resp["mood"][1]["data"]["id"] == resp["mood"][2]["data"]["id"]
+    assert resp["inserted"] == 2 and resp["replayed"] == 2
+    assert _count(app, MoodLog) == 3
+
+    # Replaying the whole batch inserts nothing
+    again = client.post("/api/batch", headers=auth_headers, json={
+        "mood": [{"mood_level": 2, "client_id": seen}, {"mood_level": 3, "client_id": repeated}],
+    }).get_json()
+    assert again["inserted"] == 0 and again["replayed"] == 2
+    assert _count(app, MoodLog) == 3
+
+
+def test_concurrent_retry_resolves_to_stored_row(app, client, auth_headers, monkeypatch):
+    from backend.services import ingest
+
+    body = {"systolic": 120, "diastolic": 80, "client_id": str(uuid.uuid4())}
+    first = client.post("/api/bp", headers=auth_headers, json=body).get_json()
+
+    # Simulate a racing request that checked before the first one committed
+    real_lookup = ingest._stored_by_client_id
+    calls = []
+
+    def stale_once(*args):
+        calls.append(args)
+        return {} if len(calls) == 1 else real_lookup(*args)
+
+    monkeypatch.setattr(ingest, "_stored_by_client_id", stale_once)
+    retry = client.post("/api/bp", headers=auth_headers, json=body)
+
+    assert retry.status_code == 200
+    assert retry.get_json()["id"] == first["id"]
+    assert _count(app, BPReading) == 1
@@ -0,0 +1,129 @@
+import io
+
+from sqlalchemy import func, select
+
+from backend.db import db
+from backend.models import BPReading
+from backend.services.importer import import_bp_csv
+
+
+CSV = (
+    "Date,SYS,DIA,Pulse\n"
+    "2026-03-01 08:00,120,80,70\n"
+    "2026-03-01 20:00,abc,80,70\n"
+    "2026-03-02 08:00,125,82,71\n"
+    "2026-03-02 08:00,125,82,71\n"
+    "\n"
+    "2026-03-03 08:00,-1,80,70\n"
+)
+
+
+def _count(app):
+    with app.app_context():
+        return db.session.execute(select(func.count(BPReading.id))).scalar()
+
+
+def test_import_endpoint_validates_and_skips_duplicates(app, client, auth_headers):
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 119, "diastolic": 79, "timestamp": "2026-03-01T08:00:00"})
+
+    resp = client.post(
+        "/api/import/bp",
+        headers=auth_headers,
+        data={"file": (io.BytesIO(CSV.encode()), "export.csv")},
+        content_type="multipart/form-data",
+    )
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert body["rows"] == 5
+    assert body["inserted"] == 1
+    assert body["duplicates"] == 2  # one already stored, one repeated in the file
+    assert body["rejected"] == 2
+    assert [e["line"] for e in body["errors"]] == [3, 7]
+    assert "rows_per_second" in body
+    assert _count(app) == 2
+
+    # Re-importing the same file adds nothing
+    again = client.post("/api/import/bp", headers={**auth_headers, "Content-Type": "text/csv"}, data=CSV)
+    assert again.get_json()["inserted"] == 0
+    assert _count(app) == 2
+
+
+def test_import_rejects_missing_columns(client, auth_headers):
+    resp = client.post("/api/import/bp", headers={**auth_headers, "Content-Type": "text/csv"}, data="date,pulse\n")
+    assert resp.status_code == 400
+
+    # Without timestamps every row would be stamped with the import time
+    resp = client.post("/api/import/bp", headers={**auth_headers, "Content-Type": "text/csv"},
+                       data="systolic,diastolic\n120,80\n")
+    assert resp.status_code == 400
+
+
+def test_import_rejects_rows_without_timestamp(app, client, auth_headers):
+    resp = client.post("/api/import/bp", headers={**auth_headers, "Content-Type": "text/csv"},
+                       data="timestamp,systolic,diastolic\n,120,80\n2026-03-01 08:00,121,81\n")
+    body = resp.get_json()
+    assert body["inserted"] == 1
+    assert body["errors"] == [{"line": 2, "error": "timestamp is required"}]
+    assert _count(app) == 1
+
+
+def test_import_commits_each_chunk(app, user_id):
+    def lines():
+        yield "timestamp,systolic,diastolic\n"
+        for day in range(1, 6):
+            yield f"2026-03-0{day} 08:00,120,80\n"
+        raise ValueError("connection lost")
+
+    with app.app_context():
+        try:
+            import_bp_csv(db.session, user_id, lines(), chunk_size=2)
+        except ValueError:
+            db.session.rollback()
+        # The two full chunks survive the failure; the partial one does not
+        assert _count(app) == 4
+
+        # Retrying the whole file skips what is already stored
+        stats = import_bp_csv(db.session, user_id, ["timestamp,systolic,diastolic\n"] + [
+            f"2026-03-0{day} 08:00,120,80\n" for day in range(1, 6)
+        ], chunk_size=2)
+        assert (stats["inserted"], stats["duplicates"]) == (1, 4)
+        assert _count(app) == 5
+
+
+def test_import_cli(app, user_id, tmp_path):
+    path = tmp_path / "readings.csv"
+    path.write_text("timestamp,systolic,diastolic\n" + "".join(
+        f"2026-01-01T00:{m:02d}:{s:02d},{110 + s % 30},75\n" for m in range(60) for s in range(60)
+    ))
+
+    result = app.test_cli_runner().invoke(args=["import-bp", "--user-id", str(user_id), str(path)])
+    assert result.exit_code == 0, result.output
+    assert "3600 inserted" in result.output
+    assert _count(app) == 3600
+
+
+def test_import_reports_oversized_field_and_keeps_committed_chunks(app, client, auth_headers):
+    client.get("/api/stats", headers=auth_headers)
+    before = client.get("/api/dashboard?range=7", headers=auth_headers)
+
+    rows = "".join(f"2026-01-01T{m // 60:02d}:{m % 60:02d}:00,120,80\n" for m in range(1000))
+    body = "timestamp,systolic,diastolic\n" + rows + "2026-01-02T00:00:00,120," + "9" * 200_000 + "\n"
+    resp = client.post("/api/import/bp", headers={**auth_headers, "Content-Type": "text/csv"}, data=body)
+
+    assert resp.status_code == 400
+    assert "line 1002" in resp.get_json()["error"]
+    assert _count(app) == 1000
+
+    # The committed chunk is visible through the caches
+    after = client.get("/api/dashboard?range=7", headers={**auth_headers, "If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert app.extensions["window_store"].info()["users"] == 0
+
+
+def test_import_cli_reports_oversized_field(app, user_id, tmp_path):
+    path = tmp_path / "readings.csv"
+    path.write_text("timestamp,systolic,diastolic\n2026-01-01T00:00:00,120," + "9" * 200_000 + "\n")
+
+    result = app.test_cli_runner().invoke(args=["import-bp", "--user-id", str(user_id), str(path)])
+    assert result.exit_code == 1
+    assert "line 2" in result.output
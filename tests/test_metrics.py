@@ -0,0 +1,36 @@
+import re
+
+
+def _value(text, line_prefix):
+    match = re.search(rf"^{re.escape(line_prefix)} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else None
+
+
+def test_metrics_exposes_requests_queries_and_pool(client, auth_headers):
+    client.get("/ping")
+    client.get("/api/bp", headers=auth_headers)
+    client.get("/api/bp", headers=auth_headers)
+    client.get("/api/bp")  # 401
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
+    text = resp.get_data(as_text=True)
+
+    assert _value(text, 'bp_guardian_http_requests_total{route="/api/bp",method="GET",status="200"}') == 2
+    assert _value(text, 'bp_guardian_http_requests_total{route="/api/bp",method="GET",status="401"}') == 1
+    assert _value(text, 'bp_guardian_http_request_duration_seconds_count{route="/ping",method="GET"}') == 1
+    assert _value(text, 'bp_guardian_http_request_duration_seconds_bucket{route="/ping",method="GET",le="+Inf"}') == 1
+    assert _value(text, 'bp_guardian_http_request_queries_count{route="/api/bp",method="GET"}') == 3
+    assert _value(text, "bp_guardian_db_queries_total") > 0
+    assert "bp_guardian_db_pool_checked_out" in text
+    assert "bp_guardian_http_request_sql_seconds_sum" in text
+
+
+def test_metrics_times_service_functions(client, auth_headers):
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 120, "diastolic": 80})
+    client.get("/api/recommendation/today", headers=auth_headers)
+
+    text = client.get("/metrics").get_data(as_text=True)
+    assert _value(text, 'bp_guardian_service_duration_seconds_count{function="award_badges_for_events"}') == 1
+    assert _value(text, 'bp_guardian_service_duration_seconds_count{function="window_store_recommendation"}') == 1
@@ -0,0 +1,103 @@
+import sqlite3
+from datetime import date, datetime
+
+from sqlalchemy import event, inspect, text
+
+from backend import create_app
+from backend.config import Config
+from backend.db import db
+from backend.services.recommendations import get_active_user_ids
+
+
+def _plan(sql, **params):
+    rows = db.session.execute(text("EXPLAIN QUERY PLAN " + sql), params).all()
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_hot_queries_use_user_timestamp_index(app):
+    with app.app_context():
+        since = datetime(2026, 1, 1)
+        bp_plan = _plan(
+            "SELECT * FROM bp_readings WHERE user_id = :uid AND timestamp >= :since ORDER BY timestamp",
+            uid=1, since=since,
+        )
+        mood_plan = _plan(
+            "SELECT * FROM mood_logs WHERE user_id = :uid AND timestamp >= :since ORDER BY timestamp",
+            uid=1, since=since,
+        )
+
+    assert "USING INDEX ix_bp_readings_user_id_timestamp" in bp_plan
+    assert "USING INDEX ix_mood_logs_user_id_timestamp" in mood_plan
+    # The index already yields rows in timestamp order
+    assert "TEMP B-TREE" not in bp_plan
+    assert "TEMP B-TREE" not in mood_plan
+
+
+def test_active_users_query_reads_only_the_rollup_index(app):
+    with app.app_context():
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            get_active_user_ids(db.session, date(2026, 1, 8))
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        [statement] = statements
+        plan = _plan(statement.replace("?", ":day"), day="2026-01-01")
+
+    assert "SEARCH daily_rollups USING COVERING INDEX ix_daily_rollups_day_user_id" in plan
+    assert "bp_readings" not in plan and "mood_logs" not in plan
+
+
+def test_upgrade_adds_indexes_to_existing_database(tmp_path):
+    path = tmp_path / "legacy.db"
+
+    # Schema as created by the original create_all(), without any indexes
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR(120) NOT NULL UNIQUE,
+            password_hash VARCHAR(255) NOT NULL, name VARCHAR(100), created_at DATETIME NOT NULL);
+        CREATE TABLE bp_readings (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL,
+            systolic INTEGER NOT NULL, diastolic INTEGER NOT NULL, timestamp DATETIME NOT NULL);
+        CREATE TABLE mood_logs (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL,
+            mood_level INTEGER NOT NULL, note VARCHAR(255), timestamp DATETIME NOT NULL);
+        CREATE TABLE badges (id INTEGER PRIMARY KEY, code VARCHAR(50) NOT NULL UNIQUE,
+            name VARCHAR(100) NOT NULL, description VARCHAR(255));
+        CREATE TABLE user_badges (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL,
+            badge_id INTEGER NOT NULL, earned_at DATETIME NOT NULL);
+        INSERT INTO user_badges (user_id, badge_id, earned_at) VALUES
+            (1, 1, '2026-01-01 00:00:00'), (1, 1, '2026-01-02 00:00:00');
+    """)
+    conn.close()
+
+    class LegacyConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(path)
+
+    app = create_app(LegacyConfig)
+    with app.app_context():
+        inspector = inspect(db.engine)
+        bp_indexes = {ix["name"] for ix in inspector.get_indexes("bp_readings")}
+        mood_indexes = {ix["name"] for ix in inspector.get_indexes("mood_logs")}
+        badge_indexes = {ix["name"]: ix for ix in inspector.get_indexes("user_badges")}
+        rollup_indexes = {ix["name"] for ix in inspector.get_indexes("daily_rollups")}
+
+        assert "ix_bp_readings_user_id_timestamp" in bp_indexes
+        assert "ix_mood_logs_user_id_timestamp" in mood_indexes
+        assert badge_indexes["uq_user_badges_user_id_badge_id"]["unique"]
+        assert "ix_daily_rollups_day_user_id" in rollup_indexes
+
+        # Duplicate award collapsed to the earliest one
+        rows = db.session.execute(text("SELECT earned_at FROM user_badges")).all()
+        assert len(rows) == 1
+        assert str(rows[0][0]).startswith("2026-01-01")
+
+        # Existing rows seed the delta-sync change sequence
+        changes = db.session.execute(text("SELECT user_id, kind FROM change_log")).all()
+        assert changes == [(1, "badge")]
+
+        db.session.remove()
+        db.engine.dispose()
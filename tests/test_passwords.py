@@ -0,0 +1,49 @@
+from werkzeug.security import generate_password_hash
+
+from backend.db import db
+from backend.models import User
+from backend.services.passwords import HasherBusy, PasswordHasher
+
+
+def test_login_rehashes_when_method_changes(app, client):
+    with app.app_context():
+        user = User(email="old@example.com", password_hash=generate_password_hash("pw", "pbkdf2:sha256:1000"))
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    resp = client.post("/api/auth/login", json={"email": "old@example.com", "password": "pw"})
+    assert resp.status_code == 200
+
+    with app.app_context():
+        stored = db.session.get(User, user_id).password_hash
+        assert stored.startswith("scrypt:32768:8:1$")
+
+    # The upgraded hash still verifies
+    assert client.post("/api/auth/login", json={"email": "old@example.com", "password": "pw"}).status_code == 200
+
+
+def test_register_uses_configured_method(app, client):
+    app.extensions["password_hasher"] = PasswordHasher("pbkdf2:sha256:1000", workers=1, max_pending=4)
+    client.post("/api/auth/register", json={"email": "a@example.com", "password": "pw"})
+
+    with app.app_context():
+        stored = User.query.filter_by(email="a@example.com").one().password_hash
+        assert stored.startswith("pbkdf2:sha256:1000$")
+
+
+def test_hasher_rejects_when_saturated(app, client):
+    hasher = PasswordHasher("pbkdf2:sha256:1000", workers=1, max_pending=1)
+    hasher._slots.acquire()
+    app.extensions["password_hasher"] = hasher
+
+    try:
+        hasher.hash("pw")
+    except HasherBusy:
+        pass
+    else:
+        raise AssertionError("expected HasherBusy")
+
+    resp = client.post("/api/auth/register", json={"email": "a@example.com", "password": "pw"})
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
@@ -0,0 +1,139 @@
+import random
+import threading
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from backend.db import db
+from backend.models import User
+from backend.services import population as population_module
+from backend.services.population import PopulationCache, load_population
+from backend.services.rules_engine import get_daily_recommendation
+
+
+ADMIN = {"X-Admin-Token": "staff-secret"}
+
+
+@pytest.fixture
+def admin_app(app):
+    app.config["ADMIN_API_TOKEN"] = "staff-secret"
+    app.config["EXPOSE_QUERY_COUNT"] = True
+    return app
+
+
+def _make_patients(app, client, count, seed=7):
+    rng = random.Random(seed)
+    today = datetime.combine(date.today(), datetime.min.time())
+    with app.app_context():
+        users = [User(email=f"p{i}@example.com", password_hash="x", name=f"P{i}") for i in range(count)]
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [u.id for u in users]
+
+    for uid in user_ids:
+        base_sys, base_dia = rng.randint(105, 150), rng.randint(65, 95)
+        days = rng.sample(range(10), rng.randint(0, 8))
+        bp = [{"systolic": base_sys + rng.randint(-12, 12), "diastolic": base_dia + rng.randint(-8, 8),
+               "timestamp": (today - timedelta(days=d, hours=-rng.randint(6, 22))).isoformat()}
+              for d in days for _ in range(rng.randint(1, 3))]
+        mood = [{"mood_level": rng.randint(1, 3), "timestamp": (today - timedelta(days=d, hours=-12)).isoformat()}
+                for d in days if rng.random() < 0.8]
+        client.post("/api/batch", headers={"X-User-Id": str(uid)}, json={"bp": bp, "mood": mood})
+    return user_ids
+
+
+def test_requires_admin_token(app, client):
+    assert client.get("/api/admin/population", headers=ADMIN).status_code == 403
+    app.config["ADMIN_API_TOKEN"] = "staff-secret"
+    assert client.get("/api/admin/population", headers={"X-Admin-Token": "nope"}).status_code == 403
+    assert client.get("/api/admin/population", headers=ADMIN).status_code == 200
+
+
+def test_bulk_classification_matches_rules_engine(admin_app, client):
+    user_ids = _make_patients(admin_app, client, 40)
+    today = date.today()
+
+    with admin_app.app_context():
+        population = load_population(db.session, today)
+        index = {int(u): i for i, u in enumerate(population["user_id"])}
+        for uid in user_ids:
+            expected = get_daily_recommendation(db.session, today, uid)
+            i = index[uid]
+            for field in ("bp_status", "bp_risk_level", "bp_trend", "mood_status", "stress_impact", "logging_status"):
+                assert population[field][i] == expected[field], (uid, field)
+
+
+def test_trend_from_daily_slope(admin_app, client, auth_headers):
+    today = datetime.combine(date.today(), datetime.min.time()) + timedelta(hours=9)
+    client.post("/api/batch", headers=auth_headers, json={"bp": [
+        {"systolic": 150 - 3 * d, "diastolic": 80, "timestamp": (today - timedelta(days=d)).isoformat()}
+        for d in range(7)
+    ]})
+
+    body = client.get("/api/admin/population", headers=ADMIN).get_json()
+    assert body["bp_trend"]["worsening"] == 1
+    assert body["avg_trend_mmhg_per_day"] == 3.0
+
+
+def test_filters_and_single_query(admin_app, client):
+    _make_patients(admin_app, client, 30)
+
+    resp = client.get("/api/admin/population", headers=ADMIN)
+    body = resp.get_json()
+    assert resp.headers["X-Query-Count"] == "1"
+    assert body["patients"] == 30
+    assert sum(body["bp_status"].values()) == 30
+
+    high = client.get("/api/admin/population?bp_status=stage2,stage1&limit=5", headers=ADMIN)
+    high_body = high.get_json()
+    # Same snapshot, filtered in memory
+    assert high.headers["X-Query-Count"] == "0"
+    assert high_body["patients"] == body["bp_status"]["stage1"] + body["bp_status"]["stage2"]
+    assert set(high_body["bp_status"]) == set(body["bp_status"])
+    assert high_body["bp_status"]["normal"] == 0
+    systolics = [p["avg_systolic"] for p in high_body["patient_list"]]
+    assert systolics == sorted(systolics, reverse=True)
+    assert len(systolics) == min(5, high_body["patients"])
+
+    active = client.get("/api/admin/population?min_bp_days=1", headers=ADMIN).get_json()
+    assert active["patients"] == 30 - body["bp_status"]["no_data"]
+
+    assert client.get("/api/admin/population?bp_status=bad", headers=ADMIN).status_code == 400
+
+
+def test_cache_rebuilds_once_under_concurrent_requests(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_load(db_session, today):
+        calls.append(today)
+        started.set()
+        release.wait(5)
+        return {"day": today, "build": len(calls)}
+
+    monkeypatch.setattr(population_module, "load_population", slow_load)
+    cache = PopulationCache(ttl_seconds=60)
+    today = date.today()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(None, today))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [{"day": today, "build": 1}] * 5
+
+    # Once expired, one request refreshes while the others keep the old snapshot
+    cache._snapshots[today] = (0, results[0])
+    started.clear()
+    release.clear()
+    refresher = threading.Thread(target=cache.get, args=(None, today))
+    refresher.start()
+    started.wait(5)
+    assert cache.get(None, today) == {"day": today, "build": 1}
+    release.set()
+    refresher.join()
+    assert cache.get(None, today) == {"day": today, "build": 2}
+    assert cache.rebuilds == 2
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from backend.services.downsample import downsample_bp_rows
+
+
+def test_dashboard_series_and_extremes(client, auth_headers):
+    now = datetime.utcnow().replace(microsecond=0)
+    client.post("/api/batch", headers=auth_headers, json={
+        "bp": [
+            {"systolic": 140, "diastolic": 90, "timestamp": (now - timedelta(days=2)).isoformat()},
+            {"systolic": 110, "diastolic": 70, "timestamp": (now - timedelta(days=1)).isoformat()},
+            {"systolic": 125, "diastolic": 82, "timestamp": now.isoformat()},
+        ],
+        "mood": [{"mood_level": 2, "note": "busy", "timestamp": now.isoformat()}],
+    })
+
+    body = client.get("/api/dashboard?range=week", headers=auth_headers).get_json()
+    assert [p["systolic"] for p in body["bp_series"]] == [140, 110, 125]
+    assert body["bp_series"][0] == {
+        "timestamp": (now - timedelta(days=2)).isoformat(), "systolic": 140, "diastolic": 90,
+    }
+    assert body["mood_series"] == [{"timestamp": now.isoformat(), "mood_level": 2, "note": "busy"}]
+    assert body["last_bp"]["systolic"] == 125
+    assert body["highest_bp"] == {"systolic": 140, "diastolic": 90, "timestamp": (now - timedelta(days=2)).isoformat()}
+    assert body["lowest_bp"]["systolic"] == 110
+
+
+def test_list_endpoints_return_newest_first(client, auth_headers, user_id):
+    for i, sys in enumerate((120, 121, 122)):
+        ts = datetime(2026, 3, 1 + i, 8, 0).isoformat()
+        client.post("/api/bp", headers=auth_headers, json={"systolic": sys, "diastolic": 80, "timestamp": ts})
+        client.post("/api/mood", headers=auth_headers, json={"mood_level": 3, "timestamp": ts})
+
+    readings = client.get("/api/bp?limit=2", headers=auth_headers).get_json()
+    assert [r["systolic"] for r in readings] == [122, 121]
+    assert set(readings[0]) == {"id", "user_id", "systolic", "diastolic", "timestamp"}
+    assert readings[0]["user_id"] == user_id
+
+    moods = client.get("/api/mood", headers=auth_headers).get_json()
+    assert len(moods) == 3
+    assert moods[0]["timestamp"] == "2026-03-03T08:00:00"
+
+
+def test_list_keyset_pagination(app, client, auth_headers):
+    # Two readings share a timestamp so the id tie-break matters
+    stamps = [datetime(2026, 3, 1, 8, 0), datetime(2026, 3, 2, 8, 0), datetime(2026, 3, 2, 8, 0),
+              datetime(2026, 3, 3, 8, 0), datetime(2026, 3, 4, 8, 0)]
+    client.post("/api/batch", headers=auth_headers, json={
+        "bp": [{"systolic": 110 + i, "diastolic": 80, "timestamp": ts.isoformat()} for i, ts in enumerate(stamps)],
+    })
+
+    first = client.get("/api/bp?limit=2", headers=auth_headers)
+    assert [r["systolic"] for r in first.get_json()] == [114, 113]
+    cursor = first.headers["X-Next-Cursor"]
+    assert "before=" in first.headers["Link"]
+
+    second = client.get(f"/api/bp?limit=2&before={cursor}", headers=auth_headers)
+    assert [r["systolic"] for r in second.get_json()] == [112, 111]
+
+    last = client.get(f"/api/bp?limit=2&before={second.headers['X-Next-Cursor']}", headers=auth_headers)
+    assert [r["systolic"] for r in last.get_json()] == [110]
+    assert "X-Next-Cursor" not in last.headers
+
+    # Walking forward from the oldest row on the second page
+    newer = client.get(f"/api/bp?limit=2&after={second.headers['X-Next-Cursor']}", headers=auth_headers)
+    assert [r["systolic"] for r in newer.get_json()] == [113, 112]
+    newest = client.get(f"/api/bp?limit=2&after={newer.headers['X-Next-Cursor']}", headers=auth_headers)
+    assert [r["systolic"] for r in newest.get_json()] == [114]
+    assert "X-Next-Cursor" not in newest.headers
+
+
+def test_list_filters_and_limits(app, client, auth_headers):
+    for day in range(1, 6):
+        ts = datetime(2026, 3, day, 8, 0).isoformat()
+        client.post("/api/mood", headers=auth_headers, json={"mood_level": 2, "timestamp": ts})
+
+    moods = client.get("/api/mood?from=2026-03-02&to=2026-03-04", headers=auth_headers).get_json()
+    assert [m["timestamp"][:10] for m in moods] == ["2026-03-04", "2026-03-03", "2026-03-02"]
+
+    # Mood and BP share the same default, and bad limits fall back to it
+    assert len(client.get("/api/mood", headers=auth_headers).get_json()) == 5
+    assert len(client.get("/api/mood?limit=abc", headers=auth_headers).get_json()) == 5
+
+    app.config["LIST_MAX_LIMIT"] = 2
+    assert len(client.get("/api/mood?limit=1000", headers=auth_headers).get_json()) == 2
+
+    assert client.get("/api/mood?before=not-a-cursor", headers=auth_headers).status_code == 400
+    assert client.get("/api/mood?from=March", headers=auth_headers).status_code == 400
+
+
+def test_dashboard_max_points_keeps_peaks(client, auth_headers):
+    now = datetime.utcnow().replace(microsecond=0)
+    readings = []
+    for i in range(300):
+        sys = 120 + (i % 7)
+        readings.append({"systolic": sys, "diastolic": 80, "timestamp": (now - timedelta(hours=300 - i)).isoformat()})
+    readings[137]["systolic"] = 190  # spike
+    readings[201]["systolic"] = 95   # dip
+    client.post("/api/batch", headers=auth_headers, json={"bp": readings})
+
+    full = client.get("/api/dashboard?range=month", headers=auth_headers).get_json()
+    small = client.get("/api/dashboard?range=month&max_points=40", headers=auth_headers).get_json()
+
+    assert len(full["bp_series"]) == 300
+    assert len(small["bp_series"]) <= 40
+    systolic = [p["systolic"] for p in small["bp_series"]]
+    assert 190 in systolic and 95 in systolic
+    assert small["bp_series"][0] == full["bp_series"][0]
+    assert small["bp_series"][-1] == full["bp_series"][-1]
+    assert small["highest_bp"] == full["highest_bp"]
+    timestamps = [p["timestamp"] for p in small["bp_series"]]
+    assert timestamps == sorted(timestamps)
+
+
+def test_downsample_ranks_by_systolic_then_diastolic():
+    # Diastolic is not capped on input, so no fixed-width packing of the
+    # pair is safe; 120/1500 must still rank below 121/80
+    rows = [SimpleNamespace(systolic=120, diastolic=80) for _ in range(20)]
+    rows[5] = SimpleNamespace(systolic=121, diastolic=80)
+    rows[6] = SimpleNamespace(systolic=120, diastolic=1500)
+    rows[12] = SimpleNamespace(systolic=119, diastolic=1500)
+    rows[13] = SimpleNamespace(systolic=120, diastolic=79)
+
+    kept = downsample_bp_rows(rows, 4)
+    assert rows[5] in kept and rows[12] in kept
+    assert rows[6] not in kept and rows[13] not in kept
+
+
+def test_dashboard_daily_summary_matches_window_on_first_day(client, auth_headers, monkeypatch):
+    import backend.routes.api as api
+
+    noon = datetime.combine(datetime.utcnow().date(), datetime.min.time()) + timedelta(hours=12)
+
+    class FixedDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return noon
+
+    monkeypatch.setattr(api, "datetime", FixedDatetime)
+    start = noon - timedelta(days=7)
+    client.post("/api/batch", headers=auth_headers, json={"bp": [
+        # Same calendar day as the window start, but before it
+        {"systolic": 200, "diastolic": 100, "timestamp": (start - timedelta(hours=11, minutes=59)).isoformat()},
+        {"systolic": 120, "diastolic": 80, "timestamp": (start + timedelta(hours=1)).isoformat()},
+        {"systolic": 130, "diastolic": 84, "timestamp": (start + timedelta(days=1)).isoformat()},
+    ]})
+
+    body = client.get("/api/dashboard?range=week", headers=auth_headers).get_json()
+    assert [p["systolic"] for p in body["bp_series"]] == [120, 130]
+    assert body["daily_summary"]["bp_daily"] == [
+        {"date": start.date().isoformat(), "avg_systolic": 120.0, "avg_diastolic": 80.0},
+        {"date": (start + timedelta(days=1)).date().isoformat(), "avg_systolic": 130.0, "avg_diastolic": 84.0},
+    ]
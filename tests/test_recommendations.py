@@ -0,0 +1,109 @@
+import json
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event
+
+from backend.db import db
+from backend.models import DailyRecommendation, User
+from backend.services.recommendations import precompute_recommendations
+from backend.services.rules_engine import get_daily_recommendation
+
+
+def _seed(client, headers, systolic):
+    base = datetime.combine(date.today(), datetime.min.time()) + timedelta(hours=8)
+    client.post("/api/batch", headers=headers, json={
+        "bp": [{"systolic": systolic + i, "diastolic": 85, "timestamp": (base - timedelta(days=i)).isoformat()}
+               for i in range(4)],
+        "mood": [{"mood_level": 1 + i % 3, "timestamp": (base - timedelta(days=i)).isoformat()} for i in range(4)],
+    })
+
+
+def test_precompute_matches_live_and_is_served(app, client, auth_headers, user_id):
+    with app.app_context():
+        other = User(email="second@example.com", password_hash="x")
+        idle = User(email="idle@example.com", password_hash="x")
+        db.session.add_all([other, idle])
+        db.session.commit()
+        other_id = other.id
+
+    _seed(client, auth_headers, 118)
+    _seed(client, {"X-User-Id": str(other_id)}, 142)
+
+    today = date.today()
+    result = app.test_cli_runner().invoke(args=["precompute-recommendations", "--workers", "2", "--chunk-size", "1"])
+    assert "Precomputed 2 recommendations" in result.output
+
+    with app.app_context():
+        for uid in (user_id, other_id):
+            row = db.session.query(DailyRecommendation).filter_by(user_id=uid, day=today).one()
+            assert json.loads(row.payload) == get_daily_recommendation(db.session, today, uid)
+
+        statements = []
+        listener = lambda conn, cursor, stmt, *a: statements.append(stmt)  # noqa: E731
+        event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        body = client.get("/api/recommendation/today", headers=auth_headers).get_json()
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert body["bp_status"] in ("normal", "elevated", "stage1", "stage2")
+    assert not any("FROM bp_readings" in s or "FROM mood_logs" in s for s in statements)
+
+
+def test_stale_precompute_falls_back_to_live(app, client, auth_headers, user_id):
+    _seed(client, auth_headers, 118)
+    today = date.today()
+    with app.app_context():
+        precompute_recommendations(db.session, app.config["SQLALCHEMY_DATABASE_URI"], today)
+
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 190, "diastolic": 120})
+    body = client.get("/api/recommendation/today", headers=auth_headers).get_json()
+    assert body["latest_bp"]["systolic"] == 190
+
+
+def _patients(app, client, count):
+    with app.app_context():
+        users = [User(email=f"batch{i}@example.com", password_hash="x") for i in range(count)]
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [u.id for u in users]
+    for i, uid in enumerate(user_ids):
+        if i % 4:
+            _seed(client, {"X-User-Id": str(uid)}, 110 + 3 * i)
+    return user_ids
+
+
+def test_batch_recommendations_use_constant_queries(app, client):
+    app.config["ADMIN_API_TOKEN"] = "staff-secret"
+    app.config["EXPOSE_QUERY_COUNT"] = True
+    headers = {"X-Admin-Token": "staff-secret"}
+    user_ids = _patients(app, client, 12)
+
+    small = client.post("/api/recommendations/batch", headers=headers, json={"user_ids": user_ids[:2]})
+    large = client.post("/api/recommendations/batch", headers=headers,
+                        json={"user_ids": list(reversed(user_ids)) + [999999, user_ids[0]]})
+    assert small.status_code == large.status_code == 200
+    # users lookup + one ranged query per table, however many patients
+    assert small.headers["X-Query-Count"] == large.headers["X-Query-Count"] == "3"
+
+    results = large.get_json()["results"]
+    assert [r["user_id"] for r in results] == list(reversed(user_ids)) + [999999, user_ids[0]]
+    assert results[-2] == {"user_id": 999999, "status": 404, "error": "user not found"}
+    with app.app_context():
+        for item in results:
+            if item["status"] == 200:
+                assert item["data"] == get_daily_recommendation(db.session, date.today(), item["user_id"])
+
+
+def test_batch_recommendations_validation(app, client):
+    body = {"user_ids": [1]}
+    assert client.post("/api/recommendations/batch", json=body).status_code == 403
+
+    app.config["ADMIN_API_TOKEN"] = "staff-secret"
+    app.config["RECOMMENDATION_BATCH_MAX_USERS"] = 3
+    headers = {"X-Admin-Token": "staff-secret"}
+    assert client.post("/api/recommendations/batch", headers=headers, json=[1, 2]).status_code == 400
+    assert client.post("/api/recommendations/batch", headers=headers, json={"user_ids": "1,2"}).status_code == 400
+    assert client.post("/api/recommendations/batch", headers=headers, json={"user_ids": [1, "2"]}).status_code == 400
+    assert client.post("/api/recommendations/batch", headers=headers, json={"user_ids": [1, 2, 3, 4]}).status_code == 413
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+from backend.db import db
+from backend.models import DailyRollup
+from backend.services.rollups import rebuild_daily_rollups
+
+
+def _snapshot():
+    return sorted(
+        (r.user_id, r.day, r.bp_count, r.systolic_sum, r.systolic_min, r.systolic_max,
+         r.diastolic_sum, r.diastolic_min, r.diastolic_max,
+         r.mood_count, r.mood_sum, r.mood_min, r.mood_max)
+        for r in db.session.query(DailyRollup).all()
+    )
+
+
+def test_incremental_rollups_match_rebuild(app, client, auth_headers):
+    base = datetime.utcnow().replace(hour=9, minute=0, second=0, microsecond=0)
+    day1 = base - timedelta(days=1)
+
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 130, "diastolic": 85, "timestamp": day1.isoformat()})
+    client.post("/api/batch", headers=auth_headers, json={
+        "bp": [
+            {"systolic": 120, "diastolic": 80, "timestamp": (day1 + timedelta(hours=2)).isoformat()},
+            {"systolic": 110, "diastolic": 70, "timestamp": base.isoformat()},
+        ],
+        "mood": [
+            {"mood_level": 1, "timestamp": day1.isoformat()},
+            {"mood_level": 3, "timestamp": (day1 + timedelta(hours=1)).isoformat()},
+        ],
+    })
+    client.post("/api/mood", headers=auth_headers, json={"mood_level": 2, "timestamp": base.isoformat()})
+
+    with app.app_context():
+        incremental = _snapshot()
+        rebuild_daily_rollups(db.session)
+        db.session.commit()
+        assert _snapshot() == incremental
+
+        first = incremental[0]
+        assert first[2:9] == (2, 250, 120, 130, 165, 80, 85)
+        assert first[9:] == (2, 4, 1, 3)
+
+    body = client.get("/api/dashboard?range=week", headers=auth_headers).get_json()
+    summary = body["daily_summary"]
+    assert summary["bp_daily"][0] == {"date": day1.date().isoformat(), "avg_systolic": 125.0, "avg_diastolic": 82.5}
+    assert summary["mood_daily"][0]["avg_mood"] == 2.0
+    assert len(summary["correlation_points"]) == 2
+
+
+def test_rebuild_rollups_command(app, client, auth_headers):
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 125, "diastolic": 82})
+    with app.app_context():
+        db.session.query(DailyRollup).delete()
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["rebuild-rollups"])
+    assert "Daily rollups rebuilt" in result.output
+
+    with app.app_context():
+        [row] = db.session.query(DailyRollup).all()
+        assert (row.bp_count, row.systolic_sum, row.mood_count) == (1, 125, 0)
@@ -0,0 +1,125 @@
+import threading
+from contextlib import ExitStack
+
+import pytest
+from sqlalchemy import func, select, text
+
+from backend import create_app
+from backend.config import Config
+from backend.db import db
+from backend.models import BPReading
+
+
+@pytest.fixture
+def app(tmp_path):
+    class ProductionConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(tmp_path / "test.db")
+        SQLITE_PROFILE = "production"
+
+    app = create_app(ProductionConfig)
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+PRODUCTION_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": 1,  # NORMAL
+    "busy_timeout": 5000,
+    "mmap_size": 268435456,
+    "cache_size": -65536,
+    "temp_store": 2,  # MEMORY
+}
+
+
+def _assert_production_pragmas(conn):
+    for name, expected in PRODUCTION_PRAGMAS.items():
+        assert conn.execute(text(f"PRAGMA {name}")).scalar() == expected, name
+
+
+def test_production_pragmas_on_every_connection(app):
+    with app.app_context():
+        # More than pool_size at once, so overflow connections are covered too
+        with ExitStack() as stack:
+            conns = [stack.enter_context(db.engine.connect()) for _ in range(db.engine.pool.size() + 2)]
+            assert len({id(c.connection.dbapi_connection) for c in conns}) == len(conns)
+            for conn in conns:
+                _assert_production_pragmas(conn)
+
+        # Connections opened after the pool is recycled get them as well
+        db.engine.dispose()
+        with db.engine.connect() as conn:
+            _assert_production_pragmas(conn)
+
+    # And so does each request's session connection, from any thread
+    results = []
+
+    def check():
+        with app.app_context():
+            try:
+                _assert_production_pragmas(db.session)
+                results.append(True)
+            except AssertionError as e:
+                results.append(e)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=check) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [True] * 4
+
+
+def test_default_profile_sets_no_pragmas(tmp_path):
+    class DefaultConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(tmp_path / "test.db")
+
+    app = create_app(DefaultConfig)
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 2  # FULL
+        db.engine.dispose()
+
+
+def test_unknown_profile_is_rejected(tmp_path):
+    class BadConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(tmp_path / "test.db")
+        SQLITE_PROFILE = "turbo"
+
+    with pytest.raises(ValueError):
+        create_app(BadConfig)
+
+
+def test_concurrent_reads_and_writes(app, user_id):
+    headers = {"X-User-Id": str(user_id)}
+    failures = []
+
+    def writer():
+        client = app.test_client()
+        for _ in range(20):
+            resp = client.post("/api/bp", json={"systolic": 120, "diastolic": 80}, headers=headers)
+            if resp.status_code != 201:
+                failures.append(resp.status_code)
+
+    def reader():
+        client = app.test_client()
+        for _ in range(40):
+            resp = client.get("/api/bp", headers=headers)
+            if resp.status_code != 200:
+                failures.append(resp.status_code)
+
+    threads = [threading.Thread(target=writer) for _ in range(4)] + [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert failures == []
+    with app.app_context():
+        assert db.session.execute(select(func.count(BPReading.id))).scalar() == 80
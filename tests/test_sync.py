@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from backend.db import db
+from backend.services.changes import BP_CHANGE, record_changes
+
+
+def test_sync_returns_changes_since_cursor(client, auth_headers):
+    start = client.get("/api/sync", headers=auth_headers).get_json()
+    assert start == {"bp": [], "mood": [], "badges": [], "cursor": 0, "has_more": False}
+
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 120, "diastolic": 80})
+    client.post("/api/mood", headers=auth_headers, json={"mood_level": 3, "note": "calm"})
+
+    first = client.get(f"/api/sync?since={start['cursor']}", headers=auth_headers).get_json()
+    assert [r["systolic"] for r in first["bp"]] == [120]
+    assert [m["note"] for m in first["mood"]] == ["calm"]
+    assert [b["code"] for b in first["badges"]] == ["FIRST_BP_READING"]
+    assert first["cursor"] > 0 and first["has_more"] is False
+
+    # Nothing new since the returned cursor
+    again = client.get(f"/api/sync?since={first['cursor']}", headers=auth_headers).get_json()
+    assert again["bp"] == again["mood"] == again["badges"] == []
+    assert again["cursor"] == first["cursor"]
+
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 130, "diastolic": 85})
+    delta = client.get(f"/api/sync?since={first['cursor']}", headers=auth_headers).get_json()
+    assert [r["systolic"] for r in delta["bp"]] == [130]
+    assert delta["badges"] == []
+
+
+def test_sync_pages_and_isolates_users(app, client, auth_headers, user_id):
+    client.post("/api/batch", headers=auth_headers, json={
+        "bp": [{"systolic": 110 + i, "diastolic": 80, "timestamp": datetime(2026, 3, 1, i).isoformat()} for i in range(5)],
+    })
+    client.post("/api/auth/register", json={"email": "other@example.com", "password": "pw"})
+    other = client.post("/api/auth/login", json={"email": "other@example.com", "password": "pw"}).get_json()
+    client.post("/api/bp", headers={"X-User-Id": str(other["user_id"])}, json={"systolic": 99, "diastolic": 60})
+
+    seen = []
+    cursor = 0
+    while True:
+        page = client.get(f"/api/sync?since={cursor}&limit=2", headers=auth_headers).get_json()
+        seen += [r["systolic"] for r in page["bp"]]
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            break
+    assert seen == [110, 111, 112, 113, 114]
+
+    assert client.get("/api/sync?since=abc", headers=auth_headers).status_code == 400
+
+
+def test_sync_skips_missing_rows(app, client, auth_headers, user_id):
+    with app.app_context():
+        record_changes(db.session, BP_CHANGE, [(user_id, 9999)])
+        db.session.commit()
+    body = client.get("/api/sync?since=0", headers=auth_headers).get_json()
+    assert body["bp"] == [] and body["cursor"] > 0
@@ -0,0 +1,198 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from backend import create_app
+from backend.db import db
+from backend.models import User
+from backend.services.window_store import (
+    WINDOW_DAYS,
+    RollingWindowStore,
+    UserWindows,
+    check_consistency,
+    get_window_store,
+)
+
+
+def _reference(readings, moods, today, days):
+    start = today.toordinal() - days
+    bp = [(s, d) for day, s, d in readings if day > start]
+    mood_days = [(day, level) for day, level in moods if day > start]
+    return {
+        "bp_count": len(bp),
+        "avg_sys": sum(s for s, _ in bp) / len(bp) if bp else None,
+        "min_dia": min((d for _, d in bp), default=None),
+        "max_sys": max((s for s, _ in bp), default=None),
+        "bp_days": len({day for day, *_ in readings if day > start}),
+        "mood_count": len(mood_days),
+        "mood_days": len({day for day, _ in mood_days}),
+    }
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_running_totals_match_brute_force_across_day_rollover(seed):
+    rng = random.Random(seed)
+    today = date(2026, 6, 1)
+    windows = UserWindows(today)
+    readings, moods = [], []
+
+    for step in range(60):
+        for _ in range(rng.randint(0, 4)):
+            day = today.toordinal() - rng.randint(-1, 400)
+            reading = (day, rng.randint(95, 170), rng.randint(55, 105))
+            windows.add_bp(*reading)
+            if day > today.toordinal() - 365:
+                readings.append(reading)
+        if rng.random() < 0.5:
+            day = today.toordinal() - rng.randint(0, 40)
+            level = rng.randint(1, 3)
+            windows.add_mood(day, level)
+            moods.append((day, level))
+
+        today += timedelta(days=rng.choice((0, 1, 1, 3, 20)))
+        assert windows.advance(today)
+
+        for days in WINDOW_DAYS:
+            stats = windows.stats(days)
+            expected = _reference(readings, moods, today, days)
+            assert stats["bp_count"] == expected["bp_count"]
+            assert stats["bp_logging_days"] == expected["bp_days"]
+            assert stats["mood_count"] == expected["mood_count"]
+            assert stats["mood_logging_days"] == expected["mood_days"]
+            if expected["bp_count"]:
+                assert stats["bp_stats"]["avg_sys"] == expected["avg_sys"]
+                assert stats["bp_stats"]["min_dia"] == expected["min_dia"]
+                assert stats["bp_stats"]["max_sys"] == expected["max_sys"]
+            else:
+                assert stats["bp_stats"] is None
+
+
+def _post_history(client, headers, days_ago, hour=9):
+    base = datetime.combine(date.today(), datetime.min.time()) + timedelta(hours=hour)
+    return client.post("/api/batch", headers=headers, json={
+        "bp": [{"systolic": 115 + d % 30, "diastolic": 70 + d % 15, "timestamp": (base - timedelta(days=d)).isoformat()}
+               for d in days_ago],
+        "mood": [{"mood_level": 1 + d % 3, "timestamp": (base - timedelta(days=d)).isoformat()}
+                 for d in days_ago if d % 2],
+    })
+
+
+def test_stats_endpoint_is_served_from_memory_after_warm(app, client, auth_headers, user_id):
+    app.config["EXPOSE_QUERY_COUNT"] = True
+    _post_history(client, auth_headers, [0, 1, 3, 6, 7, 12, 29, 30, 200, 364, 365])
+
+    first = client.get("/api/stats?days=30", headers=auth_headers)
+    assert first.status_code == 200
+    assert first.get_json()["bp_count"] == 7
+    assert first.get_json()["bp_logging_days"] == 7
+
+    # Writes are folded into the cached entry: no re-warm, and the read
+    # only looks up the user's data stamp
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 190, "diastolic": 120})
+    again = client.get("/api/stats?days=30", headers=auth_headers)
+    assert again.headers["X-Query-Count"] == "1"
+    assert again.get_json()["bp_count"] == 8
+    assert again.get_json()["bp_stats"]["max_sys"] == 190
+    assert app.extensions["window_store"].misses == 1
+
+    assert client.get("/api/stats?days=14", headers=auth_headers).status_code == 400
+
+    with app.app_context():
+        assert check_consistency(get_window_store(), db.session, user_id, date.today()) == []
+
+
+def test_replays_are_not_counted_twice(app, client, auth_headers, user_id):
+    body = {"systolic": 130, "diastolic": 85, "client_id": "0b6a5c3e-6f0e-4a8e-9f53-2d0cf1b1f7a1"}
+    client.get("/api/stats", headers=auth_headers)
+    client.post("/api/bp", headers=auth_headers, json=body)
+    client.post("/api/bp", headers=auth_headers, json=body)
+    client.post("/api/batch", headers=auth_headers, json={"bp": [body]})
+
+    assert client.get("/api/stats", headers=auth_headers).get_json()["bp_count"] == 1
+    with app.app_context():
+        assert check_consistency(get_window_store(), db.session, user_id, date.today()) == []
+
+
+def test_import_drops_cached_entry(app, client, auth_headers, user_id):
+    client.get("/api/stats", headers=auth_headers)
+    csv_body = f"timestamp,systolic,diastolic\n{datetime.utcnow().replace(microsecond=0).isoformat()},140,90\n"
+    client.post("/api/import/bp", headers={**auth_headers, "Content-Type": "text/csv"}, data=csv_body)
+
+    assert client.get("/api/stats", headers=auth_headers).get_json()["bp_count"] == 1
+    assert app.extensions["window_store"].misses == 2
+
+
+def test_bucket_cap_evicts_least_recently_used_users(app, client):
+    store = RollingWindowStore(max_buckets=15)
+    with app.app_context():
+        users = [User(email=f"u{i}@example.com", password_hash="x", name=f"U{i}") for i in range(3)]
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [u.id for u in users]
+
+    for uid in user_ids:
+        _post_history(client, {"X-User-Id": str(uid)}, range(6))
+
+    with app.app_context():
+        stamps = {uid: db.session.get(User, uid).data_updated_at for uid in user_ids}
+        for uid in user_ids:
+            store.window_stats(db.session, uid, date.today(), 7, stamps[uid])
+        # 6 buckets each: only the two most recently used fit
+        assert len(store) == 2
+        assert store.evictions == 1
+        assert store.info()["buckets"] == 12
+
+        store.window_stats(db.session, user_ids[1], date.today(), 7, stamps[user_ids[1]])
+        store.window_stats(db.session, user_ids[0], date.today(), 7, stamps[user_ids[0]])
+        assert store.misses == 4
+        assert store.window_stats(db.session, user_ids[2], date.today(), 7, stamps[user_ids[2]])["bp_count"] == 6
+
+
+def test_writes_from_another_worker_are_seen_on_next_read(app, client, auth_headers, user_id):
+    worker_b = create_app(type("WorkerB", (), dict(app.config))).test_client()
+    _post_history(client, auth_headers, [0, 1, 2])
+    assert client.get("/api/stats", headers=auth_headers).get_json()["bp_count"] == 3
+
+    worker_b.post("/api/bp", headers=auth_headers, json={"systolic": 150, "diastolic": 95})
+    assert client.get("/api/stats", headers=auth_headers).get_json()["bp_count"] == 4
+
+    # This worker's own write was made on top of a stamp it had not seen:
+    # the entry is dropped rather than missing worker B's reading
+    worker_b.post("/api/bp", headers=auth_headers, json={"systolic": 151, "diastolic": 95})
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 152, "diastolic": 95})
+    assert client.get("/api/stats", headers=auth_headers).get_json()["bp_count"] == 6
+    assert app.extensions["window_store"].misses == 3
+
+
+def test_recommendation_is_served_from_the_store(app, client, auth_headers, user_id):
+    app.config["EXPOSE_QUERY_COUNT"] = True
+    _post_history(client, auth_headers, [0, 1, 2, 4, 6, 7, 9])
+    client.get("/api/stats", headers=auth_headers)
+
+    client.post("/api/bp", headers=auth_headers, json={"systolic": 175, "diastolic": 101})
+    resp = client.get("/api/recommendation/today", headers=auth_headers)
+    # Stamp lookup and the precomputed-row check; no readings are read
+    assert resp.headers["X-Query-Count"] == "2"
+    assert resp.get_json()["latest_bp"]["systolic"] == 175
+
+    with app.app_context():
+        from backend.services.rules_engine import get_daily_recommendation
+        assert resp.get_json() == get_daily_recommendation(db.session, date.today(), user_id)
+        assert check_consistency(get_window_store(), db.session, user_id, date.today()) == []
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_store_recommendation_matches_live_path(app, client, auth_headers, user_id, seed):
+    rng = random.Random(seed)
+    base = datetime.combine(date.today(), datetime.min.time())
+    client.post("/api/batch", headers=auth_headers, json={
+        "bp": [{"systolic": rng.randint(100, 170), "diastolic": rng.randint(60, 105),
+                "timestamp": (base - timedelta(minutes=rng.randint(-600, 9 * 24 * 60))).isoformat()}
+               for _ in range(rng.randint(0, 30))],
+        "mood": [{"mood_level": rng.randint(1, 3),
+                  "timestamp": (base - timedelta(minutes=rng.randint(-600, 9 * 24 * 60))).isoformat()}
+                 for _ in range(rng.randint(0, 20))],
+    })
+    with app.app_context():
+        assert check_consistency(get_window_store(), db.session, user_id, date.today()) == []